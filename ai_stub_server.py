@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI and Claude APIs
+
+Answers /v1/chat/completions and /v1/messages with synthesized replies (or
+fixtures recorded with AI_REPLAY_MODE=record), streamed or not, with seeded
+latency, 429s, server errors and timeouts. Point a running app at it with
+OPENAI_BASE_URL / CLAUDE_BASE_URL to load-test real worker processes.
+
+Examples:
+    python ai_stub_server.py --port 8808 --latency lognormal:700:0.4 --chunk-latency fixed:30
+    python ai_stub_server.py --fixtures fixtures/ai --rate-limit-rate 0.05 --timeout-rate 0.01
+
+    OPENAI_BASE_URL=http://127.0.0.1:8808/v1 CLAUDE_BASE_URL=http://127.0.0.1:8808/v1 python main.py
+"""
+
+import os
+import sys
+import argparse
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.ai_replay import AIReplayAdapter
+from app.services.pokeapi_replay import LatencyModel
+
+def make_handler(adapter):
+    """Request handler class that answers every POST through the replay adapter"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real APIs
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            request = requests.Request('POST', f"http://stub{self.path}", data=body,
+                                       headers=dict(self.headers)).prepare()
+            try:
+                response = adapter.send(request, stream=True)
+            except requests.exceptions.Timeout:
+                self.close_connection = True  # Client gives up first; drop the connection
+                return
+
+            self.send_response(response.status_code)
+            for name, value in response.headers.items():
+                if name.lower() != 'content-length':
+                    self.send_header(name, value)
+
+            if 'Content-Length' in response.headers:
+                self.send_header('Content-Length', response.headers['Content-Length'])
+                self.end_headers()
+                self.wfile.write(response.raw.read())
+                return
+
+            # Streamed bodies go out chunk by chunk at the adapter's pace
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            while True:
+                chunk = response.raw.read(65536)
+                if not chunk:
+                    break
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stub OpenAI/Claude responses for load tests")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8808, help="Port to listen on (default: 8808)")
+    parser.add_argument('--fixtures', default=None,
+                        help="Serve recorded fixtures instead of synthesized replies")
+    parser.add_argument('--latency', default='lognormal:700:0.4',
+                        help="Time to headers: fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--chunk-latency', default='fixed:30', help="Time between streamed chunks")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument('--stall', type=float, default=60.0, help="Seconds a hanging request holds the connection")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for latency and faults")
+    args = parser.parse_args()
+
+    adapter = AIReplayAdapter(
+        args.fixtures,
+        latency=LatencyModel.from_spec(args.latency),
+        chunk_latency=LatencyModel.from_spec(args.chunk_latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        stall=args.stall,
+        seed=args.seed
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(adapter))
+    print(f"🤖 AI stub listening on http://{args.host}:{server.server_port}/v1 "
+          f"({'fixtures ' + args.fixtures if args.fixtures else 'synthesized replies'}, latency {adapter.latency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {adapter.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
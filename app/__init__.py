@@ -58,10 +58,14 @@ def create_app():
     from app.api.import_routes import import_bp
     from app.api.chat_routes import chat_bp
     from app.api.pokedex_routes import pokedex_bp
+    from app.api.sprite_routes import sprite_bp
+    from app.api.metrics_routes import metrics_bp
     
     app.register_blueprint(import_bp, url_prefix='/api')
     app.register_blueprint(chat_bp, url_prefix='/api')
     app.register_blueprint(pokedex_bp, url_prefix='/api')
+    app.register_blueprint(sprite_bp)
+    app.register_blueprint(metrics_bp)
     
     # Main routes
     from app.main_routes import main_bp
@@ -70,6 +74,14 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        
+        # create_all leaves existing tables alone, so add columns introduced since
+        from sqlalchemy import inspect, text
+        chat_columns = {column['name'] for column in inspect(db.engine).get_columns('chat_history')}
+        for column, column_type in (('source', 'VARCHAR(10)'), ('friendship', 'INTEGER')):
+            if column not in chat_columns:
+                db.session.execute(text(f"ALTER TABLE chat_history ADD COLUMN {column} {column_type}"))
+        db.session.commit()
     
     # Log AI configuration status
     ai_status = []
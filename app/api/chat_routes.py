@@ -1,13 +1,37 @@
-from flask import Blueprint, jsonify, request, current_app
+import os
+import json
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 from flask_wtf.csrf import validate_csrf
-from app.models.pokemon import db, Pokemon, ChatMessage, TeamMember
+from app.models.pokemon import db, Pokemon, ChatMessage, TeamMember, ConversationSummary
 from app.personality.chat_engine import ChatEngine
+from app.services.ai_chat_service import reply_source
+from app.services.conversation_summarizer import ConversationSummarizer
+from app.services.bulkhead import BulkheadFull
+from app.services.idempotency import IdempotencyStore, request_fingerprint
+from app.services.message_coalescer import MessageCoalescer
 from app.schemas import ChatMessageSchema, validate_json_input, sanitize_html_content
 from app.extensions import limiter
 
 chat_bp = Blueprint('chat', __name__)
 chat_engine = ChatEngine()
 
+# Messages loaded for context; the AI service trims them to its token budget
+HISTORY_FETCH_LIMIT = 30
+
+# History sent with a new message is the saved messages before it, so that is what the
+# summarizer keeps in step with
+summarizer = ConversationSummarizer(chat_engine.ai_service, max_recent=HISTORY_FETCH_LIMIT - 1)
+idempotency = IdempotencyStore(
+    ttl=float(os.getenv('IDEMPOTENCY_TTL', '86400')),
+    # A duplicate waits about as long as the original can spend getting its reply
+    wait_timeout=chat_engine.ai_service.deadline + chat_engine.ai_service.bulkhead.queue_timeout + 5,
+    abandon_after=float(os.getenv('IDEMPOTENCY_ABANDON_AFTER', '300'))
+)
+
+# Messages to one Pokemon within this many seconds (or while its previous reply is still
+# being generated) are answered together by a single AI call; 0 disables coalescing
+coalescer = MessageCoalescer(float(os.getenv('CHAT_COALESCE_WINDOW', '0')))
+
 @chat_bp.route('/pokemon/<int:pokemon_id>/messages', methods=['GET'])
 @limiter.limit("30 per minute")  # Allow frequent message checking
 def get_chat_history(pokemon_id):
@@ -19,7 +43,7 @@ def get_chat_history(pokemon_id):
         pokemon = Pokemon.query.get_or_404(pokemon_id)
         logger.info(f"Loading chat history for Pokemon ID {pokemon_id}: {pokemon.nickname}")
         
-        messages = ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.timestamp).all()
+        messages = ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.timestamp, ChatMessage.id).all()
         logger.info(f"Found {len(messages)} messages for {pokemon.nickname}")
         
         # Convert pokemon to dict with error handling
@@ -42,6 +66,8 @@ def get_chat_history(pokemon_id):
 @limiter.limit("20 per minute")  # Prevent chat spam while allowing normal conversation
 def send_message(pokemon_id):
     """Send message to Pokemon and get response with validation"""
+    idempotency_key = None  # Set once this request owns its Idempotency-Key
+    user_chat_id = None  # Set once the trainer's message is saved
     try:
         # Validate CSRF token
         try:
@@ -63,50 +89,359 @@ def send_message(pokemon_id):
         
         pokemon = Pokemon.query.get_or_404(pokemon_id)
         
-        # Save user message
+        # Double submits and client retries get the first request's result
+        requested_key = request.headers.get('Idempotency-Key', '').strip()
+        if len(requested_key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+        if requested_key:
+            previous = _previous_result(requested_key, pokemon_id, user_message)
+            if previous:
+                body, status = previous
+                response = jsonify(body)
+                if status == 200:
+                    response.headers['Idempotent-Replayed'] = 'true'
+                return response, status
+            idempotency_key = requested_key
+        
+        # Save user message, committed before the reply is generated so no write
+        # transaction (and SQLite's database lock) is held for the length of the AI call
         user_chat = ChatMessage(
             pokemon_id=pokemon_id,
             message=user_message,
             sender='user'
         )
         db.session.add(user_chat)
+        db.session.commit()
+        user_chat_id = user_chat.id
         
-        # Get recent conversation history for context
-        recent_messages = ChatMessage.query.filter_by(pokemon_id=pokemon_id)\
-            .order_by(ChatMessage.timestamp.desc())\
-            .limit(10).all()
-        
-        conversation_history = [
-            {'sender': msg.sender, 'message': msg.message}
-            for msg in reversed(recent_messages)
-        ]
-        
-        # Generate Pokemon response
-        pokemon_data = pokemon.to_dict()
-        response = chat_engine.generate_response(
-            pokemon_data, 
-            user_message, 
-            conversation_history
-        )
+        if coalescer.enabled:
+            # Whichever request answers the burst sees every message in it
+            pokemon_response, answered = coalescer.submit(
+                pokemon_id, user_chat_id, lambda batch: _answer_latest(pokemon, max(batch))
+            )
+        else:
+            pokemon_response, answered = _answer_latest(pokemon, user_chat_id), 1
         
-        # Save Pokemon response
-        pokemon_chat = ChatMessage(
-            pokemon_id=pokemon_id,
-            message=response,
-            sender='pokemon'
+        result = {
+            'success': True,
+            'user_message': user_chat.to_dict(),
+            'pokemon_response': pokemon_response
+        }
+        if answered > 1:
+            result['coalesced_messages'] = answered
+        if idempotency_key:
+            idempotency.complete(idempotency_key, 200, result)
+        return jsonify(result)
+        
+    except BulkheadFull as e:
+        _undo_send(user_chat_id, idempotency_key)
+        response = jsonify({'error': 'Pokemon are busy right now, please try again shortly', 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except Exception as e:
+        _undo_send(user_chat_id, idempotency_key)
+        return jsonify({'error': str(e)}), 500
+
+def _undo_send(user_chat_id, idempotency_key):
+    """Remove the trainer message a failed send saved and free its Idempotency-Key for a retry"""
+    db.session.rollback()
+    if user_chat_id:
+        try:
+            ChatMessage.query.filter_by(id=user_chat_id).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Could not remove unanswered message {user_chat_id}: {e}")
+    if idempotency_key:
+        idempotency.release(idempotency_key)
+
+def _answer_latest(pokemon: Pokemon, through_id: int) -> dict:
+    """
+    Generate and save the Pokemon's reply to the trainer messages up to through_id
+    Unanswered trainer messages in a row reach the AI as one turn, so a coalesced
+    burst gets a single reply that covers all of them. Messages saved after through_id
+    belong to another request and are left for it to answer
+    """
+    # Get recent conversation history for context
+    recent_messages = ChatMessage.query.filter(ChatMessage.pokemon_id == pokemon.id, ChatMessage.id <= through_id)\
+        .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())\
+        .limit(HISTORY_FETCH_LIMIT).all()
+    
+    conversation_history = [
+        {'sender': msg.sender, 'message': msg.message}
+        for msg in reversed(recent_messages)
+    ]
+    user_message = next(msg['message'] for msg in reversed(conversation_history) if msg['sender'] == 'user')
+    
+    # Generate Pokemon response
+    response = chat_engine.generate_response(
+        _with_memory(pokemon), 
+        user_message, 
+        conversation_history
+    )
+    
+    # Save Pokemon response
+    pokemon_chat = ChatMessage(
+        pokemon_id=pokemon.id,
+        message=response,
+        sender='pokemon',
+        source=reply_source(response),
+        friendship=pokemon.friendship
+    )
+    db.session.add(pokemon_chat)
+    db.session.commit()
+    summarizer.maybe_schedule(pokemon.id)
+    return pokemon_chat.to_dict()
+
+def _previous_result(key: str, pokemon_id: int, user_message: str):
+    """
+    Claim an Idempotency-Key, or get the (body, status) to answer a repeated request with
+    Returns None when this request should run; it then owns the key and must complete
+    or release it. A repeat of a request still in flight waits for its result
+    """
+    request_hash = request_fingerprint(pokemon_id, user_message)
+    record = idempotency.claim(key, request_hash)
+    while record is not None:
+        if record.request_hash != request_hash:
+            return {'error': 'Idempotency-Key was already used for a different message'}, 422
+        if record.pending:
+            record = idempotency.wait(key)
+            if record is None:
+                # The first request failed and let go of the key - this one runs instead
+                record = idempotency.claim(key, request_hash)
+                continue
+            if record.pending:
+                return {'error': 'A request with this Idempotency-Key is still being processed'}, 409
+        return json.loads(record.response_body), record.status_code
+    return None
+
+def _with_memory(pokemon: Pokemon) -> dict:
+    """Pokemon data for the chat engine, including its summary of older conversations"""
+    pokemon_data = pokemon.to_dict()
+    if pokemon.conversation_summary and pokemon.conversation_summary.summary:
+        pokemon_data['memory'] = pokemon.conversation_summary.summary
+    return pokemon_data
+
+def _sse_event(event: str, payload: dict) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def _sse_replay(result: dict) -> Response:
+    """Stream a stored result again, as one token event followed by done"""
+    body = _sse_event('token', {'text': result['pokemon_response']['message']}) + _sse_event('done', result)
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@chat_bp.route('/pokemon/<int:pokemon_id>/send/stream', methods=['POST'])
+@limiter.limit("20 per minute")  # Same budget as the non-streaming endpoint
+def send_message_stream(pokemon_id):
+    """Send message to Pokemon and stream the response back as Server-Sent Events"""
+    try:
+        validate_csrf(request.headers.get('X-CSRFToken'))
+    except Exception as e:
+        current_app.logger.warning(f"CSRF validation failed: {str(e)}")
+        return jsonify({'error': 'CSRF token missing or invalid'}), 403
+    
+    is_valid, validated_data = validate_json_input(ChatMessageSchema, request.get_json())
+    if not is_valid:
+        return jsonify({'error': 'Invalid message data', 'details': validated_data}), 400
+    
+    user_message = sanitize_html_content(validated_data['message'].strip())
+    pokemon = Pokemon.query.get_or_404(pokemon_id)
+    
+    idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+    if len(idempotency_key) > 255:
+        return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+    if idempotency_key:
+        previous = _previous_result(idempotency_key, pokemon_id, user_message)
+        if previous:
+            body, status = previous
+            if status != 200:
+                return jsonify(body), status
+            return _sse_replay(body)
+    
+    if coalescer.enabled:
+        events = _coalesced_events(pokemon, user_message, idempotency_key)
+        return _release_on_close(_event_stream(events), idempotency_key)
+    
+    # Recent conversation history for context, ending with the new message
+    recent_messages = ChatMessage.query.filter_by(pokemon_id=pokemon_id)\
+        .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())\
+        .limit(HISTORY_FETCH_LIMIT - 1).all()
+    
+    conversation_history = [
+        {'sender': msg.sender, 'message': msg.message}
+        for msg in reversed(recent_messages)
+    ]
+    conversation_history.append({'sender': 'user', 'message': user_message})
+    
+    pokemon_data = _with_memory(pokemon)
+    
+    def generate():
+        chunks = []
+        source = 'ai'  # A fallback reply arrives as one tagged chunk
+        finished = False
+        try:
+            # Something to show right away; only the final reply is persisted
+            reaction = chat_engine.provisional_reaction(pokemon_data, user_message, conversation_history)
+            if reaction:
+                yield _sse_event('provisional', {'text': reaction, 'mode': chat_engine.provisional_mode})
+            
+            for chunk in chat_engine.stream_response(pokemon_data, user_message, conversation_history):
+                chunks.append(chunk)
+                source = reply_source(chunk)
+                yield _sse_event('token', {'text': chunk})
+            
+            reply = ''.join(chunks).strip()
+            if reaction and chat_engine.provisional_mode == 'append':
+                reply = f"{reaction} {reply}"
+                if source == 'ai':
+                    source = 'mixed'  # Opens with template text, so kept out of fallback training
+            
+            # Persist both sides once the full response is known, the trainer's message
+            # first so ids and timestamps agree on the order
+            user_chat = ChatMessage(
+                pokemon_id=pokemon_id,
+                message=user_message,
+                sender='user'
+            )
+            pokemon_chat = ChatMessage(
+                pokemon_id=pokemon_id,
+                message=reply,
+                sender='pokemon',
+                source=source,
+                friendship=pokemon_data.get('friendship')
+            )
+            db.session.add(user_chat)
+            db.session.add(pokemon_chat)
+            db.session.commit()
+            summarizer.maybe_schedule(pokemon_id)
+            
+            result = {
+                'success': True,
+                'user_message': user_chat.to_dict(),
+                'pokemon_response': pokemon_chat.to_dict()
+            }
+            if idempotency_key:
+                idempotency.complete(idempotency_key, 200, result)
+            finished = True
+            yield _sse_event('done', result)
+        except BulkheadFull as e:
+            yield _sse_event('error', {'error': 'Pokemon are busy right now, please try again shortly', 'retry_after': e.retry_after})
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Streaming chat failed for Pokemon ID {pokemon_id}: {e}")
+            yield _sse_event('error', {'error': str(e)})
+        finally:
+            # Failed or abandoned by the client - a retry with the same key runs again
+            if idempotency_key and not finished:
+                idempotency.release(idempotency_key)
+    
+    return _release_on_close(_event_stream(generate()), idempotency_key)
+
+def _release_on_close(response: Response, idempotency_key: str) -> Response:
+    """
+    Free the Idempotency-Key when the stream closes without finishing
+    A client that disconnects before the stream starts never runs its generator's
+    finally, which would leave the key pending; a completed key is left as it is
+    """
+    if idempotency_key:
+        app = current_app._get_current_object()
+        
+        def release():
+            with app.app_context():
+                idempotency.release(idempotency_key)
+        
+        response.call_on_close(release)
+    return response
+
+def _coalesced_events(pokemon: Pokemon, user_message: str, idempotency_key: str):
+    """
+    Events for a streamed message answered together with the rest of its burst
+    One generation answers the whole batch, so after the provisional reaction the
+    reply arrives as a single token event, the same one on every stream in the batch
+    """
+    user_chat_id = None
+    finished = False
+    try:
+        # Saved first so whichever request answers the burst sees this message
+        user_chat = ChatMessage(
+            pokemon_id=pokemon.id,
+            message=user_message,
+            sender='user'
         )
-        db.session.add(pokemon_chat)
+        db.session.add(user_chat)
         db.session.commit()
+        user_chat_id = user_chat.id
+        user_message_data = user_chat.to_dict()
         
-        return jsonify({
-            'success': True,
-            'user_message': user_chat.to_dict(),
-            'pokemon_response': pokemon_chat.to_dict()
-        })
+        reaction = chat_engine.provisional_reaction(_with_memory(pokemon), user_message)
+        if reaction:
+            # The shared reply cannot carry each stream's own reaction, so it always replaces it
+            yield _sse_event('provisional', {'text': reaction, 'mode': 'replace'})
         
+        pokemon_response, answered = coalescer.submit(
+            pokemon.id, user_chat_id, lambda batch: _answer_latest(pokemon, max(batch))
+        )
+        result = {
+            'success': True,
+            'user_message': user_message_data,
+            'pokemon_response': pokemon_response
+        }
+        if answered > 1:
+            result['coalesced_messages'] = answered
+        if idempotency_key:
+            idempotency.complete(idempotency_key, 200, result)
+        finished = True
+        yield _sse_event('token', {'text': pokemon_response['message']})
+        yield _sse_event('done', result)
+    except BulkheadFull as e:
+        yield _sse_event('error', {'error': 'Pokemon are busy right now, please try again shortly', 'retry_after': e.retry_after})
     except Exception as e:
         db.session.rollback()
+        current_app.logger.error(f"Streaming chat failed for Pokemon ID {pokemon.id}: {e}")
+        yield _sse_event('error', {'error': str(e)})
+    finally:
+        # Failed or abandoned by the client before its reply - a retry runs again
+        if not finished:
+            _undo_send(user_chat_id, idempotency_key)
+
+def _event_stream(events) -> Response:
+    """Server-Sent Events response for a generator of formatted events"""
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+@chat_bp.route('/pokemon/<int:pokemon_id>/warmup', methods=['POST'])
+@limiter.limit("30 per minute")  # Fired on every Pokemon selection
+def warm_up_chat(pokemon_id):
+    """Prepare the prompt, history and provider connection before the first message"""
+    try:
+        validate_csrf(request.headers.get('X-CSRFToken'))
+    except Exception as e:
+        current_app.logger.warning(f"CSRF validation failed: {str(e)}")
+        return jsonify({'error': 'CSRF token missing or invalid'}), 403
+    
+    pokemon = Pokemon.query.get_or_404(pokemon_id)
+    recent_messages = ChatMessage.query.filter_by(pokemon_id=pokemon_id)\
+        .order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())\
+        .limit(HISTORY_FETCH_LIMIT).all()
+    
+    conversation_history = [
+        {'sender': msg.sender, 'message': msg.message}
+        for msg in reversed(recent_messages)
+    ]
+    
+    try:
+        warmed = chat_engine.ai_service.warm_up(_with_memory(pokemon), conversation_history)
+    except Exception as e:
+        current_app.logger.warning(f"Chat warm-up failed for Pokemon ID {pokemon_id}: {e}")
         return jsonify({'error': str(e)}), 500
+    
+    return jsonify({'success': True, 'warmed': warmed})
 
 @chat_bp.route('/team/active', methods=['GET'])
 def get_active_team():
@@ -132,6 +467,7 @@ def clear_chat_history(pokemon_id):
         
         # Delete all messages for this Pokemon
         ChatMessage.query.filter_by(pokemon_id=pokemon_id).delete()
+        ConversationSummary.query.filter_by(pokemon_id=pokemon_id).delete()
         db.session.commit()
         
         return jsonify({
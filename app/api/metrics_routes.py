@@ -0,0 +1,56 @@
+import os
+import hmac
+from flask import Blueprint, Response, abort, request
+from app.services.metrics import registry
+from app.api.chat_routes import chat_engine
+from app.extensions import limiter
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Scrapers allowed without METRICS_TOKEN: only the machine the app runs on
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+# Live state of the chat engine's AI service, read at scrape time
+registry.gauge_callback(
+    'ai_bulkhead_in_flight', 'AI requests currently holding a bulkhead slot', (),
+    lambda: {(): chat_engine.ai_service.bulkhead.stats()['in_flight']}
+)
+registry.gauge_callback(
+    'ai_bulkhead_waiting', 'AI requests currently queued for a bulkhead slot', (),
+    lambda: {(): chat_engine.ai_service.bulkhead.stats()['waiting']}
+)
+registry.gauge_callback(
+    'ai_bulkhead_capacity', 'Concurrent AI requests allowed', (),
+    lambda: {(): chat_engine.ai_service.bulkhead.max_concurrent}
+)
+registry.gauge_callback(
+    'ai_provider_circuit_open', 'Whether the provider is out of rotation (1) or not (0)', ('provider',),
+    lambda: {(name,): int(health['circuit_open']) for name, health in chat_engine.ai_service.router.snapshot().items()}
+)
+registry.gauge_callback(
+    'ai_provider_latency_ewma_seconds', 'Smoothed latency the router ranks providers by', ('provider',),
+    lambda: {
+        (name,): health['latency'] for name, health in chat_engine.ai_service.router.snapshot().items()
+        if health['latency'] is not None
+    }
+)
+registry.gauge_callback(
+    'ai_provider_error_rate', 'Smoothed error rate of the provider', ('provider',),
+    lambda: {(name,): health['error_rate'] for name, health in chat_engine.ai_service.router.snapshot().items()}
+)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+@limiter.exempt  # Scraped on a fixed interval by monitoring
+def get_metrics():
+    """
+    Serve AI provider metrics in the Prometheus text format
+    Requires the METRICS_TOKEN bearer token when one is set, otherwise a local scraper
+    """
+    token = os.environ.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+    elif request.remote_addr not in LOOPBACK_ADDRESSES:
+        abort(403)
+    
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,38 @@
+from flask import Blueprint, abort, redirect, request, send_file
+from app.services.sprite_cache_service import SpriteCacheService
+from app.extensions import limiter
+
+sprite_bp = Blueprint('sprites', __name__)
+sprite_cache = SpriteCacheService()
+
+SPRITE_MAX_AGE = 365 * 24 * 3600  # Sprites for a species never change
+
+def _served_from_cache():
+    """Cached sprites (and recent failures) cost no upstream fetch, so only misses are limited"""
+    args = request.view_args or {}
+    return (sprite_cache.is_valid(args['species_id'], args['variant'], args['size'])
+            and sprite_cache.is_cached(args['species_id'], args['variant'], args['size']))
+
+@sprite_bp.route('/sprites/<int:species_id>/<variant>/<int:size>', methods=['GET'])
+@limiter.limit("120 per minute", exempt_when=_served_from_cache)  # A Pokedex page loads one sprite per card
+def get_sprite(species_id, variant, size):
+    """Serve a locally cached, resized Pokemon sprite"""
+    if not sprite_cache.is_valid(species_id, variant, size):
+        abort(404)
+    
+    result = sprite_cache.get_thumbnail(species_id, variant, size)
+    if result is None:
+        # Upstream unavailable for now - let the browser try the original directly
+        return redirect(sprite_cache.source_url(species_id, variant))
+    
+    path, digest = result
+    response = send_file(
+        path,
+        mimetype='image/png',
+        etag=digest,
+        max_age=SPRITE_MAX_AGE,
+        conditional=True
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
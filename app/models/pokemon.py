@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
+from app.services.sprite_cache_service import thumbnail_path
 
 db = SQLAlchemy()
 
@@ -42,6 +43,7 @@ class Pokemon(db.Model):
     # Relationships
     team_members = db.relationship('TeamMember', backref='pokemon', lazy=True, cascade='all, delete-orphan')
     chat_messages = db.relationship('ChatMessage', backref='pokemon', lazy=True, cascade='all, delete-orphan')
+    conversation_summary = db.relationship('ConversationSummary', backref='pokemon', uselist=False, cascade='all, delete-orphan')
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -114,10 +116,15 @@ class Pokemon(db.Model):
         return "Unknown"
     
     def get_best_sprite(self):
-        """Get the best available sprite URL"""
-        return (self.official_artwork_url or 
-                self.sprite_url or 
-                f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{self.species_id}.png")
+        """Get the best available sprite URL (served from the local sprite cache)"""
+        return self.get_sprite_thumbnail(256)
+    
+    def get_sprite_thumbnail(self, size=128):
+        """Get a locally cached thumbnail URL for the stored sprite, or the stored URL if it cannot be cached"""
+        source = self.official_artwork_url or self.sprite_url
+        if not source:
+            return f"/sprites/{self.species_id}/artwork/{size}"
+        return thumbnail_path(source, size) or source
     
     def to_dict(self):
         """Convert Pokemon to dictionary"""
@@ -140,6 +147,7 @@ class Pokemon(db.Model):
             'sprite_shiny_url': self.sprite_shiny_url,
             'official_artwork_url': self.official_artwork_url,
             'best_sprite': self.get_best_sprite(),
+            'sprite_thumbnail': self.get_sprite_thumbnail(),
             'description': self.description,
             'genus': self.genus,
             'height': self.height,
@@ -190,6 +198,8 @@ class ChatMessage(db.Model):
     pokemon_id = db.Column(db.Integer, db.ForeignKey('pokemon.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     sender = db.Column(db.String(10), nullable=False)  # 'user' or 'pokemon'
+    source = db.Column(db.String(10))  # Pokemon replies: 'ai', 'mixed' (AI after a template reaction), 'template' or 'ngram'
+    friendship = db.Column(db.Integer)  # Pokemon replies: the Pokemon's friendship when written
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -201,4 +211,40 @@ class ChatMessage(db.Model):
             'sender': self.sender,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
             'pokemon_nickname': self.pokemon.nickname if self.pokemon else None
-        }
\ No newline at end of file
+        }
+
+class ConversationSummary(db.Model):
+    """Rolling summary of older chat messages, the Pokemon's long-term memory"""
+    __tablename__ = 'conversation_summary'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pokemon_id = db.Column(db.Integer, db.ForeignKey('pokemon.id'), nullable=False, unique=True)
+    summary = db.Column(db.Text, nullable=False, default='')
+    last_message_id = db.Column(db.Integer, nullable=False, default=0)  # Newest ChatMessage folded in
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert ConversationSummary to dictionary"""
+        return {
+            'id': self.id,
+            'pokemon_id': self.pokemon_id,
+            'summary': self.summary,
+            'last_message_id': self.last_message_id,
+            'message_count': self.message_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class IdempotencyRecord(db.Model):
+    """Stored result of a chat send, returned again when its Idempotency-Key is repeated"""
+    __tablename__ = 'idempotency_record'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)  # Pokemon and message the key was first used for
+    status_code = db.Column(db.Integer)  # None while the first request is still in flight
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    @property
+    def pending(self):
+        return self.status_code is None
@@ -1,16 +1,110 @@
+import os
+import re
 import random
 import logging
-from typing import Dict, List
-from app.services.ai_chat_service import AIChatService
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.ai_chat_service import AIChatService, FallbackReply
+from app.services.bulkhead import BulkheadFull
+from app.personality.template_rewriter import TemplateRewriter
+from app.personality.intent_classifier import IntentClassifier
 
 logger = logging.getLogger(__name__)
 
+# An *action* in a template reply, e.g. "*ears perk up*"
+BODY_LANGUAGE = re.compile(r'\*[^*]+\*')
+
+# Friendship and level modifiers for template replies, applied by TemplateRewriter
+DISTANT_REWRITES = [
+    ("!", "..."),  # Less enthusiastic
+    ("*bounces excitedly*", "*keeps distance, watching*"),
+    ("*approaches*", "*stays back, observing*"),
+    ("*nuzzles*", "*sniffs cautiously from afar*"),
+    ("trainer", "human"),  # More formal address
+]
+
+AFFECTIONATE_REWRITES = [
+    ("*approaches slowly*", "*bounds over eagerly*"),
+    ("*keeps distance*", "*comes close, seeking comfort*"),
+    ("human", "my trusted human"),
+]
+
+BONDED_REWRITE = ("you", "you, my bonded one")  # Used in a fifth of affectionate replies
+
+YOUNG_REWRITES = [
+    ("*settles*", "*wiggles impatiently*"),
+    ("*approaches*", "*bounds over playfully*"),
+    ("*listens*", "*ears perked, practically vibrating with attention*"),
+    ("I sense", "Ooh, I feel"),
+    ("I understand", "I think I get it!"),
+]
+
+WISE_REWRITES = [
+    ("*bounces*", "*settles with dignified composure*"),
+    ("*spins*", "*moves with measured grace*"),
+    ("That's exciting!", "That holds deep meaning."),
+]
+
+# Random touches added on top of the rewrites, and how often
+BONDED_CHANCE = 0.2
+BONDING_CHANCE = 0.4
+BONDING_BEHAVIORS = [
+    "*rubs against you affectionately*",
+    "*nuzzles you with deep trust*",
+    "*settles close to your side*",
+    "*purrs contentedly in your presence*"
+]
+
+LEVEL_ADDITION_CHANCE = 0.3
+LEVEL_ADDITIONS = {
+    'young': [
+        " *bounces with puppy-like enthusiasm*",
+        " *spins in excited circles*",
+        " *paws at the ground with eager energy*",
+        " *tilts head with innocent curiosity*"
+    ],
+    'wise': [
+        " *gazes with the wisdom of many seasons*",
+        " *nods with ancient understanding* I have seen much in my long life.",
+        " *settles with the patience that comes from experience*",
+        " My old bones have felt many such moments..."
+    ]
+}
+
+# Traits _get_primary_personality_trait can return
+PERSONALITY_TRAITS = ('energetic', 'gentle', 'confident', 'playful', 'mysterious', 'shy')
+FRIENDSHIP_BANDS = (None, 'distant', 'affectionate')
+LEVEL_BANDS = (None, 'young', 'wise')
+
 class ChatEngine:
     """Enhanced Pokemon personality-based chat response engine with AI integration"""
     
     def __init__(self):
         self.response_templates = self._load_response_templates()
         self.conversation_context = {}
+        # Greeting, compliment, question or general - picks the template group for a message
+        self.intent_classifier = IntentClassifier()
+        
+        # Each modifier's replacements run as one scan of the reply
+        self.rewriters = {
+            'distant': TemplateRewriter(DISTANT_REWRITES),
+            'affectionate': TemplateRewriter(AFFECTIONATE_REWRITES),
+            'bonded': TemplateRewriter(AFFECTIONATE_REWRITES + [BONDED_REWRITE]),
+            'young': TemplateRewriter(YOUNG_REWRITES),
+            'wise': TemplateRewriter(WISE_REWRITES)
+        }
+        
+        # Every template with its friendship and level rewrites already applied, keyed by
+        # (trait, intent, friendship band, level band); replies only make the random choices
+        self.template_variants = {}
+        for intent in self.response_templates:
+            for trait in PERSONALITY_TRAITS:
+                for friendship_band in FRIENDSHIP_BANDS:
+                    for level_band in LEVEL_BANDS:
+                        self._template_variants(trait, intent, friendship_band, level_band)
+        
+        # Instant template reaction shown while the AI reply is generated: off, replace
+        # (the AI reply takes its place) or append (the AI reply follows it)
+        self.provisional_mode = os.getenv('CHAT_PROVISIONAL_REPLY', 'off').lower()
         
         # Initialize AI service for dynamic responses
         self.ai_service = AIChatService()
@@ -38,27 +132,121 @@ class ChatEngine:
                 if ai_response and len(ai_response.strip()) > 0:
                     logger.info(f"Generated AI response for {pokemon_data.get('nickname', 'Pokemon')}")
                     return ai_response
+            except BulkheadFull:
+                raise
             except Exception as e:
                 logger.error(f"AI response generation failed: {e}")
         
         # Fallback to template-based responses
         logger.info(f"Using template-based response for {pokemon_data.get('nickname', 'Pokemon')}")
+        return self._generate_fallback_response(pokemon_data, user_message, conversation_history)
+    
+    def stream_response(self, pokemon_data: Dict, user_message: str, conversation_history: List = None) -> Iterator[str]:
+        """Stream a personality-appropriate response as text chunks, choosing AI or templates like generate_response"""
+        nickname = pokemon_data.get('nickname', 'Pokemon')
+        
+        # Check if this is the first conversation (no previous messages)
+        if not conversation_history:
+            yield from self._stream_first_encounter(pokemon_data, user_message)
+            return
+        
+        # Try AI-powered response first if available
+        if self.ai_service.is_available():
+            streamed = False
+            try:
+                for chunk in self.ai_service.stream_pokemon_response(
+                    user_message, pokemon_data, conversation_history
+                ):
+                    streamed = True
+                    yield chunk
+            except BulkheadFull:
+                raise
+            except Exception as e:
+                logger.error(f"AI response streaming failed: {e}")
+            if streamed:
+                logger.info(f"Streamed AI response for {nickname}")
+                return
+        
+        # Fallback to template-based responses
+        logger.info(f"Using template-based response for {nickname}")
+        yield self._generate_fallback_response(pokemon_data, user_message, conversation_history)
+    
+    def provisional_reaction(self, pokemon_data: Dict, user_message: str, conversation_history: List = None) -> Optional[str]:
+        """
+        Body-language line from the templates to show while the AI reply is generated
+        Returns None when the mode is off or no AI call will be made (the template reply
+        is instant then anyway)
+        """
+        if self.provisional_mode not in ('replace', 'append') or not self.ai_service.is_available():
+            return None
+        
+        response = self._generate_template_response(pokemon_data, user_message, conversation_history)
+        match = BODY_LANGUAGE.search(response)
+        return match.group(0) if match else None
+    
+    def _generate_fallback_response(self, pokemon_data: Dict, user_message: str, conversation_history: List = None) -> str:
+        """Reply without AI: sampled from the trained fallback model when it has one, else a template"""
+        # Replies learned from stored conversations are more varied than the templates
+        learned = self.ai_service.sample_fallback_model(pokemon_data)
+        if learned:
+            return learned
         return self._generate_template_response(pokemon_data, user_message, conversation_history)
     
     def _generate_template_response(self, pokemon_data: Dict, user_message: str, conversation_history: List = None) -> str:
-        """Generate template-based response (original logic)"""
+        """Generate template-based response from the precomputed variants"""
         personality = pokemon_data.get('personality', {})
         
         # Analyze user message for context
         message_type = self._analyze_message_type(user_message.lower())
         
-        # Select appropriate response template based on personality and message type
-        response_template = self._select_response_template(personality, message_type)
-        
-        # Generate personalized response
-        response = self._personalize_response(response_template, pokemon_data, user_message)
-        
-        return response
+        # Select a template already personalized for the trait, friendship and level
+        friendship_band, level_band = self._modifier_bands(pokemon_data)
+        variants = self._template_variants(
+            self._get_primary_personality_trait(personality), message_type, friendship_band, level_band
+        )
+        response = random.choice(variants)
+        
+        # Random touches: the bonded rewrite, then a bonding behavior, then a level addition
+        if friendship_band == 'affectionate':
+            with_behaviors = response[random.random() < BONDED_CHANCE]
+            response = random.choice(with_behaviors[1:]) if random.random() < BONDING_CHANCE else with_behaviors[0]
+        if level_band and random.random() < LEVEL_ADDITION_CHANCE:
+            response += random.choice(LEVEL_ADDITIONS[level_band])
+        
+        return FallbackReply(response, 'template')
+    
+    def _template_variants(self, trait: str, message_type: str, friendship_band: Optional[str], level_band: Optional[str]) -> List:
+        """Expanded templates for a trait, intent and pair of bands, built on first use"""
+        key = (trait, message_type, friendship_band, level_band)
+        variants = self.template_variants.get(key)
+        if variants is None:
+            variants = self.template_variants[key] = [
+                self._expand_template(template, friendship_band, level_band)
+                for template in self._trait_templates(trait, message_type)
+            ]
+        return variants
+    
+    def _expand_template(self, template: str, friendship_band: Optional[str], level_band: Optional[str]):
+        """
+        A template with every rewrite that does not depend on chance applied
+        Affectionate templates expand to (plain, bonded) rewrites, each as the reply on its
+        own followed by the reply with each bonding behavior, so the level rewrite covers
+        the behavior too
+        """
+        def for_level(response: str) -> str:
+            return self.rewriters[level_band].apply(response) if level_band else response
+        
+        if friendship_band == 'distant':
+            response = self.rewriters['distant'].apply(template)
+            if "*" not in response:  # Wary body language unless the template has some
+                response = "*ears back, maintaining distance* " + response
+            return for_level(response)
+        if friendship_band == 'affectionate':
+            return tuple(
+                tuple(for_level(response) for response in [base] + [f"{base} {behavior}" for behavior in BONDING_BEHAVIORS])
+                for base in (self.rewriters['affectionate'].apply(template), self.rewriters['bonded'].apply(template))
+            )
+        return for_level(template)
     
     def _load_response_templates(self) -> Dict:
         """Load response templates organized by personality traits and message types"""
@@ -195,30 +383,12 @@ class ChatEngine:
     
     def _analyze_message_type(self, message: str) -> str:
         """Analyze user message to determine response type needed"""
-        greetings = ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']
-        compliments = ['amazing', 'awesome', 'great', 'wonderful', 'beautiful', 'cool', 'nice', 'good']
-        questions = ['?', 'what', 'why', 'how', 'when', 'where', 'who', 'which', 'do you', 'are you', 'can you']
-        
-        if any(greeting in message for greeting in greetings):
-            return 'greeting'
-        elif any(compliment in message for compliment in compliments):
-            return 'compliment'
-        elif any(question in message for question in questions):
-            return 'question'
-        else:
-            return 'general'
+        return self.intent_classifier.classify(message)
     
-    def _select_response_template(self, personality: Dict, message_type: str) -> str:
-        """Select appropriate response template based on personality"""
-        # Determine primary personality trait
-        primary_trait = self._get_primary_personality_trait(personality)
-        
-        # Get templates for message type and personality
+    def _trait_templates(self, trait: str, message_type: str) -> List[str]:
+        """Templates for message type and personality"""
         templates = self.response_templates.get(message_type, {})
-        trait_templates = templates.get(primary_trait, templates.get('general', ['I understand.']))
-        
-        # Select random template
-        return random.choice(trait_templates)
+        return templates.get(trait, templates.get('general', ['I understand.']))
     
     def _get_primary_personality_trait(self, personality: Dict) -> str:
         """Determine primary personality trait from Pokemon data"""
@@ -242,121 +412,24 @@ class ChatEngine:
         else:
             return 'gentle'  # Default fallback
     
-    def _personalize_response(self, template: str, pokemon_data: Dict, user_message: str) -> str:
-        """Add personal touches to response based on Pokemon data"""
-        response = template
-        
-        # Add friendship-based modifications
+    def _modifier_bands(self, pokemon_data: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """Friendship modifier (distant, affectionate or None) and level modifier (young, wise or None)"""
         friendship_level = pokemon_data.get('friendship', 0)
         if friendship_level < 70:
-            # Distant responses
-            response = self._make_response_distant(response)
+            friendship_band = 'distant'
         elif friendship_level > 150:
-            # Affectionate responses
-            response = self._make_response_affectionate(response, pokemon_data.get('nickname', 'friend'))
+            friendship_band = 'affectionate'
+        else:
+            friendship_band = None
         
-        # Add level-based maturity
         level = pokemon_data.get('level', 1)
         if level < 25:
-            response = self._make_response_young(response)
+            level_band = 'young'
         elif level > 50:
-            response = self._make_response_wise(response)
-        
-        return response
-    
-    def _make_response_distant(self, response: str) -> str:
-        """Make response more wary/untrusting for low friendship - authentic animal behavior"""
-        # Add cautious body language and keep distance
-        distant_modifiers = [
-            lambda r: r.replace("!", "..."),  # Less enthusiastic
-            lambda r: r.replace("*bounces excitedly*", "*keeps distance, watching*"),
-            lambda r: r.replace("*approaches*", "*stays back, observing*"),
-            lambda r: r.replace("*nuzzles*", "*sniffs cautiously from afar*"),
-            lambda r: r.replace("trainer", "human"),  # More formal address
-        ]
-        
-        for modifier in distant_modifiers:
-            response = modifier(response)
-        
-        # Add wary animal behavior
-        if "*" not in response:  # Only add if no body language already present
-            response = "*ears back, maintaining distance* " + response
-        
-        return response
-    
-    def _make_response_affectionate(self, response: str, nickname: str) -> str:
-        """Make response more bonded/trusting for high friendship - authentic animal behavior"""
-        # Add close bonding behaviors
-        affectionate_modifiers = [
-            lambda r: r.replace("*approaches slowly*", "*bounds over eagerly*"),
-            lambda r: r.replace("*keeps distance*", "*comes close, seeking comfort*"),
-            lambda r: r.replace("human", "my trusted human"),
-            lambda r: r.replace("you", "you, my bonded one") if random.random() < 0.2 else r,
-        ]
-        
-        for modifier in affectionate_modifiers:
-            response = modifier(response)
-        
-        # Add bonded animal behaviors
-        if random.random() < 0.4:
-            bonding_behaviors = [
-                "*rubs against you affectionately*",
-                "*nuzzles you with deep trust*", 
-                "*settles close to your side*",
-                "*purrs contentedly in your presence*"
-            ]
-            behavior = random.choice(bonding_behaviors)
-            response += f" {behavior}"
-        
-        return response
-    
-    def _make_response_young(self, response: str) -> str:
-        """Make response show youthful animal energy and curiosity"""
-        young_modifiers = [
-            lambda r: r.replace("*settles*", "*wiggles impatiently*"),
-            lambda r: r.replace("*approaches*", "*bounds over playfully*"),
-            lambda r: r.replace("*listens*", "*ears perked, practically vibrating with attention*"),
-            lambda r: r.replace("I sense", "Ooh, I feel"),
-            lambda r: r.replace("I understand", "I think I get it!"),
-        ]
-        
-        for modifier in young_modifiers:
-            response = modifier(response)
-        
-        # Add youthful animal behaviors
-        if random.random() < 0.3:
-            youthful_additions = [
-                " *bounces with puppy-like enthusiasm*",
-                " *spins in excited circles*", 
-                " *paws at the ground with eager energy*",
-                " *tilts head with innocent curiosity*"
-            ]
-            response += random.choice(youthful_additions)
-        
-        return response
-    
-    def _make_response_wise(self, response: str) -> str:
-        """Make response show mature animal wisdom and experience"""
-        wise_modifiers = [
-            lambda r: r.replace("*bounces*", "*settles with dignified composure*"),
-            lambda r: r.replace("*spins*", "*moves with measured grace*"),
-            lambda r: r.replace("That's exciting!", "That holds deep meaning."),
-        ]
-        
-        for modifier in wise_modifiers:
-            response = modifier(response)
-        
-        # Add wise animal behaviors and insights
-        if random.random() < 0.3:
-            wise_additions = [
-                " *gazes with the wisdom of many seasons*",
-                " *nods with ancient understanding* I have seen much in my long life.",
-                " *settles with the patience that comes from experience*",
-                " My old bones have felt many such moments..."
-            ]
-            response += random.choice(wise_additions)
-        
-        return response
+            level_band = 'wise'
+        else:
+            level_band = None
+        return friendship_band, level_band
     
     def _handle_first_encounter(self, pokemon_data: Dict, user_message: str) -> str:
         """Handle the very first conversation with a Pokemon - special encounter scenario"""
@@ -369,7 +442,55 @@ class ChatEngine:
         if self.ai_service.is_available():
             try:
                 # Build special first encounter prompt
-                first_encounter_prompt = f"""
+                first_encounter_prompt = self._build_first_encounter_prompt(pokemon_data, first_encounter, user_message)
+                
+                # Generate AI response with first encounter context
+                ai_response = self.ai_service.complete(
+                    self.ai_service.personality_prompt(pokemon_data),
+                    first_encounter_prompt
+                )
+                
+                if ai_response and len(ai_response.strip()) > 0:
+                    logger.info(f"Generated AI first encounter for {pokemon_data.get('nickname', 'Pokemon')}")
+                    return ai_response
+            
+            except BulkheadFull:
+                raise
+            except Exception as e:
+                logger.error(f"AI first encounter generation failed: {e}")
+        
+        # Fallback to template-based first encounter
+        logger.info(f"Using template-based first encounter for {pokemon_data.get('nickname', 'Pokemon')}")
+        return self._generate_template_first_encounter(pokemon_data, first_encounter, user_message)
+    
+    def _stream_first_encounter(self, pokemon_data: Dict, user_message: str) -> Iterator[str]:
+        """Streaming counterpart of _handle_first_encounter"""
+        from app.services.pokemon_intelligence import PokemonPersonalityBuilder
+        
+        first_encounter = PokemonPersonalityBuilder.get_first_encounter_scenario(pokemon_data)
+        
+        if self.ai_service.is_available():
+            streamed = False
+            try:
+                for chunk in self.ai_service.stream_completion(
+                    self.ai_service.personality_prompt(pokemon_data),
+                    self._build_first_encounter_prompt(pokemon_data, first_encounter, user_message)
+                ):
+                    streamed = True
+                    yield chunk
+            except BulkheadFull:
+                raise
+            except Exception as e:
+                logger.error(f"AI first encounter streaming failed: {e}")
+            if streamed:
+                return
+        
+        logger.info(f"Using template-based first encounter for {pokemon_data.get('nickname', 'Pokemon')}")
+        yield self._generate_template_first_encounter(pokemon_data, first_encounter, user_message)
+    
+    def _build_first_encounter_prompt(self, pokemon_data: Dict, first_encounter: Dict, user_message: str) -> str:
+        """Build the special prompt for the very first conversation"""
+        return f"""
 FIRST ENCOUNTER SCENARIO: This is your very first interaction with your trainer in this digital space.
 
 {first_encounter['awakening_description']}
@@ -391,26 +512,6 @@ Your first words should reflect:
 Trainer's first message to you: "{user_message}"
 
 Respond as {pokemon_data.get('nickname', pokemon_data.get('species_name', 'Pokemon'))} experiencing this jarring first moment of awareness in the digital space. Your response should feel authentically like a frightened/confused animal that has just gained the ability to speak."""
-                
-                # Generate AI response with first encounter context
-                from app.services.ai_chat_service import AIProvider
-                provider = AIProvider.OPENAI if self.ai_service.openai_api_key else AIProvider.CLAUDE
-                ai_response = self.ai_service._call_ai_api(
-                    provider,
-                    self.ai_service._build_personality_prompt(pokemon_data),
-                    first_encounter_prompt
-                )
-                
-                if ai_response and len(ai_response.strip()) > 0:
-                    logger.info(f"Generated AI first encounter for {pokemon_data.get('nickname', 'Pokemon')}")
-                    return ai_response
-                    
-            except Exception as e:
-                logger.error(f"AI first encounter generation failed: {e}")
-        
-        # Fallback to template-based first encounter
-        logger.info(f"Using template-based first encounter for {pokemon_data.get('nickname', 'Pokemon')}")
-        return self._generate_template_first_encounter(pokemon_data, first_encounter, user_message)
     
     def _generate_template_first_encounter(self, pokemon_data: Dict, first_encounter: Dict, user_message: str) -> str:
         """Generate template-based first encounter response"""
@@ -452,4 +553,4 @@ Respond as {pokemon_data.get('nickname', pokemon_data.get('species_name', 'Pokem
         else:
             response_parts.append("There's something about you... something comforting. But this place... it still scares me.")
         
-        return " ".join(response_parts)
\ No newline at end of file
+        return FallbackReply(" ".join(response_parts), 'template')
\ No newline at end of file
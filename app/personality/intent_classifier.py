@@ -0,0 +1,103 @@
+import re
+from typing import Dict, Optional
+
+# Weighted phrases per intent; the intent listed first wins ties
+DEFAULT_INTENTS = {
+    'greeting': {
+        'hello': 2, 'hi': 2, 'hey': 2, 'hiya': 2, 'howdy': 2, 'greetings': 2, 'yo': 2,
+        'good morning': 2, 'good afternoon': 2, 'good evening': 2,
+        'how are you': 2, "how's it going": 2, "what's up": 2, 'nice to meet you': 2
+    },
+    'compliment': {
+        'amazing': 1, 'awesome': 1, 'great': 1, 'wonderful': 1, 'beautiful': 1, 'cool': 1,
+        'nice': 1, 'good': 1, 'cute': 1, 'adorable': 1, 'brave': 1, 'strong': 1, 'smart': 1,
+        'incredible': 1, 'fantastic': 1, 'proud of you': 2, 'good job': 2, 'well done': 2
+    },
+    'question': {
+        '?': 2, 'what': 1, 'why': 1, 'how': 1, 'when': 1, 'where': 1, 'who': 1, 'which': 1,
+        'do you': 1, 'are you': 1, 'can you': 1, 'will you': 1, 'would you': 1, 'have you': 1
+    }
+}
+
+def _normalize(phrase: str) -> str:
+    return ' '.join(phrase.lower().split())
+
+def _trie_pattern(node: Dict, previous: str = '') -> str:
+    """
+    Regex for a character trie of phrases
+    Continuations come before a phrase ending, so the longest phrase wins, and a phrase
+    ending in a letter or digit must end a word too ("hi" does not match in "hive")
+    """
+    branches = []
+    for char in sorted(char for char in node if char is not None):
+        branches.append((r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(node[char], char))
+    if None in node:
+        branches.append(r'\b' if re.match(r'\w', previous) else '')
+    return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+class IntentClassifier:
+    """
+    Scores a chat message against weighted intent phrases in one regex scan
+    The phrases are compiled from a character trie, so they share prefixes and each
+    position in the message is settled by a single walk down the trie instead of one
+    check per keyword. Phrases match whole words ("hi" is not in "this") and the
+    longest phrase at a position wins ("good morning" is a greeting, not a compliment)
+    """
+    
+    def __init__(self, intents: Optional[Dict[str, Dict[str, float]]] = None, default: str = 'general'):
+        self.default = default
+        self.intents = []
+        self._phrases = {}  # Normalized phrase -> (intent, weight)
+        for intent, phrases in (intents if intents is not None else DEFAULT_INTENTS).items():
+            for phrase, weight in phrases.items():
+                self._register(intent, phrase, weight)
+        self._compile()
+    
+    def add(self, intent: str, phrase: str, weight: float = 1.0):
+        """Add or reweight a phrase; new intents rank after the existing ones on ties"""
+        self._register(intent, phrase, weight)
+        self._compile()
+    
+    def _register(self, intent: str, phrase: str, weight: float):
+        phrase = _normalize(phrase)
+        if not phrase:
+            raise ValueError("Intent phrases cannot be empty")
+        if weight <= 0:
+            raise ValueError(f"Weight for {phrase!r} must be positive")
+        if intent not in self.intents:
+            self.intents.append(intent)
+        self._phrases[phrase] = (intent, weight)
+    
+    def _compile(self):
+        trie = {}
+        for phrase in self._phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[None] = True
+        
+        # One alternative per first character lets the regex engine skip straight to
+        # characters that can start a phrase; a phrase starting with a letter or digit
+        # must also start a word, checked once that character has been read
+        alternatives = [
+            re.escape(char) + (r'(?<!\w\w)' if re.match(r'\w', char) else '') + _trie_pattern(trie[char], char)
+            for char in sorted(char for char in trie if char is not None)
+        ]
+        self._pattern = re.compile('|'.join(alternatives)) if alternatives else None
+    
+    def scores(self, message: str) -> Dict[str, float]:
+        """Summed weights of the phrases found in message, per intent"""
+        scores = {}
+        if self._pattern is None:
+            return scores
+        for found in self._pattern.findall(message.lower()):
+            intent, weight = self._phrases.get(found) or self._phrases[_normalize(found)]
+            scores[intent] = scores.get(intent, 0) + weight
+        return scores
+    
+    def classify(self, message: str) -> str:
+        """Highest-scoring intent, or the default when no phrase matches"""
+        scores = self.scores(message)
+        if len(scores) < 2:
+            return next(iter(scores), self.default)
+        return max(scores, key=lambda intent: (scores[intent], -self.intents.index(intent)))
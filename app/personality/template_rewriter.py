@@ -0,0 +1,35 @@
+import re
+from typing import List, Tuple
+
+class TemplateRewriter:
+    """
+    A list of literal (old, new) replacements compiled into one regex, applied in a
+    single scan instead of one str.replace pass per rule
+    Gives the same result as applying the str.replace calls in order, which the
+    constructor checks for: no rule may contain another rule's text or produce a later
+    rule's. The one input it cannot mirror is a later rule matching across the edge of
+    an earlier replacement, such as two actions written back to back as "*a*b*"
+    """
+    
+    def __init__(self, replacements: List[Tuple[str, str]]):
+        self.replacements = list(replacements)
+        for i, (old, new) in enumerate(self.replacements):
+            if not old:
+                raise ValueError("Cannot rewrite an empty string")
+            for j, (other, _) in enumerate(self.replacements):
+                if j != i and other in old:
+                    raise ValueError(f"Rewrite of {old!r} overlaps {other!r}")
+                if j > i and other in new:
+                    raise ValueError(f"Rewrite of {old!r} produces {other!r}")
+        
+        self._lookup = dict(self.replacements)
+        self._pattern = re.compile('|'.join(re.escape(old) for old, _ in self.replacements))
+    
+    def apply(self, text: str) -> str:
+        # Most replies match no rule, which one search settles without building a new string
+        if not self.replacements or self._pattern.search(text) is None:
+            return text
+        return self._pattern.sub(self._replace, text)
+    
+    def _replace(self, match) -> str:
+        return self._lookup[match.group(0)]
@@ -1,13 +1,58 @@
 import os
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from enum import Enum
 import requests
+from requests.adapters import HTTPAdapter
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.services.retry_budget import RetryBudget
+from app.services.hedging import LatencyTracker, run_hedged, stream_hedged
+from app.services.prompt_cache import PromptCache, prompt_fingerprint
+from app.services.token_budget import TURN_OVERHEAD, TokenCounter, pack_history
+from app.services.provider_router import ProviderRouter
+from app.services.bulkhead import Bulkhead, BulkheadFull
+from app.services.metrics import registry
+from app.services.ai_replay import AIReplayAdapter
+from app.services.ngram_fallback import load_fallback_model
 
 logger = logging.getLogger(__name__)
 
+# A system prompt, or its blocks in order (the cacheable personality block first)
+SystemPrompt = Union[str, List[str]]
+
+class FallbackReply(str):
+    """
+    Reply text written without an AI provider, tagged with where it came from:
+    'template' for the fixed responses or 'ngram' for the trained fallback model
+    """
+    
+    def __new__(cls, text: str, source: str):
+        reply = super().__new__(cls, text)
+        reply.source = source
+        return reply
+
+def reply_source(reply: str) -> str:
+    """Where a reply came from - 'ai' unless it is a FallbackReply"""
+    return getattr(reply, 'source', 'ai')
+
+# Provider metrics, served in Prometheus format at /metrics
+AI_REQUESTS = registry.counter('ai_requests_total', 'Provider calls by outcome', ('provider', 'mode', 'outcome'))
+AI_DURATION = registry.histogram('ai_request_duration_seconds', 'Whole provider call time including retries', ('provider', 'mode'))
+AI_TTFB = registry.histogram('ai_time_to_first_byte_seconds', 'Time until a provider returned response headers', ('provider', 'mode'))
+AI_FIRST_TOKEN = registry.histogram('ai_time_to_first_token_seconds', 'Time until the first streamed text arrived', ('provider',))
+AI_TOKENS = registry.counter('ai_tokens_total', 'Tokens reported by providers (prompt, completion, cached_prompt)', ('provider', 'kind'))
+AI_RATE_LIMITED = registry.counter('ai_rate_limited_total', 'Provider 429 responses', ('provider',))
+AI_RETRIES = registry.counter('ai_retries_total', 'Provider calls retried after a rate limit or network error', ('provider',))
+AI_TIMEOUTS = registry.counter('ai_timeouts_total', 'Provider calls that timed out', ('provider',))
+AI_HTTP_ERRORS = registry.counter('ai_http_errors_total', 'Non-retryable provider error responses', ('provider', 'status'))
+AI_COMPLETIONS = registry.counter(
+    'ai_completions_total', 'AI requests by purpose (reply, summary) and result (ai, fallback, shed)', ('purpose', 'result')
+)
+AI_QUEUE_WAIT = registry.histogram('ai_queue_wait_seconds', 'Time spent waiting for a bulkhead slot')
+
 class AIProvider(Enum):
     OPENAI = "openai"
     CLAUDE = "claude"
@@ -18,12 +63,83 @@ class AIChatService:
     Generates personality-driven responses based on Pokemon traits and friendship
     """
     
+    PRECONNECT_INTERVAL = 30  # Seconds a pre-opened connection is assumed to stay alive
+    
     def __init__(self):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         self.claude_api_key = os.getenv('CLAUDE_API_KEY')
         self.preferred_provider = os.getenv('AI_PROVIDER', 'openai').lower()
-        self.max_retries = 3
-        self.timeout = 30
+        # Worst-case time one message may spend on AI calls, and the retries it may use
+        # across all providers before falling back to the template responses
+        self.deadline = float(os.getenv('AI_DEADLINE', '15'))
+        self.retry_budget = int(os.getenv('AI_RETRY_BUDGET', '2'))
+        
+        # Connecting should be quick; reading covers the whole generation
+        self.connect_timeout = float(os.getenv('AI_CONNECT_TIMEOUT', '5'))
+        self.read_timeout = float(os.getenv('AI_READ_TIMEOUT', '30'))
+        
+        # Endpoints can point at a local stub server (see ai_stub_server.py)
+        self.openai_url = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/') + '/chat/completions'
+        self.claude_url = os.getenv('CLAUDE_BASE_URL', 'https://api.anthropic.com/v1').rstrip('/') + '/messages'
+        
+        # Keep-alive connection pools, one per provider, reused for every message
+        self.pool_size = int(os.getenv('AI_POOL_SIZE', '10'))
+        # Offline record/replay or stub responses for load tests (AI_REPLAY_MODE)
+        self.replay = AIReplayAdapter.from_env(self.pool_size)
+        if self.replay:
+            logger.info(f"AI provider calls served by {type(self.replay).__name__} ({os.getenv('AI_REPLAY_MODE')})")
+        self.sessions = {provider: self._create_session() for provider in AIProvider}
+        
+        # At most AI_MAX_CONCURRENT messages wait on providers at once, with a short queue
+        # behind them; beyond that messages are shed so web workers stay free for the rest
+        # of the app. Shed messages get the template reply, or a 503 with AI_SHED_MODE=reject
+        self.bulkhead = Bulkhead(
+            max_concurrent=int(os.getenv('AI_MAX_CONCURRENT', str(self.pool_size))),
+            max_queue=int(os.getenv('AI_QUEUE_SIZE', '10')),
+            queue_timeout=float(os.getenv('AI_QUEUE_TIMEOUT', '2'))
+        )
+        self.shed_mode = os.getenv('AI_SHED_MODE', 'template').lower()
+        
+        # Every call picks providers by observed latency and health; AI_PROVIDER breaks ties
+        self.router = ProviderRouter(
+            failure_threshold=int(os.getenv('AI_BREAKER_FAILURES', '3')),
+            cooldown=float(os.getenv('AI_BREAKER_COOLDOWN', '30')),
+            unmeasured_latency=self.read_timeout
+        )
+        
+        # Hedging: if the preferred provider has not answered within its usual (p95)
+        # latency, race the same prompt on the secondary and keep the first answer.
+        # Streamed replies race on time to first text instead of the whole reply
+        self.hedging = os.getenv('AI_HEDGING', 'false').lower() == 'true'
+        self.hedge_percentile = float(os.getenv('AI_HEDGE_PERCENTILE', '95'))
+        self.hedge_delay = float(os.getenv('AI_HEDGE_DELAY', '3'))  # Until enough latencies are seen
+        self.latency = LatencyTracker()
+        self.first_chunk_latency = LatencyTracker()
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        
+        # When each provider's pool last had a connection opened ahead of a message
+        self._preconnected_at: Dict[AIProvider, float] = {}
+        
+        # Rendered personality prompts, reused until the Pokemon's traits change
+        self.prompt_cache = PromptCache(int(os.getenv('AI_PROMPT_CACHE_SIZE', '256')))
+        
+        # Input tokens for the conversation (history plus the new message), so prompt
+        # size stays predictable whether messages are short or long
+        self.history_token_budget = int(os.getenv('AI_HISTORY_TOKEN_BUDGET', '600'))
+        tokenizer = os.getenv('AI_TOKENIZER', 'cl100k_base')
+        self.token_counter = TokenCounter(None if tokenizer == 'estimate' else tokenizer)
+        
+        # Anthropic only caches a prompt prefix of at least this many tokens (2048 for
+        # Haiku models, 1024 for the others); shorter prefixes are sent unmarked
+        self.claude_model = os.getenv('CLAUDE_MODEL', 'claude-3-haiku-20240307')
+        self.claude_cache_min_tokens = int(os.getenv(
+            'CLAUDE_CACHE_MIN_TOKENS', '2048' if 'haiku' in self.claude_model else '1024'
+        ))
+        
+        # Word model trained from stored replies (train_fallback_model.py), sampled for
+        # varied offline replies before the fixed templates are used
+        self.fallback_model = load_fallback_model()
         
         # Validate API keys
         self.available_providers = []
@@ -35,6 +151,22 @@ class AIChatService:
         if not self.available_providers:
             logger.warning("No AI API keys configured. AI chat will be disabled.")
     
+    def _create_session(self) -> requests.Session:
+        """Session with a keep-alive pool so messages skip the TCP/TLS handshake"""
+        session = requests.Session()
+        adapter = self.replay or HTTPAdapter(
+            pool_connections=1,  # One host per provider
+            pool_maxsize=self.pool_size,
+            max_retries=0  # Retries are governed by the per-message RetryBudget
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def new_budget(self) -> RetryBudget:
+        """Deadline and retry allowance for one chat message"""
+        return RetryBudget(self.deadline, self.retry_budget)
+    
     def is_available(self) -> bool:
         """Check if AI service is available with valid API keys"""
         return len(self.available_providers) > 0
@@ -61,34 +193,343 @@ class AIChatService:
         
         try:
             # Build comprehensive prompt
-            system_prompt = self._build_personality_prompt(pokemon_data)
-            conversation_prompt = self._build_conversation_prompt(
-                user_message, pokemon_data, conversation_history
+            system_prompt = self._system_blocks(pokemon_data)
+            conversation = self._build_conversation_messages(
+                user_message, conversation_history
             )
             
-            # Try preferred provider first, then fallback
-            providers_to_try = [
-                p for p in [AIProvider(self.preferred_provider)] + self.available_providers 
-                if p in self.available_providers
-            ]
-            
-            for provider in providers_to_try:
-                try:
-                    response = self._call_ai_api(
-                        provider, system_prompt, conversation_prompt
-                    )
-                    if response:
-                        return response
-                except Exception as e:
-                    logger.warning(f"AI provider {provider.value} failed: {e}")
+            response = self.complete(system_prompt, conversation)
+            if response:
+                return response
                     
             # If all AI fails, use fallback
             return self._fallback_response(user_message, pokemon_data)
             
+        except BulkheadFull:
+            raise
         except Exception as e:
             logger.error(f"AI chat service error: {e}")
             return self._fallback_response(user_message, pokemon_data)
     
+    def stream_pokemon_response(
+        self, 
+        user_message: str, 
+        pokemon_data: Dict, 
+        conversation_history: List[Dict] = None
+    ) -> Iterator[str]:
+        """
+        Stream an AI-powered Pokemon response as text chunks as they are generated
+        The next provider is only tried if the previous one failed before sending any
+        text; if no provider produces anything the fallback response is yielded whole
+        """
+        if not self.is_available():
+            yield self._fallback_response(user_message, pokemon_data)
+            return
+        
+        try:
+            system_prompt = self._system_blocks(pokemon_data)
+            conversation = self._build_conversation_messages(
+                user_message, conversation_history
+            )
+        except Exception as e:
+            logger.error(f"AI chat service error: {e}")
+            yield self._fallback_response(user_message, pokemon_data)
+            return
+        
+        streamed = False
+        for chunk in self.stream_completion(system_prompt, conversation):
+            streamed = True
+            yield chunk
+        if streamed:
+            return
+        
+        # If all AI fails, use fallback
+        yield self._fallback_response(user_message, pokemon_data)
+    
+    def complete(
+        self, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]], 
+        budget: Optional[RetryBudget] = None,
+        purpose: str = 'reply'
+    ) -> Optional[str]:
+        """
+        Get a response from the best available provider, falling over to the others
+        All AI calls go through here (or stream_completion) so they share the bulkhead,
+        routing, hedging and the per-message deadline. Returns None if every provider
+        failed or the call was shed. Calls for any purpose other than a reply are
+        background work: they never queue for a slot, so they cannot delay a trainer
+        """
+        budget = budget or self.new_budget()  # Time queued for a slot counts against the deadline
+        background = purpose != 'reply'
+        queued = time.monotonic()
+        try:
+            with self.bulkhead.slot(queue=not background):
+                if not background:
+                    AI_QUEUE_WAIT.observe(time.monotonic() - queued)
+                response = self._complete(system_prompt, conversation, budget)
+                AI_COMPLETIONS.inc(purpose=purpose, result='ai' if response else 'fallback')
+                return response
+        except BulkheadFull as e:
+            AI_COMPLETIONS.inc(purpose=purpose, result='shed')
+            if background:
+                logger.info(f"AI calls busy, skipping {purpose} call")
+                return None
+            return self._shed(e)
+    
+    def _complete(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Optional[str]:
+        """Provider loop of complete(), run while holding a bulkhead slot"""
+        providers = self._providers_to_try()
+        if self.hedging and len(providers) >= 2:
+            response = self._hedged_call(providers[0], providers[1], system_prompt, conversation, budget)
+            if response:
+                return response
+            providers = providers[2:]
+        
+        for provider in providers:
+            if budget.expired():
+                logger.warning("AI deadline reached, using fallback response")
+                break
+            try:
+                response = self._call_ai_api(provider, system_prompt, conversation, budget)
+                if response:
+                    return response
+            except Exception as e:
+                logger.warning(f"AI provider {provider.value} failed: {e}")
+        return None
+    
+    def stream_completion(
+        self, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]], 
+        budget: Optional[RetryBudget] = None
+    ) -> Iterator[str]:
+        """
+        Stream a response from the best available provider
+        The next provider is only tried if the previous one failed before sending any
+        text; yields nothing if every provider failed or the call was shed
+        """
+        budget = budget or self.new_budget()
+        queued = time.monotonic()
+        try:
+            with self.bulkhead.slot():  # Held until the stream is finished or closed
+                AI_QUEUE_WAIT.observe(time.monotonic() - queued)
+                streamed = False
+                for chunk in self._stream_completion(system_prompt, conversation, budget):
+                    streamed = True
+                    yield chunk
+                AI_COMPLETIONS.inc(purpose='reply', result='ai' if streamed else 'fallback')
+        except BulkheadFull as e:
+            AI_COMPLETIONS.inc(purpose='reply', result='shed')
+            self._shed(e)
+    
+    def _stream_completion(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Iterator[str]:
+        """Provider loop of stream_completion(), run while holding a bulkhead slot"""
+        providers = self._providers_to_try()
+        if self.hedging and len(providers) >= 2:
+            streamed = False
+            for chunk in self._hedged_stream(providers[0], providers[1], system_prompt, conversation, budget):
+                streamed = True
+                yield chunk
+            if streamed:
+                return
+            providers = providers[2:]
+        
+        for provider in providers:
+            if budget.expired():
+                logger.warning("AI deadline reached, using fallback response")
+                break
+            streamed = False
+            try:
+                for chunk in self._stream_ai_api(provider, system_prompt, conversation, budget):
+                    streamed = True
+                    yield chunk
+            except Exception as e:
+                logger.warning(f"AI provider {provider.value} stream failed: {e}")
+            if streamed:
+                return
+        
+    def _shed(self, error: BulkheadFull) -> None:
+        """Give up on a call refused by the bulkhead: template reply, or re-raise to reject"""
+        stats = self.bulkhead.stats()
+        logger.warning(f"AI calls saturated ({stats['in_flight']} in flight, {stats['waiting']} queued), shedding message")
+        if self.shed_mode == 'reject':
+            raise error
+        return None
+        
+    def _providers_to_try(self) -> List[AIProvider]:
+        """Configured providers ordered by the router, the preferred one winning ties"""
+        return self.router.order(self.available_providers, preferred=AIProvider(self.preferred_provider))
+    
+    def _hedge_executor_pool(self) -> ThreadPoolExecutor:
+        """Worker threads for hedged calls, created on first use"""
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                # Two legs per in-flight message, bounded like the connection pools
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size * 2, thread_name_prefix='ai-hedge'
+                )
+            return self._hedge_executor
+    
+    def hedge_delay_for(self, provider: AIProvider, streaming: bool = False) -> float:
+        """How long the provider gets alone (to answer, or to start streaming) before the secondary is fired"""
+        tracker = self.first_chunk_latency if streaming else self.latency
+        observed = tracker.percentile(provider.value, self.hedge_percentile)
+        return observed if observed is not None else self.hedge_delay
+    
+    def _hedged_call(
+        self, 
+        primary: AIProvider, 
+        secondary: AIProvider, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]], 
+        budget: RetryBudget
+    ) -> Optional[str]:
+        """Race primary against a delayed secondary, keeping whichever answers first"""
+        result, winner = run_hedged(
+            self._hedge_executor_pool(),
+            lambda cancel: self._collect_stream(primary, system_prompt, conversation, budget, cancel),
+            lambda cancel: self._collect_stream(secondary, system_prompt, conversation, budget, cancel),
+            delay=self.hedge_delay_for(primary),
+            timeout=budget.remaining()
+        )
+        if winner == 'secondary':
+            logger.info(f"Hedged request answered by {secondary.value} ahead of {primary.value}")
+        return result
+    
+    def _hedged_stream(
+        self, 
+        primary: AIProvider, 
+        secondary: AIProvider, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]], 
+        budget: RetryBudget
+    ) -> Iterator[str]:
+        """Stream primary, racing a delayed secondary on time to first text"""
+        return stream_hedged(
+            self._hedge_executor_pool(),
+            lambda: self._stream_ai_api(primary, system_prompt, conversation, budget),
+            lambda: self._stream_ai_api(secondary, system_prompt, conversation, budget),
+            delay=self.hedge_delay_for(primary, streaming=True),
+            timeout=budget.remaining()
+        )
+    
+    def _collect_stream(
+        self, 
+        provider: AIProvider, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]], 
+        budget: RetryBudget, 
+        cancel: threading.Event
+    ) -> Optional[str]:
+        """
+        Stream a full response, giving up as soon as cancel is set
+        Streaming lets the losing leg of a hedge drop its connection mid-generation
+        instead of running to completion
+        """
+        started = time.monotonic()
+        chunks = self._stream_ai_api(provider, system_prompt, conversation, budget)
+        parts = []
+        try:
+            for chunk in chunks:
+                if cancel.is_set():
+                    logger.debug(f"Hedged call to {provider.value} cancelled")
+                    return None
+                parts.append(chunk)
+        finally:
+            chunks.close()  # Closes the provider response
+        
+        text = ''.join(parts).strip()
+        if not text or cancel.is_set():
+            return None
+        self.latency.record(provider.value, time.monotonic() - started)
+        return text
+    
+    def warm_up(self, pokemon_data: Dict, conversation_history: List[Dict] = None) -> Dict:
+        """
+        Do the per-Pokemon work of a first message ahead of time
+        Renders (and caches) the personality prompt, counts the history tokens so
+        packing the next message only counts the message itself, and opens a pooled
+        connection to the provider the next call will go to
+        """
+        hits = self.prompt_cache.hits
+        self.personality_prompt(pokemon_data)
+        _, stats = pack_history(conversation_history or [], '', self.history_token_budget, self.token_counter)
+        
+        providers = self._providers_to_try()
+        provider = providers[0] if providers else None
+        return {
+            'provider': provider.value if provider else None,
+            'prompt_cached': self.prompt_cache.hits > hits,
+            'history_turns': stats['turns_kept'],
+            'history_tokens': stats['history_tokens'],
+            'connection': self._preconnect(provider) if provider else 'skipped'
+        }
+    
+    def _preconnect(self, provider: AIProvider) -> str:
+        """Open a keep-alive connection in the provider's pool so the next call skips the handshake"""
+        now = time.monotonic()
+        last = self._preconnected_at.get(provider)
+        if self.replay or (last is not None and now - last < self.PRECONNECT_INTERVAL):
+            return 'skipped'  # Nothing to connect to, or a connection should still be open
+        self._preconnected_at[provider] = now
+        
+        url = self.openai_url if provider == AIProvider.OPENAI else self.claude_url
+        try:
+            # Any answer will do; reading it returns the connection to the pool
+            self.sessions[provider].head(url, timeout=(self.connect_timeout, self.connect_timeout)).close()
+            return 'opened'
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not pre-open a connection to {provider.value}: {e}")
+            return 'failed'
+    
+    def personality_prompt(self, pokemon_data: Dict) -> str:
+        """Personality system prompt for the Pokemon, rendered once per trait fingerprint"""
+        key = prompt_fingerprint(pokemon_data)
+        prompt = self.prompt_cache.get(key)
+        if prompt is None:
+            prompt = self._build_personality_prompt(pokemon_data)
+            self.prompt_cache.put(key, prompt)
+        return prompt
+    
+    def _system_blocks(self, pokemon_data: Dict) -> List[str]:
+        """Personality prompt, followed by the Pokemon's long-term memory when it has one"""
+        blocks = [self.personality_prompt(pokemon_data)]
+        memory = pokemon_data.get('memory')
+        if memory:
+            # Kept in its own block so the personality prefix stays cacheable as memory changes
+            blocks.append(f"🧠 LONG-TERM MEMORY (what you remember from earlier conversations with your trainer):\n{memory}")
+        return blocks
+    
+    def _system_text(self, system_prompt: SystemPrompt) -> str:
+        """System prompt as a single string, for APIs that take one system message"""
+        if isinstance(system_prompt, str):
+            return system_prompt
+        return "\n\n".join(system_prompt)
+    
+    def summarize_conversation(self, previous_summary: str, messages: List[Dict], nickname: str) -> Optional[str]:
+        """
+        Fold messages into the running summary of a conversation using the AI providers
+        Returns None when no provider is available or all of them failed
+        """
+        if not self.is_available():
+            return None
+        
+        system_prompt = (
+            f"You keep the long-term memory of {nickname}, a Pokemon, about its trainer. "
+            "Update the summary with the new messages. Keep lasting facts: the trainer's name, "
+            "likes and dislikes, promises, shared adventures and how their bond has changed. "
+            "Drop small talk. Write at most 120 words in the third person and reply with the summary only."
+        )
+        transcript = "\n".join(
+            f"{'Trainer' if msg.get('sender') == 'user' else nickname}: {msg.get('message', '')}"
+            for msg in messages
+        )
+        prompt = f"Current summary:\n{previous_summary or '(nothing yet)'}\n\nNew messages:\n{transcript}"
+        
+        # Skipped when every slot is busy; the summarizer falls back to extraction
+        return self.complete(system_prompt, prompt, purpose='summary')
+    
     def _build_personality_prompt(self, pokemon_data: Dict) -> str:
         """Build authentic animal-like personality prompt for AI"""
         from app.services.pokemon_intelligence import PokemonPersonalityBuilder, PokemonIntelligence
@@ -253,45 +694,210 @@ Remember: You are {nickname} the {species_name} - an intelligent animal who has
 
         return system_prompt
     
-    def _build_conversation_prompt(
+    def _build_conversation_messages(
         self, 
         user_message: str, 
-        pokemon_data: Dict, 
         conversation_history: List[Dict] = None
-    ) -> str:
-        """Build conversation prompt with context"""
-        nickname = pokemon_data.get('nickname', pokemon_data.get('species_name', 'Pokemon'))
-        
-        prompt_parts = []
-        
-        # Add conversation history for context
-        if conversation_history:
-            prompt_parts.append("Previous conversation:")
-            for msg in conversation_history[-6:]:  # Last 6 messages for context
-                sender = "Trainer" if msg.get('sender') == 'user' else nickname
-                prompt_parts.append(f"{sender}: {msg.get('message', '')}")
-            prompt_parts.append("")
+    ) -> List[Dict]:
+        """
+        Build the conversation as alternating user/assistant turns
+        History is packed newest-first into the input-token budget. Consecutive messages
+        from the same side are merged and the list always starts and ends with a
+        trainer turn, as the Messages API requires
+        """
+        history = list(conversation_history or [])
+        # The routes load history after saving the new message; don't send it twice
+        if history and history[-1].get('sender') == 'user' and history[-1].get('message') == user_message:
+            history.pop()
         
-        # Current message
-        prompt_parts.append(f"Trainer: {user_message}")
-        prompt_parts.append(f"{nickname}:")
+        history, stats = pack_history(history, user_message, self.history_token_budget, self.token_counter)
+        logger.debug(
+            f"Conversation packed: {stats['turns_kept']} turns, {stats['total_tokens']}/{stats['budget']} tokens "
+            f"({stats['turns_dropped']} older turns dropped{'' if stats['exact'] else ', estimated'})"
+        )
         
-        return "\n".join(prompt_parts)
+        messages = []
+        for msg in history + [{'sender': 'user', 'message': user_message}]:
+            role = 'user' if msg.get('sender') == 'user' else 'assistant'
+            content = msg.get('message', '')
+            if not messages and role == 'assistant':
+                continue
+            if messages and messages[-1]['role'] == role:
+                messages[-1]['content'] += f"\n{content}"
+            else:
+                messages.append({'role': role, 'content': content})
+        return messages
+    
+    def _as_messages(self, conversation: Union[str, List[Dict]]) -> List[Dict]:
+        """Accept a single prompt string (e.g. the first encounter) as one trainer turn"""
+        if isinstance(conversation, str):
+            return [{'role': 'user', 'content': conversation}]
+        return conversation
     
     def _call_ai_api(
         self, 
         provider: AIProvider, 
-        system_prompt: str, 
-        conversation_prompt: str
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]],
+        budget: Optional[RetryBudget] = None
     ) -> Optional[str]:
-        """Call the specific AI API"""
+        """Call the specific AI API, reporting the outcome to the router and metrics"""
+        budget = budget or self.new_budget()
+        started = time.monotonic()
+        try:
+            if provider == AIProvider.OPENAI:
+                response = self._call_openai_api(system_prompt, conversation, budget)
+            elif provider == AIProvider.CLAUDE:
+                response = self._call_claude_api(system_prompt, conversation, budget)
+            else:
+                return None
+        except Exception:
+            self.router.record_failure(provider)
+            AI_REQUESTS.inc(provider=provider.value, mode='complete', outcome='error')
+            raise
+        
+        elapsed = time.monotonic() - started
+        AI_DURATION.observe(elapsed, provider=provider.value, mode='complete')
+        if response:
+            self.router.record_success(provider, elapsed)
+            AI_REQUESTS.inc(provider=provider.value, mode='complete', outcome='success')
+        else:
+            self.router.record_failure(provider)
+            AI_REQUESTS.inc(provider=provider.value, mode='complete', outcome='failure')
+        return response
+    
+    def _stream_ai_api(
+        self, 
+        provider: AIProvider, 
+        system_prompt: SystemPrompt, 
+        conversation: Union[str, List[Dict]],
+        budget: Optional[RetryBudget] = None
+    ) -> Iterator[str]:
+        """Stream text chunks from the specific AI API"""
+        budget = budget or self.new_budget()
         if provider == AIProvider.OPENAI:
-            return self._call_openai_api(system_prompt, conversation_prompt)
+            chunks = self._stream_openai_api(system_prompt, conversation, budget)
         elif provider == AIProvider.CLAUDE:
-            return self._call_claude_api(system_prompt, conversation_prompt)
+            chunks = self._stream_claude_api(system_prompt, conversation, budget)
+        else:
+            return
+        
+        # Match the non-streaming path, which strips leading whitespace
+        started = False
+        began = time.monotonic()
+        try:
+            for chunk in chunks:
+                if not started:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                    started = True
+                    AI_FIRST_TOKEN.observe(time.monotonic() - began, provider=provider.value)
+                    self.first_chunk_latency.record(provider.value, time.monotonic() - began)
+                yield chunk
+        except GeneratorExit:
+            # Abandoned by the caller (e.g. a cancelled hedge) - says nothing about the provider
+            AI_REQUESTS.inc(provider=provider.value, mode='stream', outcome='cancelled')
+            raise
+        except Exception:
+            self.router.record_failure(provider)
+            AI_REQUESTS.inc(provider=provider.value, mode='stream', outcome='error')
+            raise
+        
+        elapsed = time.monotonic() - began
+        AI_DURATION.observe(elapsed, provider=provider.value, mode='stream')
+        if started:
+            self.router.record_success(provider, elapsed)
+            AI_REQUESTS.inc(provider=provider.value, mode='stream', outcome='success')
+        else:
+            self.router.record_failure(provider)
+            AI_REQUESTS.inc(provider=provider.value, mode='stream', outcome='failure')
+    
+    def _post(
+        self, 
+        provider: AIProvider, 
+        url: str, 
+        headers: Dict, 
+        data: Dict, 
+        budget: RetryBudget, 
+        stream: bool = False
+    ) -> Optional[requests.Response]:
+        """
+        POST to a provider, retrying rate limits and network errors within the budget
+        Returns the 200 response, or None once the provider refused or the budget is spent
+        """
+        name = 'OpenAI' if provider == AIProvider.OPENAI else 'Claude'
+        attempt = 0
+        
+        while not budget.expired():
+            retry_after = None
+            try:
+                response = self.sessions[provider].post(
+                    url,
+                    headers=headers,
+                    json=data,
+                    timeout=budget.timeout(self.connect_timeout, self.read_timeout),
+                    stream=stream
+                )
+                
+                if response.status_code == 200:
+                    AI_TTFB.observe(response.elapsed.total_seconds(), provider=provider.value, mode='stream' if stream else 'complete')
+                    return response
+                elif response.status_code == 429:  # Rate limit
+                    AI_RATE_LIMITED.inc(provider=provider.value)
+                    retry_after = response.headers.get('Retry-After')
+                    response.close()
+                    logger.warning(f"{name} API rate limited (attempt {attempt + 1})")
+                else:
+                    AI_HTTP_ERRORS.inc(provider=provider.value, status=response.status_code)
+                    logger.error(f"{name} API error {response.status_code}: {response.text}")
+                    return None
+            
+            except requests.exceptions.RequestException as e:
+                if isinstance(e, requests.exceptions.Timeout):
+                    AI_TIMEOUTS.inc(provider=provider.value)
+                logger.error(f"{name} API call failed (attempt {attempt + 1}): {e}")
+            
+            delay = budget.next_backoff(attempt, retry_after)
+            if delay is None:
+                logger.warning(f"{name} API retry budget spent ({budget.remaining():.1f}s left)")
+                return None
+            AI_RETRIES.inc(provider=provider.value)
+            time.sleep(delay)
+            attempt += 1
+        
         return None
     
-    def _call_openai_api(self, system_prompt: str, conversation_prompt: str) -> Optional[str]:
+    def _iter_sse_data(self, response: requests.Response) -> Iterator[Dict]:
+        """Parse the data lines of a Server-Sent Events response as JSON"""
+        try:
+            for line in response.iter_lines():
+                if not line or not line.startswith(b'data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == b'[DONE]':
+                    return
+                yield json.loads(payload)
+        finally:
+            response.close()
+    
+    def _record_usage(self, provider: AIProvider, usage: Optional[Dict]):
+        """Count the prompt, completion and cache-read tokens a provider reported"""
+        if not usage:
+            return
+        if provider == AIProvider.CLAUDE:
+            cached = usage.get('cache_read_input_tokens') or 0
+            prompt = (usage.get('input_tokens') or 0) + cached + (usage.get('cache_creation_input_tokens') or 0)
+            completion = usage.get('output_tokens') or 0
+        else:
+            prompt = usage.get('prompt_tokens') or 0
+            completion = usage.get('completion_tokens') or 0
+            cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+        for kind, count in (('prompt', prompt), ('completion', completion), ('cached_prompt', cached)):
+            if count:
+                AI_TOKENS.inc(count, provider=provider.value, kind=kind)
+    
+    def _call_openai_api(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Optional[str]:
         """Call OpenAI ChatGPT API"""
         if not self.openai_api_key:
             return None
@@ -303,43 +909,50 @@ Remember: You are {nickname} the {species_name} - an intelligent animal who has
         
         data = {
             'model': 'gpt-3.5-turbo',
-            'messages': [
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': conversation_prompt}
-            ],
+            'messages': [{'role': 'system', 'content': self._system_text(system_prompt)}] + self._as_messages(conversation),
             'max_tokens': 200,
             'temperature': 0.8,
             'presence_penalty': 0.1,
             'frequency_penalty': 0.1
         }
         
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    'https://api.openai.com/v1/chat/completions',
-                    headers=headers,
-                    json=data,
-                    timeout=self.timeout
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result['choices'][0]['message']['content'].strip()
-                elif response.status_code == 429:  # Rate limit
-                    time.sleep(2 ** attempt)
-                    continue
-                else:
-                    logger.error(f"OpenAI API error {response.status_code}: {response.text}")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"OpenAI API call failed (attempt {attempt + 1}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(1)
-                    
-        return None
+        response = self._post(AIProvider.OPENAI, self.openai_url, headers, data, budget)
+        if response is None:
+            return None
+        
+        try:
+            result = response.json()
+            self._record_usage(AIProvider.OPENAI, result.get('usage'))
+            return result['choices'][0]['message']['content'].strip()
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error(f"OpenAI API returned an unexpected body: {e}")
+            return None
     
-    def _call_claude_api(self, system_prompt: str, conversation_prompt: str) -> Optional[str]:
+    def _claude_prompt(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        System blocks and messages for the Messages API, with prompt caching breakpoints
+        Each turn's request starts like the previous one: the personality prompt, the
+        memory block and the history up to the Pokemon's last reply. That prefix is marked
+        for caching only once it reaches the model's minimum, as shorter ones never are
+        """
+        blocks = [system_prompt] if isinstance(system_prompt, str) else system_prompt
+        system = [{'type': 'text', 'text': text} for text in blocks]
+        messages = [dict(message) for message in self._as_messages(conversation)]
+        ephemeral = {'type': 'ephemeral'}
+        
+        # The personality alone stays cached when the memory block changes
+        if self.token_counter.count(blocks[0]) >= self.claude_cache_min_tokens:
+            system[0]['cache_control'] = ephemeral
+        
+        # Everything before the new trainer turn is also the start of the next request
+        # (until the history budget is full and older turns start dropping out)
+        prefix = sum(self.token_counter.count(text) for text in blocks)
+        prefix += sum(self.token_counter.count(m['content']) + TURN_OVERHEAD for m in messages[:-1])
+        if len(messages) > 1 and prefix >= self.claude_cache_min_tokens:
+            messages[-2]['content'] = [{'type': 'text', 'text': messages[-2]['content'], 'cache_control': ephemeral}]
+        return system, messages
+    
+    def _call_claude_api(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Optional[str]:
         """Call Claude API"""
         if not self.claude_api_key:
             return None
@@ -350,46 +963,123 @@ Remember: You are {nickname} the {species_name} - an intelligent animal who has
             'anthropic-version': '2023-06-01'
         }
         
-        # Combine system and user prompts for Claude
-        full_prompt = f"{system_prompt}\n\n{conversation_prompt}"
-        
+        system, messages = self._claude_prompt(system_prompt, conversation)
         data = {
-            'model': 'claude-3-haiku-20240307',
+            'model': self.claude_model,
             'max_tokens': 200,
-            'messages': [
-                {'role': 'user', 'content': full_prompt}
-            ],
+            'system': system,
+            'messages': messages,
             'temperature': 0.8
         }
         
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    'https://api.anthropic.com/v1/messages',
-                    headers=headers,
-                    json=data,
-                    timeout=self.timeout
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    return result['content'][0]['text'].strip()
-                elif response.status_code == 429:  # Rate limit
-                    time.sleep(2 ** attempt)
-                    continue
-                else:
-                    logger.error(f"Claude API error {response.status_code}: {response.text}")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"Claude API call failed (attempt {attempt + 1}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(1)
-                    
-        return None
+        response = self._post(AIProvider.CLAUDE, self.claude_url, headers, data, budget)
+        if response is None:
+            return None
+        
+        try:
+            result = response.json()
+            self._record_usage(AIProvider.CLAUDE, result.get('usage'))
+            return result['content'][0]['text'].strip()
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error(f"Claude API returned an unexpected body: {e}")
+            return None
+    
+    def _stream_openai_api(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Iterator[str]:
+        """Stream OpenAI ChatGPT API deltas"""
+        if not self.openai_api_key:
+            return
+        
+        headers = {
+            'Authorization': f'Bearer {self.openai_api_key}',
+            'Content-Type': 'application/json'
+        }
+        
+        data = {
+            'model': 'gpt-3.5-turbo',
+            'messages': [{'role': 'system', 'content': self._system_text(system_prompt)}] + self._as_messages(conversation),
+            'max_tokens': 200,
+            'temperature': 0.8,
+            'presence_penalty': 0.1,
+            'frequency_penalty': 0.1,
+            'stream': True,
+            'stream_options': {'include_usage': True}  # Token counts arrive in a final chunk
+        }
+        
+        response = self._post(AIProvider.OPENAI, self.openai_url, headers, data, budget, stream=True)
+        if response is None:
+            return
+        
+        for event in self._iter_sse_data(response):
+            if event.get('usage'):
+                self._record_usage(AIProvider.OPENAI, event['usage'])
+            choices = event.get('choices') or [{}]
+            text = choices[0].get('delta', {}).get('content')
+            if text:
+                yield text
+    
+    def _stream_claude_api(self, system_prompt: SystemPrompt, conversation: Union[str, List[Dict]], budget: RetryBudget) -> Iterator[str]:
+        """Stream Claude API text deltas"""
+        if not self.claude_api_key:
+            return
+        
+        headers = {
+            'x-api-key': self.claude_api_key,
+            'Content-Type': 'application/json',
+            'anthropic-version': '2023-06-01'
+        }
+        
+        system, messages = self._claude_prompt(system_prompt, conversation)
+        data = {
+            'model': self.claude_model,
+            'max_tokens': 200,
+            'system': system,
+            'messages': messages,
+            'temperature': 0.8,
+            'stream': True
+        }
+        
+        response = self._post(AIProvider.CLAUDE, self.claude_url, headers, data, budget, stream=True)
+        if response is None:
+            return
+        
+        usage = {}  # Input counts come with message_start, the final output count with message_delta
+        try:
+            for event in self._iter_sse_data(response):
+                event_type = event.get('type')
+                if event_type == 'content_block_delta':
+                    text = event.get('delta', {}).get('text')
+                    if text:
+                        yield text
+                elif event_type == 'message_start':
+                    usage.update(event.get('message', {}).get('usage') or {})
+                elif event_type == 'message_delta':
+                    usage.update(event.get('usage') or {})
+                elif event_type == 'message_stop':
+                    return
+                elif event_type == 'error':
+                    raise RuntimeError(f"Claude stream error: {event.get('error', {}).get('message')}")
+        finally:
+            self._record_usage(AIProvider.CLAUDE, usage)
+    
+    def sample_fallback_model(self, pokemon_data: Dict) -> Optional[str]:
+        """Reply sampled from the trained fallback model, or None without a model for this Pokemon"""
+        if not self.fallback_model:
+            return None
+        reply = self.fallback_model.sample(
+            pokemon_data.get('species_id'),
+            pokemon_data.get('friendship', 70),
+            pokemon_data.get('nickname', pokemon_data.get('species_name', 'Pokemon')),
+            species_name=pokemon_data.get('species_name'),
+            trainer_name=pokemon_data.get('original_trainer')
+        )
+        return FallbackReply(reply, 'ngram') if reply else None
     
     def _fallback_response(self, user_message: str, pokemon_data: Dict) -> str:
         """Generate fallback response when AI is unavailable - uses animal intelligence system"""
+        reply = self.sample_fallback_model(pokemon_data)
+        if reply:
+            return reply
+        
         from app.services.pokemon_intelligence import PokemonPersonalityBuilder, IntelligenceLevel, CommunicationStyle
         import random
         
@@ -475,4 +1165,4 @@ Remember: You are {nickname} the {species_name} - an intelligent animal who has
             ]
             responses.extend(playful_additions)
         
-        return random.choice(responses)
\ No newline at end of file
+        return FallbackReply(random.choice(responses), 'template')
\ No newline at end of file
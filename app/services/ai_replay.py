@@ -0,0 +1,276 @@
+import os
+import io
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from app.services.pokeapi_replay import LatencyModel
+
+logger = logging.getLogger(__name__)
+
+# Replies used when no recorded fixture is involved (stub mode)
+STUB_REPLIES = [
+    "*tilts head and chirps happily* That sounds like fun!",
+    "*bounces on the spot* I missed you! What are we doing today?",
+    "*sniffs the air curiously* Something smells tasty around here...",
+    "*curls up beside you with a content sigh* I like it when we talk like this.",
+    "*perks up its ears* Did you hear that? Let's go explore!",
+    "*nuzzles your hand gently* I'm always on your team, you know."
+]
+
+def request_key(request) -> str:
+    """Fixture name for a provider request: endpoint plus a hash of the canonical JSON body"""
+    path = urlparse(request.url).path
+    try:
+        body = json.dumps(json.loads(request.body or b'{}'), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        body = request.body.decode('utf-8', 'replace') if isinstance(request.body, bytes) else str(request.body)
+    endpoint = path.strip('/').replace('/', '_') or 'root'
+    return f"{endpoint}-{hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]}"
+
+class PacedBody(io.RawIOBase):
+    """Response body that hands out one chunk at a time, sleeping before each like a live stream"""
+    
+    def __init__(self, chunks: List[bytes], delays: List[float], sleep=time.sleep):
+        super().__init__()
+        self._chunks = list(chunks)
+        self._delays = list(delays)
+        self._pending = b''
+        self.sleep = sleep
+    
+    def readable(self):
+        return True
+    
+    def read(self, size: int = -1) -> bytes:
+        if not self._pending:
+            if not self._chunks:
+                return b''
+            self._pending = self._chunks.pop(0)
+            delay = self._delays.pop(0) if self._delays else 0.0
+            if delay:
+                self.sleep(delay)
+        if size is None or size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+    
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Transport adapter that forwards AI provider calls and saves every 200 response
+    Fixtures are named by request_key, so replaying the same conversation finds them
+    again. Streamed bodies are read in full before being handed back, so recording
+    does not show true time-to-first-token
+    """
+    
+    def __init__(self, fixtures_dir: str, upstream: Optional[BaseAdapter] = None, pool_size: int = 10):
+        super().__init__()
+        os.makedirs(fixtures_dir, exist_ok=True)
+        self.fixtures_dir = fixtures_dir
+        self.upstream = upstream or HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.recorded = 0
+    
+    def send(self, request, **kwargs):
+        response = self.upstream.send(request, **kwargs)
+        if response.status_code != 200:
+            return response
+        
+        body = response.content  # Cached on the response, so callers can still iterate it
+        content_type = response.headers.get('Content-Type', 'application/json')
+        fixture = {
+            'url': request.url,
+            'content_type': content_type,
+            'stream': 'text/event-stream' in content_type,
+            'body': body.decode('utf-8')
+        }
+        path = os.path.join(self.fixtures_dir, f"{request_key(request)}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(fixture, f, indent=1)
+        os.replace(tmp_path, path)
+        self.recorded += 1
+        return response
+    
+    def close(self):
+        self.upstream.close()
+
+class AIReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers OpenAI and Claude calls offline
+    With a fixtures directory it serves responses saved by RecordingAdapter (404 when a
+    request was never recorded); without one it synthesizes replies in each provider's
+    wire format, streamed or not. Latency, time between streamed chunks, 429s, server
+    errors and timeouts are drawn from a seeded RNG so load tests are reproducible and
+    reach the retry and fallback paths of AIChatService
+    """
+    
+    def __init__(self, fixtures_dir: Optional[str] = None, latency: Optional[LatencyModel] = None,
+                 chunk_latency: Optional[LatencyModel] = None, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, timeout_rate: float = 0.0,
+                 stall: Optional[float] = None, seed: Optional[int] = None, sleep=time.sleep):
+        super().__init__()
+        if fixtures_dir and not os.path.isdir(fixtures_dir):
+            raise ValueError(f"AI replay fixtures directory not found: {fixtures_dir}")
+        
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency or LatencyModel()
+        self.chunk_latency = chunk_latency or LatencyModel()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.stall = stall  # How long an injected timeout hangs (default: the client's read timeout)
+        self.sleep = sleep
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'served': 0, 'missing': 0, 'rate_limited': 0, 'errors': 0, 'timeouts': 0}
+    
+    @classmethod
+    def from_env(cls, pool_size: int = 10) -> Optional[BaseAdapter]:
+        """Build an adapter from AI_REPLAY_* settings, or None when provider calls go out live"""
+        mode = os.environ.get('AI_REPLAY_MODE', '').lower()
+        if not mode:
+            return None
+        
+        fixtures_dir = os.environ.get('AI_REPLAY_DIR')
+        if mode == 'record':
+            if not fixtures_dir:
+                raise ValueError("AI_REPLAY_MODE=record needs AI_REPLAY_DIR")
+            return RecordingAdapter(fixtures_dir, pool_size=pool_size)
+        if mode == 'replay' and not fixtures_dir:
+            raise ValueError("AI_REPLAY_MODE=replay needs AI_REPLAY_DIR")
+        if mode not in ('replay', 'stub'):
+            raise ValueError(f"Unknown AI_REPLAY_MODE: {mode}")
+        
+        seed = os.environ.get('AI_REPLAY_SEED')
+        stall = os.environ.get('AI_REPLAY_STALL')
+        return cls(
+            fixtures_dir if mode == 'replay' else None,
+            latency=LatencyModel.from_spec(os.environ.get('AI_REPLAY_LATENCY')),
+            chunk_latency=LatencyModel.from_spec(os.environ.get('AI_REPLAY_CHUNK_LATENCY')),
+            error_rate=float(os.environ.get('AI_REPLAY_ERROR_RATE', 0)),
+            rate_limit_rate=float(os.environ.get('AI_REPLAY_RATE_LIMIT_RATE', 0)),
+            timeout_rate=float(os.environ.get('AI_REPLAY_TIMEOUT_RATE', 0)),
+            stall=float(stall) if stall else None,
+            seed=int(seed) if seed else None
+        )
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+            reply = self._rng.choice(STUB_REPLIES)
+        
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        
+        if roll < self.timeout_rate or (read_timeout and delay > read_timeout):
+            self._count('timeouts')
+            hang = self.stall if self.stall is not None else (read_timeout or delay)
+            self.sleep(hang)
+            raise requests.exceptions.ReadTimeout(f"Replay timeout for {request.url}", request=request)
+        
+        self.sleep(delay)
+        
+        if roll < self.timeout_rate + self.rate_limit_rate:
+            self._count('rate_limited')
+            return self._build_response(request, 429, [b'{"error": {"type": "rate_limit_error"}}'],
+                                        extra_headers={'Retry-After': '1'})
+        if roll < self.timeout_rate + self.rate_limit_rate + self.error_rate:
+            self._count('errors')
+            return self._build_response(request, 500, [b'{"error": {"type": "api_error"}}'])
+        
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            payload = {}
+        
+        if self.fixtures_dir:
+            fixture = self._load_fixture(request)
+            if fixture is None:
+                self._count('missing')
+                logger.debug(f"No AI replay fixture for {request_key(request)}")
+                return self._build_response(request, 404, [b'{"error": {"type": "not_found_error"}}'])
+            body = fixture['body'].encode('utf-8')
+            chunks = self._split_events(body) if fixture.get('stream') else [body]
+            content_type = fixture.get('content_type', 'application/json')
+        else:
+            chunks = self._synthesize(request, payload, reply)
+            content_type = 'text/event-stream' if payload.get('stream') else 'application/json'
+        
+        self._count('served')
+        return self._build_response(request, 200, chunks, content_type, paced=bool(payload.get('stream')))
+    
+    def _load_fixture(self, request) -> Optional[Dict]:
+        path = os.path.join(self.fixtures_dir, f"{request_key(request)}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _split_events(self, body: bytes) -> List[bytes]:
+        """Split a recorded event stream back into its individual events"""
+        return [event + b'\n\n' for event in body.split(b'\n\n') if event.strip()]
+    
+    def _synthesize(self, request, payload: Dict, reply: str) -> List[bytes]:
+        """Provider-shaped body chunks for a canned reply, with plausible token usage"""
+        claude = urlparse(request.url).path.endswith('/messages')
+        words = [word + ' ' for word in reply.split(' ')]
+        words[-1] = words[-1].rstrip()
+        prompt_tokens = max(1, len(request.body or b'') // 4)
+        completion_tokens = len(words)
+        
+        if claude:
+            usage = {'input_tokens': prompt_tokens, 'output_tokens': completion_tokens}
+            if not payload.get('stream'):
+                return [json.dumps({'type': 'message', 'role': 'assistant',
+                                    'content': [{'type': 'text', 'text': reply}], 'usage': usage}).encode()]
+            events = [('message_start', {'type': 'message_start', 'message': {'usage': {'input_tokens': prompt_tokens, 'output_tokens': 1}}})]
+            events += [('content_block_delta', {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': word}})
+                       for word in words]
+            events.append(('message_delta', {'type': 'message_delta', 'usage': {'output_tokens': completion_tokens}}))
+            events.append(('message_stop', {'type': 'message_stop'}))
+            return [f"event: {name}\ndata: {json.dumps(data)}\n\n".encode() for name, data in events]
+        
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens}
+        if not payload.get('stream'):
+            return [json.dumps({'object': 'chat.completion', 'usage': usage,
+                                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}}]}).encode()]
+        events = [{'choices': [{'index': 0, 'delta': {'content': word}}]} for word in words]
+        events.append({'choices': [], 'usage': usage})
+        return [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+    
+    def _build_response(self, request, status: int, chunks: List[bytes], content_type: str = 'application/json',
+                        paced: bool = False, extra_headers: Optional[Dict] = None):
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = status
+        response.headers['Content-Type'] = content_type
+        response.headers.update(extra_headers or {})
+        if paced:
+            # The first chunk is ready with the headers; the rest arrive one by one
+            with self._lock:
+                delays = [0.0] + [self.chunk_latency.sample(self._rng) for _ in chunks[1:]]
+            response.raw = PacedBody(chunks, delays, self.sleep)
+        else:
+            body = b''.join(chunks)
+            response.headers['Content-Length'] = str(len(body))
+            response.raw = io.BytesIO(body)
+        return response
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def close(self):
+        pass
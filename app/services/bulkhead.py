@@ -0,0 +1,95 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+class BulkheadFull(Exception):
+    """Raised when an AI call is shed because every slot and queue place is taken"""
+    
+    def __init__(self, retry_after: int):
+        super().__init__(f"AI calls saturated, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class Bulkhead:
+    """
+    Caps concurrent outbound AI calls so a slow provider cannot tie up every web worker
+    Callers beyond max_concurrent wait in a short queue (at most max_queue of them, for at
+    most queue_timeout seconds); anyone else is refused immediately with BulkheadFull
+    """
+    
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+        self._admitted = 0
+        self._shed = 0
+        self._queue_times = deque(maxlen=500)  # Seconds spent queued by recent admitted calls
+    
+    def retry_after(self) -> int:
+        """Whole seconds a shed caller should wait before trying again"""
+        return max(1, int(round(self.queue_timeout)))
+    
+    def _shed_call(self):
+        with self._lock:
+            self._shed += 1
+        raise BulkheadFull(self.retry_after())
+    
+    @contextmanager
+    def slot(self, queue: bool = True):
+        """
+        Hold one AI call slot for the duration of the block
+        With queue=False (background work) a slot is only taken if one is free and no
+        caller is queued for it; otherwise BulkheadFull is raised without counting a shed
+        """
+        started = time.monotonic()
+        if not queue:
+            with self._lock:
+                free = self._waiting == 0 and self._slots.acquire(blocking=False)
+            if not free:
+                raise BulkheadFull(self.retry_after())
+        elif not self._slots.acquire(blocking=False):
+            with self._lock:
+                queue_full = self._waiting >= self.max_queue
+                if not queue_full:
+                    self._waiting += 1
+            if queue_full:
+                self._shed_call()
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+            if not acquired:
+                self._shed_call()
+        
+        with self._lock:
+            self._in_flight += 1
+            self._admitted += 1
+            if queue:
+                self._queue_times.append(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+    
+    def stats(self) -> Dict:
+        """Current occupancy, totals and queue-time percentiles"""
+        with self._lock:
+            queue_times = sorted(self._queue_times)
+            stats = {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'admitted': self._admitted,
+                'shed': self._shed
+            }
+        for name, pct in (('queue_time_p50', 0.5), ('queue_time_p95', 0.95), ('queue_time_max', 1.0)):
+            stats[name] = queue_times[min(len(queue_times) - 1, int(pct * len(queue_times)))] if queue_times else 0.0
+        return stats
@@ -0,0 +1,131 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from flask import current_app
+from app.models.pokemon import db, Pokemon, ChatMessage, ConversationSummary
+from app.services.token_budget import pack_history
+
+logger = logging.getLogger(__name__)
+
+MAX_SUMMARY_CHARS = 1200  # Keeps the memory block a constant size in the prompt
+MIN_MEMORABLE_WORDS = 4  # Shorter trainer messages are greetings and small talk
+
+def extractive_summary(previous_summary: str, messages: List[Dict], max_chars: int = MAX_SUMMARY_CHARS) -> str:
+    """
+    Fallback summary used when no AI provider is available
+    Appends the trainer's substantive messages and forgets the oldest lines beyond max_chars
+    """
+    lines = [line for line in (previous_summary or '').split('\n') if line.strip()]
+    for msg in messages:
+        if msg.get('sender') != 'user':
+            continue
+        text = ' '.join(msg.get('message', '').split())
+        if len(text.split()) < MIN_MEMORABLE_WORDS:
+            continue
+        if len(text) > 160:
+            text = text[:157].rstrip() + '...'
+        lines.append(f"- Trainer said: {text}")
+    
+    while len(lines) > 1 and len('\n'.join(lines)) > max_chars:
+        lines.pop(0)
+    return '\n'.join(lines)[-max_chars:]
+
+class ConversationSummarizer:
+    """
+    Folds older chat messages into a per-Pokemon rolling summary in the background
+    The prompt's history holds the newest messages that fit the AI service's token budget
+    (at most max_recent of them). Messages are summarized before they fall out of it: once
+    an unsummarized message would no longer be sent, older messages are folded in until
+    the prompt has room for AI_SUMMARY_EVERY more, so each message is always in the
+    summary, the prompt, or both. A budget that holds fewer messages than that is
+    summarized whole, as often as it fills
+    """
+    
+    NEXT_MESSAGE_RESERVE = 100  # Tokens left for the trainer's next message when measuring the prompt
+    
+    def __init__(self, ai_service, max_recent: int = 29):
+        self.ai_service = ai_service
+        self.every = int(os.getenv('AI_SUMMARY_EVERY', '10'))
+        self.max_recent = max_recent
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chat-summary')
+        self._pending = set()
+        self._lock = threading.Lock()
+    
+    def _unsummarized_query(self, pokemon_id: int, last_message_id: int):
+        return ChatMessage.query.filter(
+            ChatMessage.pokemon_id == pokemon_id,
+            ChatMessage.id > last_message_id
+        )
+    
+    def prompt_window(self, pokemon_id: int) -> int:
+        """How many of the newest messages the next prompt's history will hold"""
+        recent = ChatMessage.query.filter_by(pokemon_id=pokemon_id)\
+            .order_by(ChatMessage.id.desc())\
+            .limit(self.max_recent).all()
+        history = [{'sender': msg.sender, 'message': msg.message} for msg in reversed(recent)]
+        budget = self.ai_service.history_token_budget - self.NEXT_MESSAGE_RESERVE
+        _, stats = pack_history(history, '', budget, self.ai_service.token_counter)
+        return stats['turns_kept']
+    
+    def maybe_schedule(self, pokemon_id: int) -> Optional[Future]:
+        """Queue a summary update if an unsummarized message is about to leave the prompt"""
+        if self.every <= 0:
+            return None
+        
+        record = ConversationSummary.query.filter_by(pokemon_id=pokemon_id).first()
+        last_message_id = record.last_message_id if record else 0
+        if self._unsummarized_query(pokemon_id, last_message_id).count() <= self.prompt_window(pokemon_id):
+            return None
+        
+        with self._lock:
+            if pokemon_id in self._pending:
+                return None
+            self._pending.add(pokemon_id)
+        
+        app = current_app._get_current_object()
+        return self._executor.submit(self._run, app, pokemon_id)
+    
+    def _run(self, app, pokemon_id: int):
+        try:
+            with app.app_context():
+                try:
+                    return self.summarize(pokemon_id)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            logger.error(f"Conversation summary failed for Pokemon ID {pokemon_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(pokemon_id)
+    
+    def summarize(self, pokemon_id: int) -> Optional[ConversationSummary]:
+        """Fold older messages into the stored summary, leaving the prompt room for AI_SUMMARY_EVERY more"""
+        pokemon = db.session.get(Pokemon, pokemon_id)
+        if pokemon is None:
+            return None
+        
+        record = pokemon.conversation_summary or ConversationSummary(pokemon_id=pokemon_id, summary='', last_message_id=0, message_count=0)
+        keep = max(0, self.prompt_window(pokemon_id) - max(self.every, 0))
+        messages = self._unsummarized_query(pokemon_id, record.last_message_id)\
+            .order_by(ChatMessage.id.desc())\
+            .offset(keep).all()
+        if not messages:
+            return record
+        messages.reverse()
+        
+        history = [{'sender': msg.sender, 'message': msg.message} for msg in messages]
+        summary = self.ai_service.summarize_conversation(record.summary, history, pokemon.nickname)
+        if summary:
+            summary = summary[:MAX_SUMMARY_CHARS]
+        else:
+            summary = extractive_summary(record.summary, history)
+        
+        record.summary = summary
+        record.last_message_id = messages[-1].id
+        record.message_count = (record.message_count or 0) + len(messages)
+        db.session.add(record)
+        db.session.commit()
+        logger.info(f"Folded {len(messages)} messages into the summary for {pokemon.nickname}")
+        return record
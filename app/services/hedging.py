@@ -0,0 +1,171 @@
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per provider"""
+    
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+    
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """Latency percentile for key, or None until enough calls were seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+def run_hedged(
+    executor,
+    primary: Callable[[threading.Event], Optional[str]],
+    secondary: Callable[[threading.Event], Optional[str]],
+    delay: float,
+    timeout: float
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Run primary, and secondary too if primary has not answered within delay
+    Each callable receives a cancel event it must check while working. The first
+    non-empty answer wins and the other call is cancelled.
+    Returns (answer, 'primary' | 'secondary') or (None, None) if neither answered in time
+    """
+    deadline = time.monotonic() + timeout
+    cancels = {'primary': threading.Event(), 'secondary': threading.Event()}
+    futures = {executor.submit(primary, cancels['primary']): 'primary'}
+    
+    def finish(result, winner):
+        for event in cancels.values():
+            event.set()
+        return result, winner
+    
+    # Give the primary its usual (p95) time to answer alone
+    done, _ = wait(futures, timeout=max(0.0, min(delay, deadline - time.monotonic())))
+    for future in done:
+        result = _result_of(future)
+        if result:
+            return finish(result, 'primary')
+        del futures[future]  # Failed fast - the secondary takes over immediately
+    
+    if time.monotonic() < deadline:
+        logger.info("Primary AI provider slow or failed, hedging with secondary")
+        futures[executor.submit(secondary, cancels['secondary'])] = 'secondary'
+    
+    while futures:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            leg = futures.pop(future)
+            result = _result_of(future)
+            if result:
+                return finish(result, leg)
+    
+    return finish(None, None)
+
+def stream_hedged(
+    executor,
+    primary: Callable[[], Iterator[str]],
+    secondary: Callable[[], Iterator[str]],
+    delay: float,
+    timeout: float
+) -> Iterator[str]:
+    """
+    Stream primary, and secondary too if primary has sent no text within delay
+    Each leg is read on the executor. The first leg to send text is streamed through
+    to its end and the other is cancelled; timeout bounds the wait for that first text.
+    Yields nothing if neither leg sent any text in time
+    """
+    events = queue.Queue()  # (leg, chunk), with chunk None once a leg has finished
+    cancels = {'primary': threading.Event(), 'secondary': threading.Event()}
+    running = set()
+    
+    def pump(leg, open_stream):
+        chunks = None
+        try:
+            chunks = open_stream()
+            for chunk in chunks:
+                if cancels[leg].is_set():
+                    logger.debug(f"Hedged {leg} stream cancelled")
+                    return
+                events.put((leg, chunk))
+        except Exception as e:
+            logger.warning(f"Hedged AI stream failed: {e}")
+        finally:
+            if chunks is not None:
+                chunks.close()  # Closes the provider response
+            events.put((leg, None))
+    
+    def start(leg, open_stream):
+        running.add(leg)
+        executor.submit(pump, leg, open_stream)
+    
+    started = time.monotonic()
+    deadline = started + timeout
+    hedge_at = started + min(delay, timeout)
+    hedged = False
+    winner = None
+    start('primary', primary)
+    try:
+        while True:
+            now = time.monotonic()
+            # The primary gets its usual time to first text alone, unless it fails fast
+            if winner is None and not hedged and (now >= hedge_at or not running):
+                hedged = True
+                if now < deadline:
+                    logger.info("Primary AI provider slow to start streaming, hedging with secondary")
+                    start('secondary', secondary)
+            if not running:
+                return
+            
+            if winner is None:
+                wait_for = (deadline if hedged else hedge_at) - now
+                if wait_for <= 0:
+                    return
+                try:
+                    leg, chunk = events.get(timeout=wait_for)
+                except queue.Empty:
+                    continue
+            else:
+                leg, chunk = events.get()  # The winner's reads are bounded by the provider timeouts
+            
+            if chunk is None:
+                running.discard(leg)
+                if leg == winner:
+                    return
+                continue
+            if winner is None:
+                winner = leg
+                for other, cancel in cancels.items():
+                    if other != leg:
+                        cancel.set()
+                if leg == 'secondary':
+                    logger.info("Hedged stream answered by the secondary provider")
+            if leg == winner:
+                yield chunk
+    finally:
+        for cancel in cancels.values():
+            cancel.set()
+
+def _result_of(future) -> Optional[str]:
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"Hedged AI call failed: {e}")
+        return None
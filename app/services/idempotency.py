@@ -0,0 +1,129 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from app.models.pokemon import db, IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+def request_fingerprint(pokemon_id: int, message: str) -> str:
+    """Hash of what a key was used for, so a reused key with a different message is caught"""
+    return hashlib.sha256(f"{pokemon_id}:{message}".encode('utf-8')).hexdigest()
+
+class IdempotencyStore:
+    """
+    Idempotency-Key bookkeeping for chat sends, backed by the idempotency_record table
+    The first request with a key claims it with a pending row; repeats get the stored
+    result, and a repeat that arrives while the first is still running waits for it
+    instead of starting another AI call. Failed requests release their key so a retry
+    runs again, a pending row whose worker died is taken over after abandon_after, and
+    rows are purged once they are older than the TTL
+    """
+    
+    PURGE_INTERVAL = 60  # Seconds between sweeps for expired rows
+    POLL_INTERVAL = 0.1  # Seconds between checks on a request running in another process
+    
+    def __init__(self, ttl: float = 86400, wait_timeout: float = 30, abandon_after: float = 300, clock=datetime.utcnow):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        # Age after which another process may take over a pending row; well past the longest
+        # a request can run, so a slow reply is never generated twice
+        self.abandon_after = max(abandon_after, wait_timeout)
+        self.clock = clock
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+    
+    def claim(self, key: str, request_hash: str) -> Optional[IdempotencyRecord]:
+        """
+        Claim key for this request
+        Returns None when this request owns the key and must complete() or release() it,
+        otherwise the record of the earlier request (which may still be pending)
+        """
+        self._purge_expired()
+        
+        for _ in range(2):
+            db.session.add(IdempotencyRecord(key=key, request_hash=request_hash, created_at=self.clock()))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+            else:
+                with self._lock:
+                    self._inflight[key] = threading.Event()
+                return None
+            
+            existing = db.session.get(IdempotencyRecord, key, populate_existing=True)
+            if existing is None:
+                continue  # Released between our insert and read - try again
+            with self._lock:
+                running_here = key in self._inflight
+            if (existing.pending and not running_here
+                    and existing.created_at < self.clock() - timedelta(seconds=self.abandon_after)):
+                # Its worker died without finishing; take the key over
+                logger.warning(f"Taking over abandoned idempotency key {key}")
+                db.session.delete(existing)
+                db.session.commit()
+                continue
+            return existing
+        return db.session.get(IdempotencyRecord, key, populate_existing=True)
+    
+    def wait(self, key: str) -> Optional[IdempotencyRecord]:
+        """
+        Wait for the request holding key to finish
+        Returns the finished record, None if that request failed and released the key,
+        or the still-pending record once wait_timeout has passed
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        with self._lock:
+            event = self._inflight.get(key)
+        if event:
+            event.wait(self.wait_timeout)  # Same process - woken as soon as it finishes
+        
+        while True:
+            record = db.session.get(IdempotencyRecord, key, populate_existing=True)
+            if record is None or not record.pending or time.monotonic() >= deadline:
+                return record
+            time.sleep(self.POLL_INTERVAL)
+    
+    def complete(self, key: str, status_code: int, body: Dict):
+        """Store the response for key and wake any waiting duplicates"""
+        record = db.session.get(IdempotencyRecord, key)
+        if record is not None:
+            record.status_code = status_code
+            record.response_body = json.dumps(body)
+            db.session.commit()
+        self._finish(key)
+    
+    def release(self, key: str):
+        """Forget a key whose request failed so a retry is processed again"""
+        try:
+            IdempotencyRecord.query.filter_by(key=key, status_code=None).delete()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not release idempotency key {key}: {e}")
+        self._finish(key)
+    
+    def _finish(self, key: str):
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event:
+            event.set()
+    
+    def _purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge < self.PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        
+        cutoff = self.clock() - timedelta(seconds=self.ttl)
+        purged = IdempotencyRecord.query.filter(IdempotencyRecord.created_at < cutoff).delete()
+        db.session.commit()
+        if purged:
+            logger.info(f"Purged {purged} expired idempotency records")
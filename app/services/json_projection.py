@@ -0,0 +1,123 @@
+"""
+Selective JSON extraction
+Keeps only whitelisted fields from large JSON documents, either from an already
+parsed object or incrementally from a byte stream without materializing the rest
+"""
+
+import json
+from typing import Dict, IO, Iterable, Optional
+
+try:
+    import ijson
+except ImportError:  # Streaming is optional - fall back to full parsing
+    ijson = None
+
+# Marker for "keep this whole subtree" in a field tree
+KEEP = None
+
+def build_field_tree(paths: Iterable[str]) -> Dict:
+    """
+    Turn dotted paths into a nested field tree
+    'item' addresses array elements, e.g. 'stats.item.stat.name'
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = path.split('.')
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is KEEP and part in node:
+                break  # A parent path already keeps everything below
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = KEEP
+    return tree
+
+def project(value, tree: Optional[Dict]):
+    """Project an already-parsed JSON value onto a field tree"""
+    if tree is KEEP:
+        return value
+    if isinstance(value, list):
+        if 'item' not in tree:
+            return []
+        return [project(item, tree['item']) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: project(value[key], subtree)
+            for key, subtree in tree.items()
+            if key in value
+        }
+    return value
+
+def stream_project(stream: IO[bytes], tree: Dict) -> Dict:
+    """
+    Incrementally parse a JSON object from a byte stream, keeping only fields in the tree
+    Skipped subtrees are consumed event by event and never built in memory
+    """
+    if ijson is None:
+        return project(json.load(stream), tree)
+    
+    try:
+        return _stream_project(stream, tree)
+    except ijson.JSONError as e:
+        raise ValueError(f"Malformed JSON stream: {e}") from e
+
+def _stream_project(stream: IO[bytes], tree: Dict) -> Dict:
+    """Event loop behind stream_project"""
+    root = None
+    # Each frame: [container, field tree for its children, current map key]
+    stack = []
+    skip_depth = 0
+    
+    for event, value in ijson.basic_parse(stream, use_float=True):
+        if skip_depth:
+            if event == 'start_map' or event == 'start_array':
+                skip_depth += 1
+            elif event == 'end_map' or event == 'end_array':
+                skip_depth -= 1
+            continue
+        
+        if event == 'map_key':
+            stack[-1][2] = value
+            continue
+        
+        if event == 'end_map' or event == 'end_array':
+            stack.pop()
+            continue
+        
+        # A value is starting - decide whether its parent wants it
+        if stack:
+            container, node, key = stack[-1]
+            if node is KEEP:
+                child_tree = KEEP
+            elif isinstance(container, list):
+                if 'item' not in node:
+                    skip_depth = 1 if event in ('start_map', 'start_array') else 0
+                    continue
+                child_tree = node['item']
+            elif key in node:
+                child_tree = node[key]
+            else:
+                skip_depth = 1 if event in ('start_map', 'start_array') else 0
+                continue
+        else:
+            container, key, child_tree = None, None, tree
+        
+        if event == 'start_map':
+            child = {}
+        elif event == 'start_array':
+            child = []
+        else:
+            child = value
+        
+        if container is None:
+            root = child
+        elif isinstance(container, list):
+            container.append(child)
+        else:
+            container[key] = child
+        
+        if event == 'start_map' or event == 'start_array':
+            stack.append([child, child_tree, None])
+    
+    return root if root is not None else {}
@@ -0,0 +1,78 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+class _Batch:
+    """Messages answered by one generation, and its outcome"""
+    
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class _Slot:
+    """Per-key state: the batch still collecting messages and whether a generation is running"""
+    
+    def __init__(self):
+        self.open: Optional[_Batch] = None
+        self.busy = False
+
+class MessageCoalescer:
+    """
+    Merges rapid-fire messages to the same Pokemon into a single generation
+    The first message of a burst leads: it waits out the window (and any generation
+    already running for that Pokemon, which cannot see the new messages) while later
+    messages join its batch, then runs one generation for all of them. Everyone in
+    the batch gets the same result. Coalescing is per process
+    """
+    
+    def __init__(self, window: float = 0.0):
+        self.window = window
+        self._slots: Dict[Hashable, _Slot] = {}
+        self._cond = threading.Condition()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+    
+    def submit(self, key: Hashable, item: Any, run: Callable[[List[Any]], Any]) -> Tuple[Any, int]:
+        """
+        Add item to key's current batch and wait for the batch to be answered
+        run is called once per batch, by the request that opened it, with every item
+        Returns (run's result, number of items it answered)
+        """
+        with self._cond:
+            slot = self._slots.setdefault(key, _Slot())
+            batch = slot.open
+            leader = batch is None
+            if leader:
+                batch = slot.open = _Batch()
+            batch.items.append(item)
+        
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.result, len(batch.items)
+        
+        time.sleep(self.window)
+        with self._cond:
+            while slot.busy:
+                self._cond.wait()
+            slot.open = None  # Later messages start the next batch
+            slot.busy = True
+        
+        try:
+            batch.result = run(list(batch.items))
+        except BaseException as e:
+            batch.error = e
+            raise
+        finally:
+            with self._cond:
+                slot.busy = False
+                if slot.open is None and self._slots.get(key) is slot:
+                    del self._slots[key]
+                self._cond.notify_all()
+            batch.done.set()
+        return batch.result, len(batch.items)
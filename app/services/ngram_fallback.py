@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import mmap
+import random
+import struct
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'fallback_ngram.bin'
+)
+
+# File layout (little-endian): header, then the model table as uint32 rows of
+# (species_id, band, first_state, end_state), state keys (uint64, sorted within each
+# model), per-state transition starts (uint32, one extra end marker), transition token
+# ids and running counts (uint32), vocabulary offsets (uint32) and the UTF-8 vocabulary
+HEADER = struct.Struct('<4sHHIIII')  # magic, version, order, vocab, models, states, transitions
+MAGIC = b'PKNG'
+VERSION = 1
+ORDER = 2  # Words of context; both fit one uint64 state key
+
+BOUNDARY = 0  # Token id that starts and ends every reply
+# Stand-ins for the names in a reply, so replies carry over between Pokemon and trainers
+NAME = '{name}'
+SPECIES = '{species}'
+TRAINER = '{trainer}'
+POOLED = 0  # Species id of the per-band models trained on every species
+MAX_TOKENS = 80
+
+def friendship_band(friendship: int) -> int:
+    """Wary, warming up or loyal - the same bands as the template fallback"""
+    if friendship < 70:
+        return 0
+    if friendship < 150:
+        return 1
+    return 2
+
+def tokenize(text: str, nickname: Optional[str] = None, species_name: Optional[str] = None,
+             trainer_name: Optional[str] = None) -> List[str]:
+    """Split a reply into words, with the nickname, species and trainer names replaced by placeholders"""
+    names = {name: placeholder for name, placeholder in
+             ((trainer_name, TRAINER), (species_name, SPECIES), (nickname, NAME)) if name}
+    if names:
+        # Longest first, so a nickname inside the species name (or the reverse) is not split
+        pattern = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+        lookup = {name.lower(): placeholder for name, placeholder in names.items()}
+        text = re.sub(rf"(?<!\w)(?:{pattern})(?!\w)", lambda match: lookup[match.group(0).lower()],
+                      text, flags=re.IGNORECASE)
+    return text.split()
+
+class NgramTrainer:
+    """
+    Counts word trigrams in stored Pokemon replies, per species and friendship band
+    Every reply also trains its band's pooled model, used for species with too few
+    replies of their own. write() saves the models in the format NgramModel maps
+    """
+    
+    def __init__(self, min_replies: int = 5):
+        self.min_replies = min_replies  # Fewer replies than this would mostly be parroted back
+        self._ids: Dict[str, int] = {'': BOUNDARY}
+        self._words: List[str] = ['']
+        # (species_id, band) -> state key -> next token id -> count
+        self._counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        self._replies: Dict[Tuple[int, int], int] = defaultdict(int)
+    
+    def add(self, text: str, species_id: int, friendship: int, nickname: Optional[str] = None,
+            species_name: Optional[str] = None, trainer_name: Optional[str] = None):
+        """Count one reply, written at the given friendship"""
+        words = tokenize(text, nickname, species_name, trainer_name)
+        if not words:
+            return
+        token_ids = [self._token_id(word) for word in words] + [BOUNDARY]
+        
+        band = friendship_band(friendship)
+        for model in ((species_id, band), (POOLED, band)):
+            self._replies[model] += 1
+            counts = self._counts[model]
+            previous, last = BOUNDARY, BOUNDARY
+            for token_id in token_ids:
+                counts[(previous << 32) | last][token_id] += 1
+                previous, last = last, token_id
+    
+    def _token_id(self, word: str) -> int:
+        token_id = self._ids.get(word)
+        if token_id is None:
+            token_id = self._ids[word] = len(self._words)
+            self._words.append(word)
+        return token_id
+    
+    def write(self, path: str) -> Dict:
+        """Write the models with enough replies to path and return their sizes"""
+        models = sorted(model for model, replies in self._replies.items() if replies >= self.min_replies)
+        rows, keys, starts, tokens, running = array('I'), array('Q'), array('I'), array('I'), array('I')
+        for species_id, band in models:
+            counts = self._counts[(species_id, band)]
+            first_state = len(keys)
+            for key in sorted(counts):
+                keys.append(key)
+                starts.append(len(tokens))
+                total = 0
+                for token_id, count in sorted(counts[key].items()):
+                    total += count
+                    tokens.append(token_id)
+                    running.append(total)
+            rows.extend((species_id, band, first_state, len(keys)))
+        starts.append(len(tokens))
+        
+        encoded = [word.encode('utf-8') for word in self._words]
+        offsets = array('I', [0])
+        for word in encoded:
+            offsets.append(offsets[-1] + len(word))
+        
+        sections = [rows, keys, starts, tokens, running, offsets]
+        if sys.byteorder != 'little':
+            for section in sections:
+                section.byteswap()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, ORDER, len(encoded), len(models), len(keys), len(tokens)))
+            for section in sections:
+                f.write(section.tobytes())
+            f.write(b''.join(encoded))
+        os.replace(tmp_path, path)
+        
+        return {
+            'models': len(models),
+            'species': len({species_id for species_id, _ in models if species_id != POOLED}),
+            'states': len(keys),
+            'transitions': len(tokens),
+            'vocabulary': len(encoded),
+            'bytes': os.path.getsize(path)
+        }
+
+class NgramModel:
+    """
+    Memory-mapped trigram models written by NgramTrainer
+    Nothing is parsed up front beyond the small model table; sampling binary-searches
+    the mapped arrays directly, so loading is instant and pages are shared between
+    worker processes
+    """
+    
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._map_sections()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+    
+    def _map_sections(self):
+        if sys.byteorder != 'little':
+            raise ValueError("Fallback models can only be mapped on little-endian machines")
+        magic, version, order, vocab_size, model_count, state_count, transition_count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or order != ORDER:
+            raise ValueError("Not a fallback model file of this version")
+        
+        layout = (('I', model_count * 4), ('Q', state_count), ('I', state_count + 1),
+                  ('I', transition_count), ('I', transition_count), ('I', vocab_size + 1))
+        if HEADER.size + sum(count * struct.calcsize(fmt) for fmt, count in layout) > len(self._mmap):
+            raise ValueError("Fallback model file is truncated")
+        
+        self._view = memoryview(self._mmap)
+        offset = HEADER.size
+        sections = []
+        for fmt, count in layout:
+            size = count * struct.calcsize(fmt)
+            sections.append(self._view[offset:offset + size].cast(fmt))
+            offset += size
+        rows, self._keys, self._starts, self._tokens, self._running, self._offsets = sections
+        self._vocab_start = offset
+        
+        self.models = {
+            (rows[i], rows[i + 1]): (rows[i + 2], rows[i + 3])
+            for i in range(0, len(rows), 4)
+        }
+        rows.release()
+    
+    def sample(self, species_id: int, friendship: int, nickname: str, rng=random,
+               species_name: Optional[str] = None, trainer_name: Optional[str] = None) -> Optional[str]:
+        """
+        Generate a reply for the species and friendship, falling back to the band's pooled
+        model, with this Pokemon's and trainer's names filled in. Returns None when there
+        is no model or the walk ran on without ending
+        """
+        band = friendship_band(friendship)
+        bounds = self.models.get((species_id, band)) or self.models.get((POOLED, band))
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        
+        words = []
+        previous, last = BOUNDARY, BOUNDARY
+        for _ in range(MAX_TOKENS):
+            key = (previous << 32) | last
+            state = bisect_left(self._keys, key, lo, hi)
+            if state == hi or self._keys[state] != key:
+                return None  # Only a corrupt file has contexts with no state
+            first, end = self._starts[state], self._starts[state + 1]
+            pick = bisect_right(self._running, rng.randrange(self._running[end - 1]), first, end)
+            token_id = self._tokens[pick]
+            if token_id == BOUNDARY:
+                break
+            words.append(self._word(token_id))
+            previous, last = last, token_id
+        else:
+            return None
+        
+        if not words:
+            return None
+        reply = ' '.join(words)
+        for placeholder, name in ((NAME, nickname), (SPECIES, species_name or nickname), (TRAINER, trainer_name or 'Trainer')):
+            reply = reply.replace(placeholder, name)
+        return reply
+    
+    def _word(self, token_id: int) -> str:
+        start = self._vocab_start + self._offsets[token_id]
+        end = self._vocab_start + self._offsets[token_id + 1]
+        return self._mmap[start:end].decode('utf-8')
+    
+    def close(self):
+        for name in ('_keys', '_starts', '_tokens', '_running', '_offsets', '_view'):
+            section = self.__dict__.pop(name, None)
+            if section is not None:
+                section.release()
+        self._mmap.close()
+
+def load_fallback_model(path: Optional[str] = None) -> Optional[NgramModel]:
+    """Map the trained fallback model (AI_FALLBACK_MODEL or instance/fallback_ngram.bin) if there is one"""
+    path = path or os.getenv('AI_FALLBACK_MODEL', DEFAULT_MODEL_PATH)
+    if not os.path.exists(path):
+        return None
+    try:
+        model = NgramModel(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load fallback model {path}: {e}")
+        return None
+    logger.info(f"Loaded fallback model {path} ({len(model.models)} models)")
+    return model
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'pokeapi_cache'
+)
+
+class PokeAPICache:
+    """
+    File-backed cache for PokeAPI responses
+    Each entry keeps the HTTP validators (ETag / Last-Modified) returned by PokeAPI
+    so stale entries can be revalidated with a conditional request instead of re-downloaded
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get('POKEAPI_CACHE_DIR', DEFAULT_CACHE_DIR)
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def _path_for(self, endpoint: str) -> str:
+        """Map an endpoint like /pokemon/25 to a stable file name"""
+        slug = endpoint.strip('/').replace('/', '_')
+        digest = hashlib.sha1(endpoint.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{slug}-{digest}.json")
+    
+    def get(self, endpoint: str) -> Optional[Dict]:
+        """Get cached entry (data plus validators) for an endpoint"""
+        path = self._path_for(endpoint)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry for {endpoint}: {e}")
+            return None
+    
+    def set(self, endpoint: str, data: Dict, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> Dict:
+        """Store response data together with its validators"""
+        entry = {
+            'endpoint': endpoint,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'data': data
+        }
+        self._write(endpoint, entry)
+        return entry
+    
+    def touch(self, endpoint: str, entry: Dict, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> Dict:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        entry['fetched_at'] = time.time()
+        if etag:
+            entry['etag'] = etag
+        if last_modified:
+            entry['last_modified'] = last_modified
+        self._write(endpoint, entry)
+        return entry
+    
+    def is_fresh(self, entry: Dict, max_age: float) -> bool:
+        """Check if an entry is younger than max_age seconds"""
+        return (time.time() - entry.get('fetched_at', 0)) < max_age
+    
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict:
+        """Build If-None-Match / If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def endpoints(self) -> Iterator[str]:
+        """Iterate over all cached endpoints"""
+        for filename in sorted(os.listdir(self.cache_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, filename), 'r', encoding='utf-8') as f:
+                    endpoint = json.load(f).get('endpoint')
+            except (OSError, ValueError):
+                continue
+            if endpoint:
+                yield endpoint
+    
+    def clear(self):
+        """Remove every cached entry"""
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, filename))
+    
+    def _write(self, endpoint: str, entry: Dict):
+        """Write entry atomically so concurrent readers never see partial files"""
+        path = self._path_for(endpoint)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {endpoint}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
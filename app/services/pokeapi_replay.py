@@ -0,0 +1,177 @@
+import os
+import io
+import time
+import math
+import random
+import hashlib
+import logging
+import threading
+from typing import Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import BaseAdapter
+
+logger = logging.getLogger(__name__)
+
+class LatencyModel:
+    """
+    Per-request latency distribution for replayed responses
+    Specs look like 'fixed:80', 'uniform:20:200' or 'lognormal:80:0.6'
+    (all values in milliseconds except the lognormal sigma)
+    """
+    
+    def __init__(self, kind: str = 'fixed', a: float = 0.0, b: float = 0.0):
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+    
+    @classmethod
+    def from_spec(cls, spec: Optional[str]) -> 'LatencyModel':
+        """Parse a latency spec string"""
+        if not spec:
+            return cls()
+        
+        kind, _, params = spec.partition(':')
+        try:
+            values = [float(value) for value in params.split(':') if value]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        
+        if kind == 'fixed' and len(values) == 1:
+            return cls('fixed', values[0])
+        if kind == 'uniform' and len(values) == 2 and values[0] <= values[1]:
+            return cls('uniform', values[0], values[1])
+        if kind == 'lognormal' and len(values) == 2 and values[0] > 0:
+            return cls('lognormal', values[0], values[1])
+        raise ValueError(f"Invalid latency spec: {spec}")
+    
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds"""
+        if self.kind == 'uniform':
+            millis = rng.uniform(self.a, self.b)
+        elif self.kind == 'lognormal':
+            # a is the median, b the spread - gives the long tail real networks have
+            millis = rng.lognormvariate(math.log(self.a), self.b)
+        else:
+            millis = self.a
+        return max(0.0, millis) / 1000.0
+    
+    def __repr__(self):
+        if self.kind == 'fixed':
+            return f"fixed:{self.a:g}"
+        return f"{self.kind}:{self.a:g}:{self.b:g}"
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers PokeAPI requests from recorded response bodies
+    Fixtures live under fixtures_dir mirroring the API path, e.g. pokemon/25.json and
+    pokemon-species/25.json. Latency, server errors and timeouts can be injected so
+    PokeAPIService and the import pipeline can be measured offline and reproducibly
+    """
+    
+    API_PREFIX = '/api/v2/'
+    
+    def __init__(self, fixtures_dir: str, latency: Optional[LatencyModel] = None,
+                 error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 stall: Optional[float] = None, seed: Optional[int] = None,
+                 sleep=time.sleep):
+        super().__init__()
+        if not os.path.isdir(fixtures_dir):
+            raise ValueError(f"Replay fixtures directory not found: {fixtures_dir}")
+        
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.stall = stall  # How long an injected timeout hangs (default: the client's read timeout)
+        self.sleep = sleep
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'served': 0, 'not_modified': 0, 'missing': 0, 'errors': 0, 'timeouts': 0}
+    
+    @classmethod
+    def from_env(cls) -> Optional['ReplayAdapter']:
+        """Build an adapter from POKEAPI_REPLAY_* settings, or None when replay is off"""
+        fixtures_dir = os.environ.get('POKEAPI_REPLAY_DIR')
+        if not fixtures_dir:
+            return None
+        
+        seed = os.environ.get('POKEAPI_REPLAY_SEED')
+        stall = os.environ.get('POKEAPI_REPLAY_STALL')
+        return cls(
+            fixtures_dir,
+            latency=LatencyModel.from_spec(os.environ.get('POKEAPI_REPLAY_LATENCY')),
+            error_rate=float(os.environ.get('POKEAPI_REPLAY_ERROR_RATE', 0)),
+            timeout_rate=float(os.environ.get('POKEAPI_REPLAY_TIMEOUT_RATE', 0)),
+            stall=float(stall) if stall else None,
+            seed=int(seed) if seed else None
+        )
+    
+    def fixture_path(self, url: str) -> Optional[str]:
+        """Map a request URL to its fixture file"""
+        path = urlparse(url).path
+        if not path.startswith(self.API_PREFIX):
+            return None
+        
+        relative = path[len(self.API_PREFIX):].strip('/')
+        if not relative or '..' in relative.split('/'):
+            return None
+        return os.path.join(self.fixtures_dir, *relative.split('/')) + '.json'
+    
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+        
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        
+        if roll < self.timeout_rate or (read_timeout and delay > read_timeout):
+            self._count('timeouts')
+            hang = self.stall if self.stall is not None else (read_timeout or delay)
+            self.sleep(hang)
+            raise requests.exceptions.ReadTimeout(f"Replay timeout for {request.url}", request=request)
+        
+        self.sleep(delay)
+        
+        if roll < self.timeout_rate + self.error_rate:
+            self._count('errors')
+            return self._build_response(request, 503, b'{"detail": "Service Unavailable"}')
+        
+        path = self.fixture_path(request.url)
+        if not path or not os.path.exists(path):
+            self._count('missing')
+            logger.debug(f"No replay fixture for {request.url}")
+            return self._build_response(request, 404, b'Not Found')
+        
+        with open(path, 'rb') as f:
+            body = f.read()
+        
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            self._count('not_modified')
+            return self._build_response(request, 304, b'', etag)
+        
+        self._count('served')
+        return self._build_response(request, 200, body, etag)
+    
+    def _build_response(self, request, status: int, body: bytes, etag: Optional[str] = None):
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = status
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        response.headers['Content-Length'] = str(len(body))
+        if etag:
+            response.headers['ETag'] = etag
+        response.raw = io.BytesIO(body)
+        return response
+    
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def close(self):
+        pass
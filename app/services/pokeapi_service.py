@@ -3,6 +3,29 @@ import time
 from typing import Dict, Optional, List
 from functools import lru_cache
 import logging
+from app.services.pokeapi_cache import PokeAPICache
+from app.services.pokeapi_replay import ReplayAdapter
+from app.services.json_projection import build_field_tree, project, stream_project
+
+# Only the fields _combine_pokemon_data and _extract_species_data read;
+# /pokemon/{id} bodies are dominated by moves, game_indices and sprite version trees
+POKEMON_FIELDS = build_field_tree([
+    'id', 'name', 'height', 'weight', 'base_experience',
+    'sprites.front_default', 'sprites.front_shiny',
+    'sprites.other.official-artwork.front_default',
+    'sprites.other.showdown.front_default',
+    'sprites.other.home.front_default',
+    'stats.item.base_stat', 'stats.item.stat.name',
+    'abilities.item.ability.name', 'abilities.item.is_hidden', 'abilities.item.slot',
+    'types.item.type.name'
+])
+
+SPECIES_FIELDS = build_field_tree([
+    'color.name', 'shape.name', 'generation.name', 'growth_rate.name', 'habitat.name',
+    'is_legendary', 'is_mythical', 'capture_rate', 'base_happiness',
+    'flavor_text_entries.item.flavor_text', 'flavor_text_entries.item.language.name',
+    'genera.item.genus', 'genera.item.language.name'
+])
 
 logger = logging.getLogger(__name__)
 
@@ -10,13 +33,20 @@ class PokeAPIService:
     """Service for fetching Pokemon data from PokeAPI"""
     
     BASE_URL = "https://pokeapi.co/api/v2"
-    CACHE_TIMEOUT = 3600  # 1 hour cache
+    CACHE_TIMEOUT = 3600  # 1 hour before a cached entry is revalidated
     
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'PokemonChatApp/1.0'
         })
+        self.cache = PokeAPICache(cache_dir)
+        
+        # Offline benchmarking - answer from recorded fixtures instead of pokeapi.co
+        replay = ReplayAdapter.from_env()
+        if replay:
+            self.session.mount(self.BASE_URL, replay)
+            logger.info(f"PokeAPI replay enabled from {replay.fixtures_dir} (latency {replay.latency})")
     
     @lru_cache(maxsize=1000)
     def get_pokemon_data(self, species_id: int) -> Optional[Dict]:
@@ -39,29 +69,101 @@ class PokeAPIService:
             logger.error(f"Error fetching Pokemon data for ID {species_id}: {e}")
             return None
     
-    def _make_request(self, endpoint: str, retries: int = 2) -> Optional[Dict]:
-        """Make HTTP request with retry logic"""
+    def _make_request(self, endpoint: str, retries: int = 2, revalidate: bool = False) -> Optional[Dict]:
+        """
+        Make HTTP request with retry logic, served from the persistent cache when possible
+        Stale entries are revalidated with If-None-Match / If-Modified-Since so an
+        unchanged resource costs a 304 instead of a full body download
+        """
+        return self._fetch(endpoint, retries, revalidate)[0]
+    
+    def _fetch(self, endpoint: str, retries: int = 2, revalidate: bool = False):
+        """Fetch endpoint data, returning (data, status) where status is 'cached', 'not_modified', 'fetched', 'stale' or 'failed'"""
         url = f"{self.BASE_URL}{endpoint}"
+        entry = self.cache.get(endpoint)
+        
+        if entry and not revalidate and self.cache.is_fresh(entry, self.CACHE_TIMEOUT):
+            return entry['data'], 'cached'
+        
+        headers = self.cache.conditional_headers(entry)
         
         for attempt in range(retries + 1):
             try:
-                response = self.session.get(url, timeout=10)
-                if response.status_code == 200:
-                    return response.json()
+                response = self.session.get(url, headers=headers, timeout=10, stream=True)
+                if response.status_code == 304 and entry:
+                    # Unchanged upstream - refresh the entry without touching a body
+                    response.close()
+                    entry['data'] = self._trim(endpoint, entry['data'])
+                    self.cache.touch(
+                        endpoint, entry,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                    return entry['data'], 'not_modified'
+                elif response.status_code == 200:
+                    data = self._extract(endpoint, response)
+                    self.cache.set(
+                        endpoint, data,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified')
+                    )
+                    return data, 'fetched'
                 elif response.status_code == 404:
+                    response.close()
                     logger.warning(f"Pokemon not found: {endpoint}")
-                    return None
+                    return None, 'failed'
                 else:
+                    response.close()
                     logger.warning(f"API request failed: {response.status_code} for {endpoint}")
                     
-            except requests.exceptions.RequestException as e:
+            except (requests.exceptions.RequestException, ValueError) as e:
                 if attempt < retries:
                     time.sleep(1)  # Wait before retry
                     continue
                 logger.error(f"Request failed after {retries + 1} attempts: {e}")
-                
+        
+        # Serve stale data rather than nothing when PokeAPI is unreachable
+        if entry:
+            logger.info(f"Serving stale cached data for {endpoint}")
+            return entry['data'], 'stale'
+        return None, 'failed'
+    
+    def _fields_for(self, endpoint: str) -> Optional[Dict]:
+        """Field tree to keep for an endpoint (None keeps the whole body)"""
+        if endpoint.startswith('/pokemon-species/'):
+            return SPECIES_FIELDS
+        if endpoint.startswith('/pokemon/'):
+            return POKEMON_FIELDS
         return None
     
+    def _extract(self, endpoint: str, response: requests.Response) -> Dict:
+        """Stream the response body, keeping only the fields this service uses"""
+        fields = self._fields_for(endpoint)
+        if fields is None:
+            return response.json()
+        
+        try:
+            response.raw.decode_content = True  # Let urllib3 undo gzip while streaming
+            data = stream_project(response.raw, fields)
+        finally:
+            response.close()
+        return self._trim(endpoint, data, projected=True)
+    
+    def _trim(self, endpoint: str, data: Dict, projected: bool = False) -> Dict:
+        """Reduce data to the stored projection (also shrinks entries cached before projection)"""
+        fields = self._fields_for(endpoint)
+        if fields is None:
+            return data
+        if not projected:
+            data = project(data, fields)
+        
+        if fields is SPECIES_FIELDS:
+            # Only the first English entries are ever read
+            for key in ('flavor_text_entries', 'genera'):
+                english = [e for e in data.get(key, []) if e.get('language', {}).get('name') == 'en']
+                data[key] = english[:1]
+        return data
+    
     def _combine_pokemon_data(self, pokemon_data: Dict, species_data: Optional[Dict]) -> Dict:
         """Combine Pokemon and species data into useful format"""
         combined = {
@@ -165,6 +267,32 @@ class PokeAPIService:
         
         return data.get('flavor_text')
     
-    def clear_cache(self):
-        """Clear the LRU cache"""
-        self.get_pokemon_data.cache_clear()
\ No newline at end of file
+    def warm_species(self, species_id: int, revalidate: bool = False) -> Dict[str, str]:
+        """
+        Make sure both endpoints for a species are in the persistent cache
+        Returns the fetch status per endpoint ('cached', 'not_modified', 'fetched', 'stale' or 'failed')
+        """
+        statuses = {}
+        for endpoint in (f"/pokemon/{species_id}", f"/pokemon-species/{species_id}"):
+            _, statuses[endpoint] = self._fetch(endpoint, revalidate=revalidate)
+        return statuses
+    
+    def refresh_cache(self) -> Dict[str, int]:
+        """
+        Revalidate every persisted entry with conditional requests
+        Unchanged resources come back as 304s, so a full refresh transfers almost nothing
+        """
+        stats = {'not_modified': 0, 'fetched': 0, 'failed': 0}
+        for endpoint in list(self.cache.endpoints()):
+            _, status = self._fetch(endpoint, revalidate=True)
+            stats['failed' if status == 'stale' else status] += 1
+        
+        self.get_pokemon_data.cache_clear()
+        logger.info(f"PokeAPI cache refresh complete: {stats}")
+        return stats
+    
+    def clear_cache(self, persistent: bool = False):
+        """Clear the LRU cache (and optionally the persistent cache)"""
+        self.get_pokemon_data.cache_clear()
+        if persistent:
+            self.cache.clear()
\ No newline at end of file
@@ -0,0 +1,56 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+# Every pokemon_data field the personality prompt is rendered from
+PROMPT_FIELDS = (
+    'species_id', 'species_name', 'nickname', 'friendship', 'nature', 'level',
+    'habitat', 'is_legendary', 'is_mythical', 'genus', 'description'
+)
+
+def prompt_fingerprint(pokemon_data: Dict) -> Tuple:
+    """
+    Key for a rendered personality prompt
+    Built from the values the prompt depends on rather than the row id, so any
+    change to the Pokemon (a friendship gain, a new nickname) yields a new key
+    and the stale prompt simply ages out of the cache
+    """
+    return tuple(pokemon_data.get(field) for field in PROMPT_FIELDS) + (
+        tuple(pokemon_data.get('types') or ()),
+    )
+
+class PromptCache:
+    """Thread-safe LRU of rendered system prompts"""
+    
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            prompt = self._entries.get(key)
+            if prompt is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return prompt
+    
+    def put(self, key: Hashable, prompt: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = prompt
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
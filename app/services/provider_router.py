@@ -0,0 +1,109 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProviderHealth:
+    """Smoothed latency and error rate of one provider, plus its circuit state"""
+    
+    def __init__(self):
+        self.latency: Optional[float] = None  # EWMA of successful call seconds
+        self.error_rate = 0.0  # EWMA of failures (0 = healthy, 1 = always failing)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None  # Circuit open since, or None when closed
+        self.probe_started: Optional[float] = None  # When the current half-open trial was offered
+    
+    def to_dict(self) -> Dict:
+        return {
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'consecutive_failures': self.consecutive_failures,
+            'circuit_open': self.opened_at is not None
+        }
+
+class ProviderRouter:
+    """
+    Orders AI providers by observed health for every call
+    Healthy providers are ranked by EWMA latency inflated by their error rate. One that
+    has only ever failed is ranked as if it took unmeasured_latency seconds. A provider
+    that fails failure_threshold times in a row has its circuit opened and gets no traffic
+    for cooldown seconds, after which a single trial call decides whether it recovers
+    """
+    
+    ALPHA = 0.2  # Weight of the newest observation in the moving averages
+    ERROR_PENALTY = 4.0  # A 25% error rate ranks like double the latency
+    
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 30.0, unmeasured_latency: float = 30.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.unmeasured_latency = unmeasured_latency
+        self.clock = clock
+        self._health: Dict = {}
+        self._lock = threading.Lock()
+    
+    def _get(self, provider) -> ProviderHealth:
+        return self._health.setdefault(provider, ProviderHealth())
+    
+    def record_success(self, provider, seconds: float):
+        with self._lock:
+            health = self._get(provider)
+            health.latency = seconds if health.latency is None else (
+                self.ALPHA * seconds + (1 - self.ALPHA) * health.latency
+            )
+            health.error_rate *= (1 - self.ALPHA)
+            health.consecutive_failures = 0
+            health.probe_started = None
+            if health.opened_at is not None:
+                logger.info(f"AI provider {provider.value} recovered, closing circuit")
+                health.opened_at = None
+    
+    def record_failure(self, provider):
+        with self._lock:
+            health = self._get(provider)
+            health.error_rate = self.ALPHA + (1 - self.ALPHA) * health.error_rate
+            health.consecutive_failures += 1
+            if health.probe_started is not None or (health.opened_at is None and health.consecutive_failures >= self.failure_threshold):
+                logger.warning(f"AI provider {provider.value} failing, opening circuit for {self.cooldown:.0f}s")
+                health.opened_at = self.clock()
+            health.probe_started = None
+    
+    def order(self, providers: List, preferred=None) -> List:
+        """
+        Providers to try for one call, best first
+        Open circuits are skipped; one whose cooldown has passed is offered last as a trial
+        """
+        with self._lock:
+            now = self.clock()
+            healthy, trials = [], []
+            for provider in providers:
+                health = self._get(provider)
+                if health.opened_at is None:
+                    healthy.append(provider)
+                elif now - health.opened_at >= self.cooldown and (
+                    # An offered trial that never reported back (e.g. the deadline ran out first) expires
+                    health.probe_started is None or now - health.probe_started >= self.cooldown
+                ):
+                    trials.append(provider)
+            
+            def score(provider):
+                health = self._get(provider)
+                if health.latency is not None:
+                    latency = health.latency
+                elif health.error_rate == 0:
+                    latency = 0.0  # Untried providers rank first so every provider gets sampled
+                else:
+                    latency = self.unmeasured_latency  # Failures only; pessimistic, so errors still count
+                return (latency * (1 + self.ERROR_PENALTY * health.error_rate), provider != preferred)
+            
+            healthy.sort(key=score)
+            for provider in trials:
+                self._get(provider).probe_started = now
+            return healthy + trials
+    
+    def snapshot(self) -> Dict:
+        """Current health of every provider seen so far, keyed by provider name"""
+        with self._lock:
+            return {provider.value: health.to_dict() for provider, health in self._health.items()}
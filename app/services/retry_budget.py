@@ -0,0 +1,60 @@
+import time
+import random
+import threading
+from typing import Optional, Tuple
+
+class RetryBudget:
+    """
+    Per-message deadline and retry allowance shared by every AI provider call
+    Backoff delays are jittered and never run past the deadline, so the worst-case
+    time a chat message can hold a worker is the configured deadline
+    """
+    
+    BACKOFF_BASE = 0.5  # Seconds before the first retry (before jitter)
+    BACKOFF_CAP = 4.0
+    MIN_ATTEMPT_TIME = 1.0  # Not worth starting an attempt with less time than this left
+    
+    def __init__(self, deadline: float, retries: int, clock=time.monotonic, rng: Optional[random.Random] = None):
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.expires_at = clock() + deadline
+        self.retries_left = retries
+        self._lock = threading.Lock()  # Hedged calls spend the budget from two threads
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self.expires_at - self.clock())
+    
+    def expired(self) -> bool:
+        """Check if there is no longer time for another attempt"""
+        return self.remaining() < self.MIN_ATTEMPT_TIME
+    
+    def timeout(self, connect_timeout: float, read_timeout: float) -> Tuple[float, float]:
+        """Per-attempt (connect, read) timeouts clamped to the time left"""
+        remaining = self.remaining()
+        return min(connect_timeout, remaining), min(read_timeout, remaining)
+    
+    def next_backoff(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Spend one retry and return how long to wait before it
+        Returns None when the budget is spent or waiting would leave no time to retry
+        """
+        if self.retries_left <= 0:
+            return None
+        
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        delay = self.rng.uniform(0, min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form - keep the jittered delay
+        
+        if delay + self.MIN_ATTEMPT_TIME > self.remaining():
+            return None
+        
+        with self._lock:
+            if self.retries_left <= 0:
+                return None
+            self.retries_left -= 1
+        return delay
@@ -0,0 +1,223 @@
+import os
+import io
+import re
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are optional - originals are served unchanged
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPRITE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'instance', 'sprites'
+)
+
+class SpriteCacheService:
+    """
+    Local sprite cache and thumbnail generator
+    Each source image is fetched from the PokeAPI sprite repository once, resized
+    to the requested size and stored on disk under its content hash
+    """
+    
+    SPRITE_BASE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon"
+    
+    # Variant name -> path template under SPRITE_BASE_URL
+    VARIANTS = {
+        'artwork': 'other/official-artwork/{species_id}.png',
+        'artwork-shiny': 'other/official-artwork/shiny/{species_id}.png',
+        'default': '{species_id}.png',
+        'shiny': 'shiny/{species_id}.png',
+        'home': 'other/home/{species_id}.png'
+    }
+    
+    # Only a handful of sizes so the cache cannot be blown up by arbitrary requests
+    SIZES = (64, 96, 128, 256)
+    
+    # National Pokedex numbers and PokeAPI's alternate-form ids the sprite repository has
+    SPECIES_IDS = range(1, 1026)
+    FORM_IDS = range(10001, 10278)
+    
+    # Seconds a failed fetch is remembered, so misses do not each go upstream again:
+    # an image upstream does not have, and a network error or server failure
+    MISSING_TTL = 3600
+    ERROR_TTL = 60
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get('SPRITE_CACHE_DIR', DEFAULT_SPRITE_DIR)
+        self.index_dir = os.path.join(self.cache_dir, 'index')
+        self.blob_dir = os.path.join(self.cache_dir, 'blobs')
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'PokemonChatApp/1.0'
+        })
+        
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        
+        if Image is None:
+            logger.warning("Pillow not installed - sprites will be cached at original size")
+    
+    def is_valid(self, species_id: int, variant: str, size: int) -> bool:
+        """Check if a species/variant/size combination is served"""
+        return is_known_sprite(species_id, variant) and size in self.SIZES
+    
+    def source_url(self, species_id: int, variant: str) -> str:
+        """Upstream URL for a species sprite variant"""
+        return f"{self.SPRITE_BASE_URL}/{self.VARIANTS[variant].format(species_id=species_id)}"
+    
+    def is_cached(self, species_id: int, variant: str, size: int) -> bool:
+        """Check if a thumbnail is served from disk, or known to be unavailable, without a fetch"""
+        return (self._lookup(f"{species_id}-{variant}-{size}") is not None
+                or self._is_missing(species_id, variant))
+    
+    def get_thumbnail(self, species_id: int, variant: str, size: int) -> Optional[Tuple[str, str]]:
+        """
+        Get a cached thumbnail, creating it on first use
+        Returns (file path, content hash) or None if the sprite cannot be fetched
+        """
+        key = f"{species_id}-{variant}-{size}"
+        cached = self._lookup(key)
+        if cached:
+            return cached
+        if self._is_missing(species_id, variant):
+            return None
+        
+        # One fetch per key even when several requests miss at once
+        with self._lock_for(key):
+            cached = self._lookup(key)
+            if cached:
+                return cached
+            
+            original = self._get_original(species_id, variant)
+            if original is None:
+                return None
+            
+            digest = self._store_blob(self._resize(original, size))
+            self._write_index(key, digest)
+            return self._blob_path(digest), digest
+    
+    def _get_original(self, species_id: int, variant: str) -> Optional[bytes]:
+        """Fetch the full-size source image, downloading it at most once"""
+        key = f"{species_id}-{variant}-original"
+        cached = self._lookup(key)
+        if cached:
+            with open(cached[0], 'rb') as f:
+                return f.read()
+        
+        url = self.source_url(species_id, variant)
+        try:
+            response = self.session.get(url, timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Sprite fetch failed for {url}: {e}")
+            self._mark_missing(species_id, variant, self.ERROR_TTL)
+            return None
+        
+        if response.status_code != 200 or not response.content:
+            logger.warning(f"Sprite not available ({response.status_code}): {url}")
+            self._mark_missing(species_id, variant, self.ERROR_TTL if response.status_code >= 500 else self.MISSING_TTL)
+            return None
+        
+        digest = self._store_blob(response.content)
+        self._write_index(key, digest)
+        return response.content
+    
+    def _is_missing(self, species_id: int, variant: str) -> bool:
+        """Check for an unexpired marker left by a failed fetch"""
+        try:
+            with open(os.path.join(self.index_dir, f"{species_id}-{variant}-missing"), 'r') as f:
+                return float(f.read().strip()) > time.time()
+        except (OSError, ValueError):
+            return False
+    
+    def _mark_missing(self, species_id: int, variant: str, ttl: float):
+        """Remember a failed fetch until ttl seconds from now"""
+        self._write_index(f"{species_id}-{variant}-missing", str(time.time() + ttl))
+    
+    def _resize(self, image_bytes: bytes, size: int) -> bytes:
+        """Downscale to fit within size x size, keeping transparency"""
+        if Image is None:
+            return image_bytes
+        
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                if image.width <= size and image.height <= size:
+                    return image_bytes
+                image = image.convert('RGBA')
+                image.thumbnail((size, size), Image.LANCZOS)
+                output = io.BytesIO()
+                image.save(output, format='PNG', optimize=True)
+                return output.getvalue()
+        except Exception as e:
+            logger.warning(f"Sprite resize failed, serving original: {e}")
+            return image_bytes
+    
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, f"{digest}.png")
+    
+    def _lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """Resolve an index key to (blob path, digest) if both exist"""
+        try:
+            with open(os.path.join(self.index_dir, key), 'r') as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            return None
+        return path, digest
+    
+    def _store_blob(self, data: bytes) -> str:
+        """Write bytes under their content hash (identical images share a file)"""
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            self._atomic_write(path, data)
+        return digest
+    
+    def _write_index(self, key: str, value: str):
+        self._atomic_write(os.path.join(self.index_dir, key), value.encode())
+    
+    def _atomic_write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+# An upstream sprite URL: the variant's path under the repository, with the species id
+SOURCE_URL = re.compile(re.escape(SpriteCacheService.SPRITE_BASE_URL) + r'/(.+/)?(\d+)\.png$')
+
+def is_known_sprite(species_id: int, variant: str) -> bool:
+    """Check if the sprite repository has this variant for this species or form id"""
+    return (variant in SpriteCacheService.VARIANTS
+            and (species_id in SpriteCacheService.SPECIES_IDS or species_id in SpriteCacheService.FORM_IDS))
+
+def thumbnail_path(source_url: str, size: int) -> Optional[str]:
+    """
+    Local thumbnail URL for a stored sprite URL, or None when it is not a sprite the
+    cache serves (a custom image is then used as it is)
+    """
+    match = SOURCE_URL.match(source_url or '')
+    if not match:
+        return None
+    species_id = int(match.group(2))
+    path = f"{match.group(1) or ''}{{species_id}}.png"
+    for variant, template in SpriteCacheService.VARIANTS.items():
+        if template == path and is_known_sprite(species_id, variant):
+            return f"/sprites/{species_id}/{variant}/{size}"
+    return None
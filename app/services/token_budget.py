@@ -0,0 +1,96 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TURN_OVERHEAD = 4  # Tokens the APIs add per message for role and separators
+CHARS_PER_TOKEN = 4  # Estimate used when no tokenizer is available
+
+# Encodings by name, None for one that could not be loaded, so each is tried once per process
+_encodings: Dict[str, object] = {}
+_encodings_lock = threading.Lock()
+
+def load_encoding(name: str):
+    """
+    The tiktoken encoding called name, or None when tiktoken or the encoding is unavailable
+    tiktoken downloads an encoding file it has not cached (TIKTOKEN_CACHE_DIR) without a
+    timeout, so this belongs at startup, never on a request thread
+    """
+    with _encodings_lock:
+        if name not in _encodings:
+            encoding = None
+            if tiktoken:
+                try:
+                    encoding = tiktoken.get_encoding(name)
+                except Exception as e:
+                    logger.warning(f"Tokenizer {name} unavailable, estimating token counts: {e}")
+            _encodings[name] = encoding
+        return _encodings[name]
+
+class TokenCounter:
+    """
+    Count tokens with tiktoken when it and its encoding are available,
+    otherwise estimate from character length
+    """
+    
+    def __init__(self, encoding_name: Optional[str] = 'cl100k_base', cache_size: int = 2048):
+        # Loaded now, when the service is built at startup; None always estimates
+        self.encoding_name = encoding_name
+        self._encoding = load_encoding(encoding_name) if encoding_name else None
+        # History messages are recounted on every send, so recent counts are kept
+        self._cached_count = lru_cache(maxsize=cache_size)(self._count)
+    
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+    
+    def count(self, text: str) -> int:
+        return self._cached_count(text)
+    
+    def _count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def pack_history(
+    history: List[Dict],
+    user_message: str,
+    token_budget: int,
+    counter: TokenCounter
+) -> Tuple[List[Dict], Dict]:
+    """
+    Keep the most recent history messages that fit the input-token budget
+    The current message is always sent and counts against the budget first.
+    Returns the kept messages (oldest first) and the token counts used
+    """
+    message_tokens = counter.count(user_message) + TURN_OVERHEAD
+    remaining = token_budget - message_tokens
+    
+    kept = []
+    history_tokens = 0
+    for msg in reversed(history):
+        tokens = counter.count(msg.get('message', '')) + TURN_OVERHEAD
+        if tokens > remaining:
+            break  # Stop at the first turn that does not fit so the context stays contiguous
+        kept.append(msg)
+        history_tokens += tokens
+        remaining -= tokens
+    kept.reverse()
+    
+    stats = {
+        'budget': token_budget,
+        'message_tokens': message_tokens,
+        'history_tokens': history_tokens,
+        'total_tokens': message_tokens + history_tokens,
+        'turns_kept': len(kept),
+        'turns_dropped': len(history) - len(kept),
+        'exact': counter.exact
+    }
+    return kept, stats
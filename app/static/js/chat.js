@@ -6,7 +6,7 @@ let currentTeam = [];
 // Safe DOM manipulation functions
 function createPokemonTeamElement(teamMember) {
     const pokemon = teamMember.pokemon;
-    const spriteUrl = pokemon.best_sprite || pokemon.sprite_url || 
+    const spriteUrl = pokemon.sprite_thumbnail || pokemon.best_sprite || pokemon.sprite_url || 
                      `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/${pokemon.species_id}.png`;
     
     const teamMemberDiv = document.createElement('div');
@@ -336,6 +336,10 @@ async function selectPokemon(pokemonId) {
         currentPokemon = response.pokemon;
         console.log('Current Pokemon set to:', currentPokemon.nickname);
         
+        // Let the server prepare this Pokemon's prompt and provider connection
+        // while the trainer types, so the first message is as quick as the rest
+        fetch(`/api/pokemon/${pokemonId}/warmup`, { method: 'POST' }).catch(() => {});
+        
         // Update chat header
         updateChatHeader();
         
@@ -401,7 +405,7 @@ function updateChatHeader() {
     
     // Update sprite if element exists
     if (spriteElement) {
-        const spriteUrl = currentPokemon.best_sprite || currentPokemon.sprite_url || 
+        const spriteUrl = currentPokemon.sprite_thumbnail || currentPokemon.best_sprite || currentPokemon.sprite_url || 
                          `https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/${currentPokemon.species_id}.png`;
         spriteElement.innerHTML = `
             <img src="${spriteUrl}" alt="${currentPokemon.species_name}" class="chat-header-sprite" 
@@ -491,44 +495,133 @@ async function sendMessage(event) {
     
     if (!message) return;
     
-    // Clear input and disable form
+    // Clear input; it stays enabled so quick follow-ups can be answered together
     messageInput.value = '';
-    messageInput.disabled = true;
     
     // Add user message to chat immediately
-    addMessageToChat(message, 'user');
+    const userMessage = addMessageToChat(message, 'user');
     
-    // Show typing indicator
+    // Show typing indicator until the first words arrive
     showTypingIndicator();
     
+    let pokemonMessage = null;
+    let provisionalMode = null;
+    
+    // Lets the server answer a resubmitted or retried message without replying twice
+    const idempotencyKey = createIdempotencyKey();
+    
     try {
-        // Send message to API
-        const response = await apiRequest(`/api/pokemon/${currentPokemon.id}/send`, {
-            method: 'POST',
-            body: JSON.stringify({ message })
+        // Stream the response so it appears as it is generated
+        await streamChatResponse(`/api/pokemon/${currentPokemon.id}/send/stream`, message, idempotencyKey, {
+            provisional: (data) => {
+                // Instant reaction until the real reply starts arriving
+                hideTypingIndicator();
+                pokemonMessage = addMessageToChat(data.text, 'pokemon');
+                pokemonMessage.classList.add('provisional');
+                provisionalMode = data.mode;
+            },
+            token: (data) => {
+                if (!pokemonMessage) {
+                    hideTypingIndicator();
+                    pokemonMessage = addMessageToChat('', 'pokemon');
+                }
+                if (provisionalMode) {
+                    pokemonMessage.classList.remove('provisional');
+                    pokemonMessage.textContent = provisionalMode === 'append' ? `${pokemonMessage.textContent} ` : '';
+                    provisionalMode = null;
+                }
+                pokemonMessage.textContent += data.text;
+                scrollToBottom();
+            },
+            done: (data) => {
+                hideTypingIndicator();
+                if (data.coalesced_messages) {
+                    // Every message in a burst gets the same reply; show it once, after the last of them
+                    if (pokemonMessage) {
+                        pokemonMessage.remove();
+                    }
+                    pokemonMessage = document.querySelector(`.message.pokemon[data-message-id="${data.pokemon_response.id}"]`);
+                    if (pokemonMessage) return;
+                }
+                if (!pokemonMessage) {
+                    pokemonMessage = addMessageToChat('', 'pokemon');
+                }
+                pokemonMessage.classList.remove('provisional');
+                pokemonMessage.textContent = data.pokemon_response.message;
+                pokemonMessage.dataset.messageId = data.pokemon_response.id;
+            },
+            error: (data) => {
+                const error = new Error(data.error || 'Streaming failed');
+                error.retryAfter = data.retry_after;
+                throw error;
+            }
         });
         
-        // Hide typing indicator
-        hideTypingIndicator();
-        
-        // Add Pokemon response to chat
-        addMessageToChat(response.pokemon_response.message, 'pokemon');
-        
-        // Re-enable input
-        messageInput.disabled = false;
-        messageInput.focus();
-        
     } catch (error) {
         hideTypingIndicator();
-        messageInput.disabled = false;
-        showNotification('Failed to send message', 'error');
+        showNotification(error.retryAfter ? `${error.message} (${error.retryAfter}s)` : 'Failed to send message', 'error');
         
-        // Remove the user message if sending failed
-        const messages = document.querySelectorAll('.message');
-        const lastMessage = messages[messages.length - 1];
-        if (lastMessage && lastMessage.classList.contains('user')) {
-            lastMessage.remove();
+        // Remove the partial response and the user message if sending failed
+        if (pokemonMessage) {
+            pokemonMessage.remove();
         }
+        userMessage.remove();
+    }
+}
+
+function createIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// POST a chat message and dispatch the Server-Sent Events it streams back
+async function streamChatResponse(url, message, idempotencyKey, handlers) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Accept': 'text/event-stream', 'Idempotency-Key': idempotencyKey },
+        body: JSON.stringify({ message })
+    });
+    
+    if (!response.ok || !response.body) {
+        const data = await response.json().catch(() => ({}));
+        throw new Error(data.error || 'Request failed');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let finished = false;
+    
+    while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let eventName = 'message';
+            let dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            });
+            
+            const handler = handlers[eventName];
+            if (handler && dataLines.length) {
+                handler(JSON.parse(dataLines.join('\n')));
+            }
+            if (eventName === 'done') finished = true;
+        }
+    }
+    
+    if (!finished) {
+        throw new Error('Stream ended before the response completed');
     }
 }
 
@@ -551,6 +644,8 @@ function addMessageToChat(message, sender) {
     
     // Scroll to bottom
     scrollToBottom();
+    
+    return messageElement;
 }
 
 function showTypingIndicator() {
@@ -1,6 +1,6 @@
 // PokeChat Service Worker
-const CACHE_NAME = 'pokechat-v1.2.0';
-const DATA_CACHE_NAME = 'pokechat-data-v1.2.0';
+const CACHE_NAME = 'pokechat-v1.3.5';
+const DATA_CACHE_NAME = 'pokechat-data-v1.3.5';
 
 // Core app files to cache for offline functionality
 const urlsToCache = [
@@ -137,6 +137,12 @@ async function getStoredData(key) {
 self.addEventListener('fetch', event => {
   const url = new URL(event.request.url);
   
+  // Let streamed chat responses go straight to the network - cloning them
+  // for the data cache would buffer the whole stream
+  if (url.pathname.endsWith('/send/stream')) {
+    return;
+  }
+  
   // Handle API requests
   if (url.pathname.startsWith('/api/')) {
     event.respondWith(handleApiRequest(event.request));
@@ -201,6 +207,7 @@ async function handleApiRequest(request) {
           url: request.url,
           method: request.method,
           data: requestData,
+          idempotencyKey: request.headers.get('Idempotency-Key'),
           timestamp: Date.now()
         });
         
@@ -342,9 +349,14 @@ async function processOfflineQueue() {
   
   for (const queuedRequest of offlineQueue) {
     try {
+      // Replaying with the original key keeps a message the server already got from being sent twice
+      const headers = { 'Content-Type': 'application/json' };
+      if (queuedRequest.idempotencyKey) {
+        headers['Idempotency-Key'] = queuedRequest.idempotencyKey;
+      }
       const response = await fetch(queuedRequest.url, {
         method: queuedRequest.method,
-        headers: { 'Content-Type': 'application/json' },
+        headers,
         body: JSON.stringify(queuedRequest.data)
       });
       
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the template reply path of ChatEngine
+
+Times the friendship and level modifiers as one str.replace pass per rule against
+the compiled single-scan rewriters, then the whole template reply with the template
+personalized per request (the old implementation, kept in test_template_rewriter.py)
+against the variants precomputed at startup. Runs offline with a fixed seed.
+
+Examples:
+    python benchmark_chat_templates.py
+    python benchmark_chat_templates.py --iterations 50000 --seed 7
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.personality.chat_engine import ChatEngine
+from test_template_rewriter import LegacyChatEngine, RULE_SETS
+
+MESSAGES = ["Hello there!", "You're amazing!", "What do you like to eat?", "Let's go for a walk"]
+
+PERSONALITIES = [
+    {'species_personality': 'energetic'},
+    {'species_personality': 'gentle'},
+    {'type_influence': 'mysterious'},
+    {'nature_traits': 'shy'}
+]
+
+def chained(rules):
+    """The rules applied the old way: a list of str.replace lambdas built and run per reply"""
+    def apply(text):
+        modifiers = [lambda r, old=old, new=new: r.replace(old, new) for old, new in rules]
+        for modifier in modifiers:
+            text = modifier(text)
+        return text
+    return apply
+
+def personalized_reply(legacy, pokemon, message):
+    """A template reply chosen and personalized on every request, as before the variant tables"""
+    message_type = legacy._analyze_message_type(message.lower())
+    template = legacy._select_response_template(pokemon.get('personality', {}), message_type)
+    return legacy._personalize_response(template, pokemon, message)
+
+def time_per_call(call, inputs, iterations):
+    """Mean microseconds per call, cycling through inputs"""
+    count = len(inputs)
+    started = time.perf_counter()
+    for i in range(iterations):
+        call(inputs[i % count])
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ChatEngine template replies")
+    parser.add_argument('--iterations', type=int, default=20000, help="Calls per measurement (default: 20000)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for template choices")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # No API keys is the point here
+    engine, legacy = ChatEngine(), LegacyChatEngine()
+    templates = [template for by_trait in engine.response_templates.values()
+                 for trait_templates in by_trait.values() for template in trait_templates]
+    iterations = max(1, args.iterations)
+
+    print(f"🏁 Template benchmark: {len(templates)} templates, {iterations} calls per measurement")
+    print(f"   {'modifier':<14}{'chained µs':>12}{'compiled µs':>13}{'speed-up':>10}")
+    for name, rules in RULE_SETS.items():
+        before = time_per_call(chained(rules), templates, iterations)
+        after = time_per_call(engine.rewriters[name].apply, templates, iterations)
+        print(f"   {name:<14}{before:>12.2f}{after:>13.2f}{before / after:>9.1f}x")
+
+    random.seed(args.seed)
+    cases = [
+        ({'nickname': 'Button', 'friendship': friendship, 'level': level, 'personality': personality}, message)
+        for friendship in (30, 100, 200)
+        for level in (10, 40, 70)
+        for personality in PERSONALITIES
+        for message in MESSAGES
+    ]
+    before = time_per_call(lambda case: personalized_reply(legacy, *case), cases, iterations)
+    after = time_per_call(lambda case: engine._generate_template_response(*case), cases, iterations)
+    print(f"✅ Full template reply over {len(cases)} Pokemon/message combinations: "
+          f"{before:.2f}µs personalized per request, {after:.2f}µs from {len(engine.template_variants)} "
+          f"variant tables ({before / after:.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the chat message intent classifier
+
+Compares the keyword-substring checks ChatEngine used to pick a template group
+with IntentClassifier on a labelled corpus of trainer messages, for accuracy
+and classification time.
+
+Examples:
+    python benchmark_intent_classifier.py
+    python benchmark_intent_classifier.py --iterations 200 --show-errors
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.personality.intent_classifier import IntentClassifier
+
+# Trainer messages labelled with the template group that fits them best
+CORPUS = [
+    # Greetings
+    ("Hello there!", 'greeting'),
+    ("hi", 'greeting'),
+    ("Hey buddy", 'greeting'),
+    ("Good morning, sleepyhead", 'greeting'),
+    ("good afternoon!", 'greeting'),
+    ("Good evening Button", 'greeting'),
+    ("Greetings, little one", 'greeting'),
+    ("Howdy partner", 'greeting'),
+    ("Hiya!", 'greeting'),
+    ("Yo, what's up?", 'greeting'),
+    ("How are you today?", 'greeting'),
+    ("how's it going?", 'greeting'),
+    ("Nice to meet you!", 'greeting'),
+    ("Hey, how are you feeling?", 'greeting'),
+    ("Hi again!", 'greeting'),
+    ("Hello, I'm back from school", 'greeting'),
+    ("hey hey", 'greeting'),
+    ("Good morning! Ready for training?", 'greeting'),
+    # Compliments
+    ("You're amazing!", 'compliment'),
+    ("That was awesome", 'compliment'),
+    ("You did great in that battle", 'compliment'),
+    ("You look beautiful today", 'compliment'),
+    ("You're so cool", 'compliment'),
+    ("Nice moves!", 'compliment'),
+    ("Good job out there", 'compliment'),
+    ("Well done, champ", 'compliment'),
+    ("I'm so proud of you", 'compliment'),
+    ("You're the cutest thing ever, so cute", 'compliment'),
+    ("That was incredible", 'compliment'),
+    ("You are so brave", 'compliment'),
+    ("What a wonderful performance", 'compliment'),
+    ("This is great", 'compliment'),
+    ("You're really strong now", 'compliment'),
+    ("Fantastic work today", 'compliment'),
+    ("Such a good listener", 'compliment'),
+    ("You're adorable", 'compliment'),
+    ("I love you, buddy", 'compliment'),
+    # Questions
+    ("What do you want to eat?", 'question'),
+    ("Why are you sad?", 'question'),
+    ("Where should we go next?", 'question'),
+    ("When did you learn that move?", 'question'),
+    ("Who is your best friend?", 'question'),
+    ("Which berry do you like most?", 'question'),
+    ("Do you like the rain?", 'question'),
+    ("Are you hungry?", 'question'),
+    ("Can you show me your new move?", 'question'),
+    ("Would you like to go outside?", 'question'),
+    ("Have you seen my hat?", 'question'),
+    ("Will you battle with me tomorrow?", 'question'),
+    ("Ready for a walk?", 'question'),
+    ("Hi! What should we do today?", 'question'),
+    ("What is this thing?", 'question'),
+    ("How did you do that?", 'question'),
+    ("Is this your favorite spot?", 'question'),
+    ("Want to play fetch?", 'question'),
+    ("This one or that one?", 'question'),
+    ("Think we can win?", 'question'),
+    # Everything else
+    ("Let's go for a walk", 'general'),
+    ("I had a long day at work", 'general'),
+    ("This is my room", 'general'),
+    ("I'm thinking about dinner", 'general'),
+    ("Show me your best attack", 'general'),
+    ("We're going somewhere fun later", 'general'),
+    ("Goodbye for now", 'general'),
+    ("I got a new bike", 'general'),
+    ("Time for bed", 'general'),
+    ("Stay here while I cook", 'general'),
+    ("The weather is chilly", 'general'),
+    ("Whatever happens, I'm with you", 'general'),
+    ("My sister visited today", 'general'),
+    ("I'm heading to the gym", 'general'),
+    ("Shhh, everyone is sleeping", 'general'),
+    ("Follow me", 'general'),
+    ("Nobody knows about this place", 'general'),
+    ("I saw a Pidgey this morning", 'general'),
+    ("Those are my shoes", 'general'),
+    ("Anyhow, let's train", 'general'),
+    ("It's raining outside", 'general'),
+    ("I'll be right back", 'general'),
+    ("Good night, sleep tight", 'general'),
+]
+
+def legacy_message_type(message):
+    """The keyword-substring checks ChatEngine used before IntentClassifier"""
+    greetings = ['hello', 'hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening']
+    compliments = ['amazing', 'awesome', 'great', 'wonderful', 'beautiful', 'cool', 'nice', 'good']
+    questions = ['?', 'what', 'why', 'how', 'when', 'where', 'who', 'which', 'do you', 'are you', 'can you']
+
+    if any(greeting in message for greeting in greetings):
+        return 'greeting'
+    elif any(compliment in message for compliment in compliments):
+        return 'compliment'
+    elif any(question in message for question in questions):
+        return 'question'
+    else:
+        return 'general'
+
+def evaluate(classify, corpus, iterations):
+    """Accuracy, mean microseconds per message and the misclassified messages"""
+    messages = [message.lower() for message, _ in corpus]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            classify(message)
+    per_message = (time.perf_counter() - started) / (iterations * len(messages)) * 1e6
+
+    errors = [(message, label, classify(message.lower())) for message, label in corpus
+              if classify(message.lower()) != label]
+    return 1 - len(errors) / len(corpus), per_message, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat intent classification on a labelled corpus")
+    parser.add_argument('--iterations', type=int, default=100, help="Passes over the corpus for timing (default: 100)")
+    parser.add_argument('--show-errors', action='store_true', help="List the misclassified messages")
+    args = parser.parse_args()
+
+    iterations = max(1, args.iterations)
+    classifiers = [('keyword substrings', legacy_message_type), ('IntentClassifier', IntentClassifier().classify)]
+
+    print(f"🏁 Intent benchmark: {len(CORPUS)} labelled messages, {iterations} timing passes")
+    baseline = None
+    for name, classify in classifiers:
+        accuracy, per_message, errors = evaluate(classify, CORPUS, iterations)
+        baseline = baseline or per_message
+        print(f"   {name:<20} accuracy {accuracy:6.1%}   {per_message:5.2f}µs per message "
+              f"({baseline / per_message:.2f}x)")
+        if args.show_errors:
+            for message, label, predicted in errors:
+                print(f"      ❌ {message!r}: {predicted} (expected {label})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
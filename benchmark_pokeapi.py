@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for PokeAPIService and the PK8 import pipeline
+
+Requests are answered by the replay adapter from recorded fixtures (see
+record_pokeapi_fixtures.py), so results do not depend on the network and can
+be repeated with a fixed seed under adverse conditions.
+
+Examples:
+    python benchmark_pokeapi.py --fixtures fixtures/pokeapi
+    python benchmark_pokeapi.py --fixtures fixtures/pokeapi --latency lognormal:120:0.8 --error-rate 0.05
+    python benchmark_pokeapi.py --fixtures fixtures/pokeapi --pipeline import --timeout-rate 0.02 --stall 2
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.pokeapi_replay import LatencyModel
+from warm_pokeapi_cache import parse_range
+
+def available_species(fixtures_dir):
+    """Species IDs that have a recorded /pokemon fixture"""
+    pokemon_dir = os.path.join(fixtures_dir, 'pokemon')
+    if not os.path.isdir(pokemon_dir):
+        return []
+    return sorted(int(name[:-5]) for name in os.listdir(pokemon_dir)
+                  if name.endswith('.json') and name[:-5].isdigit())
+
+def synthetic_pk8(species_id):
+    """Minimal 344-byte PK8 payload carrying only a species ID"""
+    data = bytearray(344)
+    struct.pack_into('<H', data, 8, species_id)
+    data[0x1E] = 50
+    data[0xCA] = 70
+    return bytes(data)
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_pass(name, species_ids, make_call, concurrency):
+    """Time one call per species, returning latencies in ms and the failure count"""
+    call = make_call()
+
+    def timed(species_id):
+        started = time.perf_counter()
+        ok = call(species_id)
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, species_ids))
+    wall = time.perf_counter() - started
+
+    latencies = [latency for latency, _ in results]
+    failures = sum(1 for _, ok in results if not ok)
+    print(f"  {name:<11} p50 {percentile(latencies, 50):8.1f}ms  p95 {percentile(latencies, 95):8.1f}ms  "
+          f"p99 {percentile(latencies, 99):8.1f}ms  max {max(latencies):8.1f}ms  "
+          f"failed {failures:3d}/{len(results)}  wall {wall:6.2f}s")
+    return latencies, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PokeAPI access against recorded fixtures")
+    parser.add_argument('--fixtures', required=True, help="Replay fixtures directory")
+    parser.add_argument('--range', action='append', type=parse_range,
+                        help="Species ID range to request (default: every recorded species)")
+    parser.add_argument('--pipeline', choices=('service', 'import'), default='service',
+                        help="Benchmark PokeAPIService directly or PK8 imports end to end")
+    parser.add_argument('--latency', default='lognormal:80:0.5',
+                        help="Latency spec: fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Fraction of requests that time out")
+    parser.add_argument('--stall', type=float, default=None,
+                        help="Seconds a timed-out request hangs (default: the client timeout)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel callers (default: 4)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for latency and faults")
+    args = parser.parse_args()
+
+    LatencyModel.from_spec(args.latency)  # Fail fast on a bad spec
+
+    species_ids = sorted({s for id_range in args.range or [] for s in id_range}) or available_species(args.fixtures)
+    if not species_ids:
+        parser.error(f"No fixtures found in {args.fixtures} - run record_pokeapi_fixtures.py first")
+
+    cache_dir = tempfile.mkdtemp(prefix='pokeapi-bench-')
+    os.environ.update({
+        'POKEAPI_REPLAY_DIR': args.fixtures,
+        'POKEAPI_REPLAY_LATENCY': args.latency,
+        'POKEAPI_REPLAY_ERROR_RATE': str(args.error_rate),
+        'POKEAPI_REPLAY_TIMEOUT_RATE': str(args.timeout_rate),
+        'POKEAPI_REPLAY_SEED': str(args.seed),
+        'POKEAPI_CACHE_DIR': cache_dir
+    })
+    if args.stall is not None:
+        os.environ['POKEAPI_REPLAY_STALL'] = str(args.stall)
+
+    # Imported after the environment is set so every service picks up the replay adapter
+    from app.services.pokeapi_service import PokeAPIService
+    from app.parsers.pk8_parser import PK8Parser
+
+    def service_call(revalidate=False):
+        def make():
+            service = PokeAPIService()
+            if revalidate:
+                service.CACHE_TIMEOUT = 0
+            return lambda species_id: service.get_pokemon_data(species_id) is not None
+        return make
+
+    def import_call():
+        parser_instance = PK8Parser()
+        return lambda species_id: bool(parser_instance.parse_bytes(synthetic_pk8(species_id)).get('description'))
+
+    print(f"🏁 {args.pipeline} benchmark: {len(species_ids)} species, latency {args.latency}, "
+          f"errors {args.error_rate:.0%}, timeouts {args.timeout_rate:.0%}, concurrency {args.concurrency}")
+
+    if args.pipeline == 'service':
+        run_pass('cold', species_ids, service_call(), args.concurrency)
+        run_pass('warm', species_ids, service_call(), args.concurrency)
+        run_pass('revalidate', species_ids, service_call(revalidate=True), args.concurrency)
+    else:
+        run_pass('cold', species_ids, import_call, args.concurrency)
+        run_pass('warm', species_ids, import_call, args.concurrency)
+
+    print(f"\n📁 Cache written to {cache_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the chat endpoints, offline and reproducible
+
+Messages go through the real Flask routes, ChatEngine and AIChatService; only
+the provider transport is replaced by the AI replay adapter (synthesized
+replies, or fixtures recorded with AI_REPLAY_MODE=record), so retries,
+fallbacks and shedding behave as they would against live providers. Results
+are repeatable for a given seed; with --concurrency 1 the sequence of injected
+faults is identical run to run. Exits non-zero if any message gets a server
+error (a 5xx, or an error event on the stream).
+
+Examples:
+    python loadtest_chat.py --messages 200 --concurrency 8
+    python loadtest_chat.py --stream --latency lognormal:900:0.5 --chunk-latency fixed:20
+    python loadtest_chat.py --rate-limit-rate 0.1 --timeout-rate 0.02 --stall 1 --error-rate 0.05
+    python loadtest_chat.py --fixtures fixtures/ai --concurrency 1
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.pokeapi_replay import LatencyModel
+from benchmark_pokeapi import percentile
+
+MESSAGES = [
+    "Hi there!", "How are you feeling today?", "Want to go for a walk?",
+    "You did great in that battle!", "What's your favourite berry?", "Are you hungry?"
+]
+
+TEAM = [
+    (25, 'Pikachu', 'Sparky', ['Electric']), (4, 'Charmander', 'Ember', ['Fire']),
+    (7, 'Squirtle', 'Shelly', ['Water']), (1, 'Bulbasaur', 'Sprout', ['Grass', 'Poison']),
+    (133, 'Eevee', 'Button', ['Normal']), (39, 'Jigglypuff', 'Melody', ['Normal', 'Fairy'])
+]
+
+def create_team(app, size):
+    """Insert a small team of Pokemon to chat with, returning their IDs"""
+    from app.models.pokemon import db, Pokemon
+
+    ids = []
+    with app.app_context():
+        for index in range(size):
+            species_id, species_name, nickname, types = TEAM[index % len(TEAM)]
+            pokemon = Pokemon(species_id=species_id, species_name=species_name, nickname=nickname,
+                              level=20 + index, nature='Jolly', friendship=120, original_trainer='Load Test')
+            pokemon.set_types(types)
+            db.session.add(pokemon)
+            db.session.flush()
+            ids.append(pokemon.id)
+        db.session.commit()
+    return ids
+
+def make_sender(app, stream):
+    """One test client per worker thread, each with its own session and CSRF token"""
+    client = app.test_client()
+    page = client.get('/chat').get_data(as_text=True)
+    token = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+    suffix = '/stream' if stream else ''
+
+    def send(pokemon_id, message):
+        started = time.perf_counter()
+        response = client.post(f'/api/pokemon/{pokemon_id}/send{suffix}', json={'message': message},
+                               headers={'X-CSRFToken': token})
+        body = response.get_data(as_text=True)  # Drains the event stream
+        status = response.status_code
+        if stream and 'event: error' in body:
+            status = 'stream-error'
+        return (time.perf_counter() - started) * 1000, status, body
+
+    return send
+
+def server_error(status):
+    """Whether a response status counts as the server failing the message"""
+    return status == 'stream-error' or (isinstance(status, int) and status >= 500)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat endpoints against replayed AI providers")
+    parser.add_argument('--messages', type=int, default=100, help="Messages to send (default: 100)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallel senders (default: 4)")
+    parser.add_argument('--pokemon', type=int, default=6, help="Pokemon the messages are spread over (default: 6)")
+    parser.add_argument('--stream', action='store_true', help="Use the Server-Sent Events endpoint")
+    parser.add_argument('--fixtures', default=None, help="Replay recorded fixtures instead of synthesized replies")
+    parser.add_argument('--provider', choices=('openai', 'claude', 'both'), default='both',
+                        help="Providers given a (fake) API key (default: both)")
+    parser.add_argument('--latency', default='lognormal:700:0.4',
+                        help="Provider time to headers: fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--chunk-latency', default='fixed:30', help="Time between streamed chunks")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of provider calls answered with 500")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of provider calls answered with 429")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Fraction of provider calls that time out")
+    parser.add_argument('--stall', type=float, default=None,
+                        help="Seconds a timed-out call hangs (default: the client read timeout)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for latency and faults")
+    args = parser.parse_args()
+
+    LatencyModel.from_spec(args.latency)  # Fail fast on a bad spec
+    LatencyModel.from_spec(args.chunk_latency)
+
+    db_dir = tempfile.mkdtemp(prefix='chat-loadtest-')
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(db_dir, 'loadtest.db')}",
+        'AI_REPLAY_MODE': 'replay' if args.fixtures else 'stub',
+        'AI_REPLAY_LATENCY': args.latency,
+        'AI_REPLAY_CHUNK_LATENCY': args.chunk_latency,
+        'AI_REPLAY_ERROR_RATE': str(args.error_rate),
+        'AI_REPLAY_RATE_LIMIT_RATE': str(args.rate_limit_rate),
+        'AI_REPLAY_TIMEOUT_RATE': str(args.timeout_rate),
+        'AI_REPLAY_SEED': str(args.seed)
+    })
+    if args.fixtures:
+        os.environ['AI_REPLAY_DIR'] = args.fixtures
+    if args.stall is not None:
+        os.environ['AI_REPLAY_STALL'] = str(args.stall)
+    for provider, key in (('openai', 'OPENAI_API_KEY'), ('claude', 'CLAUDE_API_KEY')):
+        if args.provider in (provider, 'both'):
+            os.environ[key] = 'replay'
+        else:
+            os.environ.pop(key, None)
+
+    # Imported after the environment is set so the AI service picks up the replay adapter
+    from app import create_app
+    from app.extensions import limiter
+    from app.services import ai_chat_service as ai
+
+    app = create_app()
+    limiter.enabled = False  # Measure the chat path, not the per-IP rate limits
+    pokemon_ids = create_team(app, args.pokemon)
+    work = [(pokemon_ids[i % len(pokemon_ids)], MESSAGES[i % len(MESSAGES)]) for i in range(args.messages)]
+
+    senders = threading.local()
+
+    def send(item):
+        if not hasattr(senders, 'send'):
+            senders.send = make_sender(app, args.stream)
+        return senders.send(*item)
+
+    before = {result: ai.AI_COMPLETIONS.value(purpose='reply', result=result) for result in ('ai', 'fallback', 'shed')}
+
+    print(f"🏁 {args.messages} {'streamed ' if args.stream else ''}messages over {len(pokemon_ids)} Pokemon, "
+          f"concurrency {args.concurrency}, latency {args.latency}, 429s {args.rate_limit_rate:.0%}, "
+          f"errors {args.error_rate:.0%}, timeouts {args.timeout_rate:.0%}")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, work))
+    wall = time.perf_counter() - started
+
+    latencies = [latency for latency, _, _ in results]
+    statuses = Counter(status for _, status, _ in results)
+    failures = [(status, body) for _, status, body in results if server_error(status)]
+    print(f"  latency    p50 {percentile(latencies, 50):8.1f}ms  p95 {percentile(latencies, 95):8.1f}ms  "
+          f"p99 {percentile(latencies, 99):8.1f}ms  max {max(latencies):8.1f}ms  "
+          f"throughput {len(results) / wall:6.1f} msg/s")
+    print(f"  responses  {dict(statuses)}")
+    replies = {result: ai.AI_COMPLETIONS.value(purpose='reply', result=result) - before[result] for result in before}
+    print(f"  replies    {replies}")
+    for provider in ('openai', 'claude'):
+        print(f"  {provider:<10} 429s {ai.AI_RATE_LIMITED.value(provider=provider):.0f}  "
+              f"retries {ai.AI_RETRIES.value(provider=provider):.0f}  "
+              f"timeouts {ai.AI_TIMEOUTS.value(provider=provider):.0f}")
+
+    print(f"\n📁 Database written to {db_dir}")
+    if failures:
+        status, body = failures[0]
+        print(f"❌ {len(failures)} of {len(results)} messages failed with a server error; "
+              f"first ({status}): {body.strip()[:300]}")
+        return 1
+    return 0 if statuses.get(200, 0) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Record PokeAPI responses as replay fixtures for offline benchmarks
+
+Bodies are stored exactly as PokeAPI returns them, so replayed requests go
+through the same streaming extraction as live ones.
+
+Examples:
+    python record_pokeapi_fixtures.py --out fixtures/pokeapi
+    python record_pokeapi_fixtures.py --out fixtures/pokeapi --generation 8 --from-db
+"""
+
+import os
+import sys
+import argparse
+import requests
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.pokeapi_service import PokeAPIService
+from app.parsers.pk8_parser import PK8Parser
+from warm_pokeapi_cache import GENERATION_RANGES, RateLimitedAdapter, parse_range, collect_species
+
+ENDPOINTS = ('pokemon', 'pokemon-species')
+
+def record_species(session, out_dir, species_id, overwrite=False):
+    """Record both endpoints for one species, returning the number of files written"""
+    written = 0
+    for endpoint in ENDPOINTS:
+        path = os.path.join(out_dir, endpoint, f"{species_id}.json")
+        if os.path.exists(path) and not overwrite:
+            continue
+
+        response = session.get(f"{PokeAPIService.BASE_URL}/{endpoint}/{species_id}", timeout=30)
+        if response.status_code != 200:
+            print(f"  ⚠️  {endpoint}/{species_id}: HTTP {response.status_code}")
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, path)
+        written += 1
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Record PokeAPI responses for the replay adapter")
+    parser.add_argument('--out', required=True,
+                        help="Fixtures directory (use it as POKEAPI_REPLAY_DIR)")
+    parser.add_argument('--range', action='append', type=parse_range,
+                        help="Species ID range such as 1-151 (repeatable)")
+    parser.add_argument('--generation', action='append', type=int, choices=sorted(GENERATION_RANGES),
+                        help="Record every species of a generation (repeatable)")
+    parser.add_argument('--from-db', action='store_true',
+                        help="Record every species present in the Pokedex database")
+    parser.add_argument('--rate', type=float, default=5.0,
+                        help="Maximum requests per second to PokeAPI (default: 5)")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Re-record fixtures that already exist")
+    args = parser.parse_args()
+
+    # Default to every species the importer knows by name
+    species_ids = collect_species(args) or sorted(PK8Parser.SPECIES_NAMES)
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'PokemonChatApp/1.0'})
+    session.mount('https://', RateLimitedAdapter(args.rate))
+
+    print(f"📼 Recording {len(species_ids)} species into {args.out}")
+    written = 0
+    for species_id in species_ids:
+        try:
+            written += record_species(session, args.out, species_id, args.overwrite)
+        except requests.exceptions.RequestException as e:
+            print(f"  ❌ #{species_id}: {e}")
+
+    print(f"✅ Wrote {written} fixture files")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script to verify pooled keep-alive HTTP clients for the AI providers
+"""
+
+import sys
+import os
+import io
+import json
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIChatService, AIProvider
+
+class CompletionStubAdapter(BaseAdapter):
+    """Answers chat completions and records the timeout of each call"""
+    
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+    
+    def send(self, request, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        body = {'choices': [{'message': {'content': ' *wags tail*'}}]}
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(body).encode())
+        return response
+    
+    def close(self):
+        pass
+
+def test_pool_configuration_from_env():
+    """Test that pool size and split timeouts come from the environment"""
+    print("Testing pool configuration...")
+    os.environ.update({'AI_POOL_SIZE': '4', 'AI_CONNECT_TIMEOUT': '2.5', 'AI_READ_TIMEOUT': '45'})
+    try:
+        service = AIChatService()
+    finally:
+        for key in ('AI_POOL_SIZE', 'AI_CONNECT_TIMEOUT', 'AI_READ_TIMEOUT'):
+            del os.environ[key]
+    
+    adapters = [service.sessions[p].get_adapter('https://api.example.com') for p in AIProvider]
+    if ((service.connect_timeout, service.read_timeout) == (2.5, 45.0) and all(isinstance(a, HTTPAdapter) for a in adapters)
+            and all(a._pool_maxsize == 4 for a in adapters)
+            and service.sessions[AIProvider.OPENAI] is not service.sessions[AIProvider.CLAUDE]):
+        print("✅ One pool per provider, 4 connections each, (2.5s connect, 45s read) timeouts")
+        return True
+    print(f"❌ Unexpected configuration: timeouts {service.connect_timeout}/{service.read_timeout}")
+    return False
+
+def test_calls_reuse_provider_session():
+    """Test that consecutive messages go through the same pooled session"""
+    print("Testing session reuse...")
+    service = AIChatService()
+    service.openai_api_key = 'test-key'
+    adapter = CompletionStubAdapter()
+    service.sessions[AIProvider.OPENAI].mount('https://', adapter)
+    
+    replies = [service._call_openai_api('system', f'Trainer: hello {i}', service.new_budget()) for i in range(3)]
+    
+    if replies == ['*wags tail*'] * 3 and all(t[0] == service.connect_timeout for t in adapter.timeouts):
+        print(f"✅ 3 calls through one session with {service.connect_timeout}s connect timeout")
+        return True
+    print(f"❌ Replies {replies}, timeouts {adapter.timeouts}")
+    return False
+
+def main():
+    """Run all connection pool tests"""
+    print("🔌 Running AI Connection Pool Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_pool_configuration_from_env,
+        test_calls_reuse_provider_session
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Connection Pool Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script to verify hedged AI requests across providers
+"""
+
+import sys
+import os
+import json
+import time
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIChatService, AIProvider
+
+POKEMON = {
+    'species_id': 25, 'species_name': 'Pikachu', 'nickname': 'Sparky', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Electric']
+}
+
+OPENAI_EVENTS = [
+    {'choices': [{'delta': {'content': '*yawns slowly*'}}]},
+    {'choices': [{'delta': {'content': ' Hi...'}}]},
+    {'choices': [{'delta': {'content': ' trainer.'}}]}
+]
+
+CLAUDE_EVENTS = [
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': '*zips over*'}},
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' Hi!'}},
+    {'type': 'message_stop'}
+]
+
+class TimedEventStream:
+    """Raw body releasing one SSE event per read and recording how far it got"""
+    
+    def __init__(self, events, delay):
+        self.chunks = [f"data: {json.dumps(event)}\n\n".encode() for event in events]
+        self.delay = delay
+        self.reads = 0
+        self.closed_at = None
+    
+    def read(self, amt=None, decode_content=None):
+        if not self.chunks or self.closed_at:
+            return b''
+        time.sleep(self.delay)
+        self.reads += 1
+        return self.chunks.pop(0)
+    
+    def close(self):
+        self.closed_at = self.closed_at or time.monotonic()
+
+class ProviderStubAdapter(BaseAdapter):
+    """Streams a provider reply at a fixed per-event pace"""
+    
+    def __init__(self, events, delay):
+        super().__init__()
+        self.events = events
+        self.delay = delay
+        self.streams = []
+    
+    def send(self, request, **kwargs):
+        stream = TimedEventStream(self.events, self.delay)
+        self.streams.append(stream)
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'
+        response.raw = stream
+        return response
+    
+    def close(self):
+        pass
+
+def make_service(openai_delay, claude_delay, hedge_delay='0.3'):
+    os.environ.update({'AI_HEDGING': 'true', 'AI_HEDGE_DELAY': hedge_delay})
+    try:
+        service = AIChatService()
+    finally:
+        del os.environ['AI_HEDGING']
+        del os.environ['AI_HEDGE_DELAY']
+    
+    service.openai_api_key = 'test-key'
+    service.claude_api_key = 'test-key'
+    service.available_providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    service.preferred_provider = 'openai'
+    adapters = {
+        AIProvider.OPENAI: ProviderStubAdapter(OPENAI_EVENTS, openai_delay),
+        AIProvider.CLAUDE: ProviderStubAdapter(CLAUDE_EVENTS, claude_delay)
+    }
+    for provider, adapter in adapters.items():
+        service.sessions[provider].mount('https://', adapter)
+    return service, adapters
+
+def test_slow_primary_is_hedged_and_cancelled():
+    """Test that a slow preferred provider is raced by the secondary and then dropped"""
+    print("Testing hedge against slow primary...")
+    service, adapters = make_service(openai_delay=0.5, claude_delay=0.02)
+    
+    started = time.monotonic()
+    response = service.generate_pokemon_response("Hi!", POKEMON, [])
+    elapsed = time.monotonic() - started
+    
+    time.sleep(0.8)  # Let the losing leg notice the cancellation
+    loser = adapters[AIProvider.OPENAI].streams[0]
+    
+    if (response == '*zips over* Hi!' and 0.3 <= elapsed < 0.6
+            and loser.closed_at is not None and loser.reads < len(OPENAI_EVENTS)):
+        print(f"✅ Secondary answered after {elapsed * 1000:.0f}ms, primary dropped after {loser.reads} event(s)")
+        return True
+    print(f"❌ {response!r} after {elapsed:.2f}s, primary reads {loser.reads}, closed {loser.closed_at}")
+    return False
+
+def test_fast_primary_is_not_hedged():
+    """Test that no extra request is made when the preferred provider answers in time"""
+    print("Testing fast primary...")
+    service, adapters = make_service(openai_delay=0.01, claude_delay=0.01)
+    
+    response = service.generate_pokemon_response("Hi!", POKEMON, [])
+    
+    if response == '*yawns slowly* Hi... trainer.' and not adapters[AIProvider.CLAUDE].streams:
+        print("✅ Primary answered alone, secondary never called")
+        return True
+    print(f"❌ {response!r}, secondary calls {len(adapters[AIProvider.CLAUDE].streams)}")
+    return False
+
+def test_hedge_delay_follows_observed_p95():
+    """Test that the hedge delay switches from the default to the provider's p95"""
+    print("Testing p95 hedge delay...")
+    service, _ = make_service(openai_delay=0.01, claude_delay=0.01, hedge_delay='2')
+    
+    default_delay = service.hedge_delay_for(AIProvider.OPENAI)
+    for i in range(100):
+        service.latency.record('openai', (i + 1) / 100)
+        service.first_chunk_latency.record('openai', (i + 1) / 1000)
+    observed_delay = service.hedge_delay_for(AIProvider.OPENAI)
+    streaming_delay = service.hedge_delay_for(AIProvider.OPENAI, streaming=True)
+    
+    if default_delay == 2.0 and abs(observed_delay - 0.95) < 0.011 and abs(streaming_delay - 0.095) < 0.0011:
+        print(f"✅ Default {default_delay}s until samples exist, then p95 = {observed_delay:.2f}s "
+              f"({streaming_delay:.3f}s to first chunk when streaming)")
+        return True
+    print(f"❌ Delays {default_delay} / {observed_delay} / {streaming_delay}")
+    return False
+
+def stream_timed(service):
+    """Stream a reply, returning its text, when the first chunk arrived and when it finished"""
+    started = time.monotonic()
+    first_chunk_at = None
+    chunks = []
+    for chunk in service.stream_pokemon_response("Hi!", POKEMON, []):
+        if first_chunk_at is None:
+            first_chunk_at = time.monotonic() - started
+        chunks.append(chunk)
+    return ''.join(chunks), first_chunk_at, time.monotonic() - started
+
+def test_slow_stream_start_is_hedged():
+    """Test that a streamed reply races the secondary when the primary is slow to send text"""
+    print("Testing streaming hedge against slow primary...")
+    service, adapters = make_service(openai_delay=0.5, claude_delay=0.02)
+    
+    text, first_chunk_at, _ = stream_timed(service)
+    
+    time.sleep(0.8)  # Let the losing leg notice the cancellation
+    loser = adapters[AIProvider.OPENAI].streams[0]
+    
+    if (text == '*zips over* Hi!' and 0.3 <= first_chunk_at < 0.5
+            and loser.closed_at is not None and loser.reads < len(OPENAI_EVENTS)):
+        print(f"✅ Secondary streamed first text after {first_chunk_at * 1000:.0f}ms, primary dropped after {loser.reads} event(s)")
+        return True
+    print(f"❌ {text!r}, first chunk after {first_chunk_at}s, primary reads {loser.reads}, closed {loser.closed_at}")
+    return False
+
+def test_stream_hedge_uses_time_to_first_chunk():
+    """Test that a primary already streaming text is not hedged, however long the whole reply takes"""
+    print("Testing streaming hedge on time to first chunk...")
+    service, adapters = make_service(openai_delay=0.2, claude_delay=0.01)
+    
+    text, first_chunk_at, elapsed = stream_timed(service)
+    
+    if text == '*yawns slowly* Hi... trainer.' and not adapters[AIProvider.CLAUDE].streams and elapsed > 0.3:
+        print(f"✅ Primary started after {first_chunk_at * 1000:.0f}ms and streamed for {elapsed * 1000:.0f}ms alone")
+        return True
+    print(f"❌ {text!r} after {elapsed:.2f}s, secondary calls {len(adapters[AIProvider.CLAUDE].streams)}")
+    return False
+
+def main():
+    """Run all hedging tests"""
+    print("🏁 Running AI Hedging Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_slow_primary_is_hedged_and_cancelled,
+        test_fast_primary_is_not_hedged,
+        test_hedge_delay_follows_observed_p95,
+        test_slow_stream_start_is_hedged,
+        test_stream_hedge_uses_time_to_first_chunk
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Hedging Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script to verify AI provider metrics and the Prometheus endpoint
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services import ai_chat_service
+from app.services.ai_chat_service import AIChatService, AIProvider
+from app.services.metrics import MetricsRegistry
+
+POKEMON = {
+    'species_id': 25, 'species_name': 'Pikachu', 'nickname': 'Sparky', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Electric']
+}
+
+class ScriptedAdapter(BaseAdapter):
+    """Plays back a list of outcomes: an HTTP status, 'timeout', or a JSON body for a 200"""
+    
+    def __init__(self, outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+    
+    def send(self, request, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if outcome == 'timeout':
+            raise requests.exceptions.ReadTimeout("stub read timeout", request=request)
+        
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        if isinstance(outcome, int):
+            response.status_code = outcome
+            response.headers['Retry-After'] = '0'
+            response.raw = io.BytesIO(b'{}')
+        else:
+            response.status_code = 200
+            response.raw = io.BytesIO(json.dumps(outcome).encode())
+        return response
+    
+    def close(self):
+        pass
+
+def make_service(outcomes):
+    service = AIChatService()
+    service.openai_api_key = 'test-key'
+    service.available_providers = [AIProvider.OPENAI]
+    service.retry_budget = 3
+    service.sessions[AIProvider.OPENAI].mount('https://', ScriptedAdapter(outcomes))
+    return service
+
+def test_exposition_format():
+    """Test counters and histograms render in the Prometheus text format"""
+    print("Testing exposition format...")
+    metrics = MetricsRegistry()
+    counter = metrics.counter('demo_total', 'Demo counter', ('provider',))
+    histogram = metrics.histogram('demo_seconds', 'Demo histogram', ('provider',), buckets=(0.5, 1.0))
+    counter.inc(provider='open"ai')
+    histogram.observe(0.2, provider='claude')
+    histogram.observe(0.7, provider='claude')
+    text = metrics.render()
+    
+    expected = [
+        '# TYPE demo_total counter',
+        'demo_total{provider="open\\"ai"} 1',
+        'demo_seconds_bucket{provider="claude",le="0.5"} 1',
+        'demo_seconds_bucket{provider="claude",le="1"} 2',
+        'demo_seconds_bucket{provider="claude",le="+Inf"} 2',
+        'demo_seconds_count{provider="claude"} 2'
+    ]
+    missing = [line for line in expected if line not in text.splitlines()]
+    if not missing:
+        print("✅ Escaped labels and cumulative buckets rendered")
+        return True
+    print(f"❌ Missing lines {missing} in:\n{text}")
+    return False
+
+def test_service_counts_retries_tokens_and_fallbacks():
+    """Test that 429s, retries, timeouts, token usage and fallbacks are counted"""
+    print("Testing service instrumentation...")
+    m = ai_chat_service
+    before = {
+        'rate_limited': m.AI_RATE_LIMITED.value(provider='openai'),
+        'retries': m.AI_RETRIES.value(provider='openai'),
+        'timeouts': m.AI_TIMEOUTS.value(provider='openai'),
+        'prompt': m.AI_TOKENS.value(provider='openai', kind='prompt'),
+        'completion': m.AI_TOKENS.value(provider='openai', kind='completion'),
+        'ai': m.AI_COMPLETIONS.value(purpose='reply', result='ai'),
+        'fallback': m.AI_COMPLETIONS.value(purpose='reply', result='fallback'),
+        'ttfb': m.AI_TTFB.count(provider='openai', mode='complete')
+    }
+    
+    answer = {'choices': [{'message': {'content': '*zaps happily*'}}], 'usage': {'prompt_tokens': 812, 'completion_tokens': 9}}
+    make_service([429, 'timeout', answer]).generate_pokemon_response('Hi!', POKEMON, [])
+    make_service([500]).generate_pokemon_response('Hi!', POKEMON, [])
+    
+    deltas = {
+        'rate_limited': m.AI_RATE_LIMITED.value(provider='openai') - before['rate_limited'],
+        'retries': m.AI_RETRIES.value(provider='openai') - before['retries'],
+        'timeouts': m.AI_TIMEOUTS.value(provider='openai') - before['timeouts'],
+        'prompt': m.AI_TOKENS.value(provider='openai', kind='prompt') - before['prompt'],
+        'completion': m.AI_TOKENS.value(provider='openai', kind='completion') - before['completion'],
+        'ai': m.AI_COMPLETIONS.value(purpose='reply', result='ai') - before['ai'],
+        'fallback': m.AI_COMPLETIONS.value(purpose='reply', result='fallback') - before['fallback'],
+        'ttfb': m.AI_TTFB.count(provider='openai', mode='complete') - before['ttfb']
+    }
+    expected = {'rate_limited': 1, 'retries': 2, 'timeouts': 1, 'prompt': 812, 'completion': 9, 'ai': 1, 'fallback': 1, 'ttfb': 1}
+    if deltas == expected:
+        print(f"✅ Counted {deltas}")
+        return True
+    print(f"❌ Counted {deltas}, expected {expected}")
+    return False
+
+def test_metrics_endpoint():
+    """Test that /metrics serves local scrapers, and remote ones only with METRICS_TOKEN"""
+    print("Testing /metrics endpoint...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'metrics.db')}"
+        try:
+            app = create_app()
+        finally:
+            del os.environ['DATABASE_URL']
+        
+        with app.test_client() as client:
+            remote = {'REMOTE_ADDR': '203.0.113.5'}
+            open_response = client.get('/metrics')
+            remote_denied = client.get('/metrics', environ_base=remote)
+            os.environ['METRICS_TOKEN'] = 'scrape-secret'
+            try:
+                denied = client.get('/metrics')
+                allowed = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'},
+                                     environ_base=remote)
+            finally:
+                del os.environ['METRICS_TOKEN']
+        
+        text = open_response.get_data(as_text=True)
+        if (open_response.status_code == 200 and open_response.mimetype == 'text/plain'
+                and '# TYPE ai_requests_total counter' in text and 'ai_bulkhead_capacity ' in text
+                and remote_denied.status_code == 403 and denied.status_code == 401 and allowed.status_code == 200):
+            print(f"✅ {len(text.splitlines())} metric lines served locally, remote scrapers need the token")
+            return True
+        print(f"❌ Status {open_response.status_code}/{remote_denied.status_code}/{denied.status_code}/{allowed.status_code}")
+        return False
+
+def main():
+    """Run all AI metrics tests"""
+    print("📈 Running AI Metrics Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_exposition_format,
+        test_service_counts_retries_tokens_and_fallbacks,
+        test_metrics_endpoint
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"AI Metrics Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
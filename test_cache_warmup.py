@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the PokeAPI cache warm-up command
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import threading
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.pokeapi_service import PokeAPIService
+from warm_pokeapi_cache import RateLimitedAdapter, warm_cache, load_state
+
+class SlowPokeAPIStub(BaseAdapter):
+    """Minimal PokeAPI stand-in that tracks how many requests run at once"""
+    
+    def __init__(self, delay=0.02):
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.urls = []
+        self._lock = threading.Lock()
+    
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.urls.append(request.url)
+        time.sleep(self.delay)
+        
+        species_id = int(request.url.rstrip('/').rsplit('/', 1)[1])
+        body = {'id': species_id, 'name': f'species-{species_id}', 'height': 1, 'weight': 1,
+                'sprites': {}, 'stats': [], 'abilities': [], 'types': []}
+        
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(body).encode())
+        with self._lock:
+            self.in_flight -= 1
+        return response
+    
+    def close(self):
+        pass
+
+def test_concurrency_is_bounded():
+    """Test that no more than the configured number of fetches run at once"""
+    print("Testing bounded concurrency...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = PokeAPIService(cache_dir=cache_dir)
+        stub = SlowPokeAPIStub()
+        service.session.mount('https://', stub)
+        
+        summary, failed = warm_cache(service, list(range(1, 21)), concurrency=3)
+        
+        if stub.max_in_flight <= 3 and summary['fetched'] == 40 and not failed:
+            print(f"✅ 40 endpoints fetched with at most {stub.max_in_flight} in flight")
+            return True
+        print(f"❌ max in flight {stub.max_in_flight}, summary {summary}, failed {failed}")
+        return False
+
+def test_resume_skips_completed_species():
+    """Test that a resumed run only fetches species that were not finished"""
+    print("Testing resume support...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        targets = list(range(1, 11))
+        state_file = os.path.join(cache_dir, 'warmup_state.json')
+        with open(state_file, 'w') as f:
+            json.dump({'targets': targets, 'completed': list(range(1, 8))}, f)
+        
+        service = PokeAPIService(cache_dir=cache_dir)
+        stub = SlowPokeAPIStub(delay=0)
+        service.session.mount('https://', stub)
+        
+        completed = load_state(state_file, targets)
+        warm_cache(service, targets, concurrency=2, state_file=state_file,
+                   completed=completed, targets=targets)
+        
+        fetched_species = sorted({int(url.rsplit('/', 1)[1]) for url in stub.urls})
+        if fetched_species == [8, 9, 10] and load_state(state_file, targets) == set(targets):
+            print("✅ Only species 8-10 fetched, state file records all targets")
+            return True
+        print(f"❌ Fetched {fetched_species}")
+        return False
+
+def test_rate_limit_spaces_requests():
+    """Test that the politeness limiter spaces requests across workers"""
+    print("Testing politeness rate limit...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = PokeAPIService(cache_dir=cache_dir)
+        service.session.mount('https://', RateLimitedAdapter(100, SlowPokeAPIStub(delay=0)))
+        
+        started = time.monotonic()
+        warm_cache(service, list(range(1, 11)), concurrency=4)
+        elapsed = time.monotonic() - started
+        
+        # 20 requests at 100 req/s cannot finish faster than ~0.19s
+        if elapsed >= 0.18:
+            print(f"✅ 20 requests took {elapsed:.2f}s at 100 req/s")
+            return True
+        print(f"❌ Requests were not rate limited ({elapsed:.2f}s)")
+        return False
+
+def main():
+    """Run all warm-up tests"""
+    print("🔥 Running Cache Warm-up Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_concurrency_is_bounded,
+        test_resume_skips_completed_species,
+        test_rate_limit_spaces_requests
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Warm-up Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Test script to verify token streaming of chat responses over Server-Sent Events
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import tempfile
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.pokemon import db, Pokemon, ChatMessage
+from app.services.ai_chat_service import AIChatService, AIProvider
+
+OPENAI_EVENTS = [
+    {'choices': [{'delta': {'role': 'assistant'}}]},
+    {'choices': [{'delta': {'content': ' *perks up*'}}]},
+    {'choices': [{'delta': {'content': ' Hello,'}}]},
+    {'choices': [{'delta': {'content': ' trainer!'}}]},
+    {'choices': [{'delta': {}, 'finish_reason': 'stop'}]}
+]
+
+CLAUDE_EVENTS = [
+    {'type': 'message_start', 'message': {'id': 'msg_1'}},
+    {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': '*tilts head*'}},
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' Who are you?'}},
+    {'type': 'content_block_stop', 'index': 0},
+    {'type': 'message_stop'}
+]
+
+class SlowEventStream:
+    """Raw body that releases one SSE event per read, like a provider generating tokens"""
+    
+    def __init__(self, events, delay=0.0, done_marker=False):
+        self.chunks = [f"data: {json.dumps(event)}\n\n".encode() for event in events]
+        if done_marker:
+            self.chunks.append(b"data: [DONE]\n\n")
+        self.delay = delay
+    
+    def read(self, amt=None, decode_content=None):
+        if not self.chunks:
+            return b''
+        time.sleep(self.delay)
+        return self.chunks.pop(0)
+    
+    def close(self):
+        pass
+
+class StreamingStubAdapter(BaseAdapter):
+    """Stands in for a provider endpoint and records the request payloads"""
+    
+    def __init__(self, events, delay=0.0, done_marker=False):
+        super().__init__()
+        self.events = events
+        self.delay = delay
+        self.done_marker = done_marker
+        self.payloads = []
+    
+    def send(self, request, **kwargs):
+        self.payloads.append(json.loads(request.body))
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/event-stream'
+        response.raw = SlowEventStream(self.events, self.delay, self.done_marker)
+        return response
+    
+    def close(self):
+        pass
+
+def make_service(provider, adapter=None):
+    service = AIChatService()
+    service.openai_api_key = 'test-key' if provider == AIProvider.OPENAI else None
+    service.claude_api_key = 'test-key' if provider == AIProvider.CLAUDE else None
+    service.available_providers = [provider]
+    service.preferred_provider = provider.value
+    if adapter:
+        service.sessions[provider].mount('https://', adapter)
+    return service
+
+def test_provider_stream_parsing():
+    """Test that OpenAI and Claude stream deltas are parsed into text chunks"""
+    print("Testing provider stream parsing...")
+    openai_adapter = StreamingStubAdapter(OPENAI_EVENTS, done_marker=True)
+    openai_chunks = list(make_service(AIProvider.OPENAI, openai_adapter)._stream_ai_api(AIProvider.OPENAI, 'system', 'Trainer: hi'))
+    openai_payload = openai_adapter.payloads[0]
+    
+    claude_adapter = StreamingStubAdapter(CLAUDE_EVENTS)
+    claude_chunks = list(make_service(AIProvider.CLAUDE, claude_adapter)._stream_ai_api(AIProvider.CLAUDE, 'system', 'Trainer: hi'))
+    
+    if (openai_chunks == ['*perks up*', ' Hello,', ' trainer!'] and openai_payload.get('stream') is True
+            and claude_chunks == ['*tilts head*', ' Who are you?']):
+        print(f"✅ OpenAI -> {''.join(openai_chunks)!r}, Claude -> {''.join(claude_chunks)!r}")
+        return True
+    print(f"❌ Unexpected chunks: {openai_chunks} / {claude_chunks}")
+    return False
+
+def test_stream_endpoint_first_token_and_persistence():
+    """Test that tokens reach the client before generation finishes and the reply is saved"""
+    print("Testing streaming endpoint...")
+    from app.api import chat_routes
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'stream.db')}"
+        try:
+            app = create_app()
+        finally:
+            del os.environ['DATABASE_URL']
+        
+        with app.app_context():
+            pokemon = Pokemon(species_id=25, species_name='Pikachu', nickname='Sparky', level=20,
+                              nature='Jolly', friendship=120, types='["Electric"]', original_trainer='Ash')
+            db.session.add(pokemon)
+            db.session.add(ChatMessage(pokemon=pokemon, message='Hi Sparky!', sender='user'))
+            db.session.add(ChatMessage(pokemon=pokemon, message='*bounces*', sender='pokemon'))
+            db.session.commit()
+            pokemon_id = pokemon.id
+        
+        original_service = chat_routes.chat_engine.ai_service
+        chat_routes.chat_engine.ai_service = make_service(
+            AIProvider.OPENAI, StreamingStubAdapter(OPENAI_EVENTS, delay=0.1, done_marker=True)
+        )
+        try:
+            with app.test_client() as client:
+                page = client.get('/chat').get_data(as_text=True)
+                token = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+                
+                started = time.monotonic()
+                response = client.post(f'/api/pokemon/{pokemon_id}/send/stream',
+                                       json={'message': 'Want to play?'},
+                                       headers={'X-CSRFToken': token})
+                arrivals = []
+                body = ''
+                for chunk in response.response:
+                    text = chunk.decode() if isinstance(chunk, bytes) else chunk
+                    arrivals.append((time.monotonic() - started, text))
+                    body += text
+                    if len(arrivals) == 1:
+                        # Another tab's message saved while this reply is still streaming
+                        with app.app_context():
+                            db.session.add(ChatMessage(pokemon_id=pokemon_id, message='Other tab', sender='user'))
+                            db.session.commit()
+                            db.session.remove()
+                response.close()
+        finally:
+            chat_routes.chat_engine.ai_service = original_service
+        
+        with app.app_context():
+            saved = ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.id).all()
+            by_time = ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.timestamp).all()
+            in_order = [msg.id for msg in saved] == [msg.id for msg in by_time]
+            saved = [(msg.sender, msg.message) for msg in saved]
+            db.session.remove()
+        
+        first_token = next(t for t, text in arrivals if 'event: token' in text)
+        total = arrivals[-1][0]
+        expected_tail = [('user', 'Want to play?'), ('pokemon', '*perks up* Hello, trainer!')]
+        
+        if (response.mimetype == 'text/event-stream' and 'event: done' in body
+                and first_token < total / 2 and saved[-2:] == expected_tail and in_order):
+            print(f"✅ First token after {first_token * 1000:.0f}ms of {total * 1000:.0f}ms, "
+                  f"reply persisted in id and timestamp order")
+            return True
+        print(f"❌ first token {first_token:.2f}s / total {total:.2f}s, saved {saved}, in order {in_order}, body {body[:200]}")
+        return False
+
+def test_provisional_reaction_before_reply():
+    """Test that a template reaction streams first and only the final reply is saved"""
+    print("Testing provisional reactions...")
+    from app.api import chat_routes
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'provisional.db')}"
+        try:
+            app = create_app()
+        finally:
+            del os.environ['DATABASE_URL']
+        
+        with app.app_context():
+            pokemon = Pokemon(species_id=25, species_name='Pikachu', nickname='Sparky', level=20,
+                              nature='Jolly', friendship=120, types='["Electric"]', original_trainer='Ash')
+            db.session.add(pokemon)
+            db.session.add(ChatMessage(pokemon=pokemon, message='Hi Sparky!', sender='user'))
+            db.session.commit()
+            pokemon_id = pokemon.id
+        
+        engine = chat_routes.chat_engine
+        original_service, original_mode = engine.ai_service, engine.provisional_mode
+        results = {}
+        try:
+            with app.test_client() as client:
+                page = client.get('/chat').get_data(as_text=True)
+                token = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+                
+                for mode in ('replace', 'append'):
+                    engine.provisional_mode = mode
+                    engine.ai_service = make_service(
+                        AIProvider.OPENAI, StreamingStubAdapter(OPENAI_EVENTS, delay=0.05, done_marker=True)
+                    )
+                    body = client.post(f'/api/pokemon/{pokemon_id}/send/stream', json={'message': 'Want to play?'},
+                                       headers={'X-CSRFToken': token}).get_data(as_text=True)
+                    events = re.findall(r'event: (\w+)\ndata: (.*)\n', body)
+                    results[mode] = (events[0][0], json.loads(events[0][1]), json.loads(events[-1][1]))
+        finally:
+            engine.ai_service, engine.provisional_mode = original_service, original_mode
+        
+        with app.app_context():
+            saved = [msg.message for msg in ChatMessage.query.filter_by(pokemon_id=pokemon_id, sender='pokemon').all()]
+            db.session.remove()
+    
+    reply = '*perks up* Hello, trainer!'
+    first_event, replace_reaction, _ = results['replace']
+    _, append_reaction, append_done = results['append']
+    expected = [reply, f"{append_reaction['text']} {reply}"]
+    if (first_event == 'provisional' and replace_reaction['text'].startswith('*') and replace_reaction['mode'] == 'replace'
+            and saved == expected and append_done['pokemon_response']['message'] == expected[1]):
+        print(f"✅ {replace_reaction['text']!r} shown first, replaced or prefixed by the AI reply")
+        return True
+    print(f"❌ Results {results}, saved {saved}")
+    return False
+
+def main():
+    """Run all chat streaming tests"""
+    print("📡 Running Chat Streaming Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_provider_stream_parsing,
+        test_stream_endpoint_first_token_and_persistence,
+        test_provisional_reaction_before_reply
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Streaming Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
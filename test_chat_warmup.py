@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chat warm-up on Pokemon selection
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIChatService, AIProvider
+from app.services.token_budget import TokenCounter
+from test_idempotency import ChatHarness
+
+POKEMON = {
+    'species_id': 133, 'species_name': 'Eevee', 'nickname': 'Button', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Normal']
+}
+
+HISTORY = [
+    {'sender': 'user', 'message': 'Good morning Button!'},
+    {'sender': 'pokemon', 'message': '*stretches and yawns* Morning!'},
+    {'sender': 'user', 'message': 'Did you sleep well?'},
+    {'sender': 'pokemon', 'message': '*nods happily* Curled up by the fire.'}
+]
+
+class RecordingAdapter(BaseAdapter):
+    """Records request methods and answers chat completions"""
+    
+    def __init__(self):
+        super().__init__()
+        self.methods = []
+    
+    def send(self, request, **kwargs):
+        self.methods.append(request.method)
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        if request.method == 'HEAD':
+            response.status_code = 404
+            response.raw = io.BytesIO(b'')
+        else:
+            response.status_code = 200
+            response.raw = io.BytesIO(json.dumps({'choices': [{'message': {'content': '*wags tail*'}}]}).encode())
+        return response
+    
+    def close(self):
+        pass
+
+class CountingTokenCounter(TokenCounter):
+    """Estimating counter that records which texts actually had to be counted"""
+    
+    def __init__(self):
+        super().__init__(encoding_name=None)  # Skip tiktoken - estimates are enough here
+        self.counted = []
+    
+    def _count(self, text):
+        self.counted.append(text)
+        return super()._count(text)
+
+def test_warm_up_does_first_message_work():
+    """Test that warm-up caches the prompt and history counts and opens a connection"""
+    print("Testing service warm-up...")
+    adapter = RecordingAdapter()
+    service = AIChatService()
+    service.openai_api_key = 'test-key'
+    service.available_providers = [AIProvider.OPENAI]
+    service.sessions[AIProvider.OPENAI].mount('https://', adapter)
+    service.token_counter = CountingTokenCounter()
+    
+    warmed = service.warm_up(POKEMON, HISTORY)
+    again = service.warm_up(POKEMON, HISTORY)
+    counted_at_warm_up = len(service.token_counter.counted)
+    hits = service.prompt_cache.hits
+    
+    message = 'Want to go outside?'
+    service.generate_pokemon_response(message, POKEMON, HISTORY + [{'sender': 'user', 'message': message}])
+    counted_on_send = service.token_counter.counted[counted_at_warm_up:]
+    
+    if (warmed['connection'] == 'opened' and again['connection'] == 'skipped' and adapter.methods == ['HEAD', 'POST']
+            and warmed['history_turns'] == 4 and not warmed['prompt_cached'] and again['prompt_cached']
+            and service.prompt_cache.hits == hits + 1 and counted_on_send == [message]):
+        print(f"✅ Connection pre-opened once, first send rendered nothing and counted only {counted_on_send}")
+        return True
+    print(f"❌ warmed={warmed} again={again} methods={adapter.methods} counted on send={counted_on_send}")
+    return False
+
+def test_warmup_endpoint():
+    """Test the warm-up endpoint requires CSRF and reports what it prepared"""
+    print("Testing warm-up endpoint...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        try:
+            adapter = RecordingAdapter()
+            harness.chat_routes.chat_engine.ai_service.sessions[AIProvider.OPENAI].mount('https://', adapter)
+            client = harness.client()
+            denied = client.post(f'/api/pokemon/{harness.pokemon_id}/warmup')
+            response = client.post(f'/api/pokemon/{harness.pokemon_id}/warmup', headers={'X-CSRFToken': client.csrf})
+            missing = client.post('/api/pokemon/9999/warmup', headers={'X-CSRFToken': client.csrf})
+        finally:
+            harness.close()
+    
+    warmed = (response.get_json() or {}).get('warmed', {})
+    if (denied.status_code in (400, 403) and response.status_code == 200 and adapter.methods == ['HEAD'] and missing.status_code == 404
+            and warmed.get('provider') == 'openai' and warmed.get('history_turns') == 1):
+        print(f"✅ Warmed {warmed}")
+        return True
+    print(f"❌ Statuses {denied.status_code}/{response.status_code}/{missing.status_code}, body {response.get_data(as_text=True)[:200]}")
+    return False
+
+def main():
+    """Run all chat warm-up tests"""
+    print("🔥 Running Chat Warm-up Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_warm_up_does_first_message_work,
+        test_warmup_endpoint
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Chat Warm-up Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
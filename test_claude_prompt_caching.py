@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test script to verify Claude requests use the system field, prompt caching and proper turns
+"""
+
+import sys
+import os
+import io
+import json
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import ai_chat_service
+from app.services.ai_chat_service import AIChatService, AIProvider
+
+POKEMON = {
+    'species_id': 25, 'species_name': 'Pikachu', 'nickname': 'Sparky', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Electric']
+}
+
+class RecordingClaudeAdapter(BaseAdapter):
+    """Stands in for the Messages API, recording payloads and caching marked prefixes like the API"""
+    
+    def __init__(self, minimum=2048):
+        super().__init__()
+        self.minimum = minimum
+        self.payloads = []
+        self.cached_prefixes = set()
+    
+    def send(self, request, **kwargs):
+        payload = json.loads(request.body)
+        self.payloads.append(payload)
+        
+        # System blocks then turns; a prefix ending on a marked block is written once
+        # it holds `minimum` tokens, and read back by a later request that repeats it
+        blocks, marked = [], []
+        for block in payload['system']:
+            blocks.append(block['text'])
+            marked.append('cache_control' in block)
+        for message in payload['messages']:
+            content = message['content']
+            parts = content if isinstance(content, list) else [{'type': 'text', 'text': content}]
+            blocks.append(message['role'] + ':' + ''.join(part['text'] for part in parts))
+            marked.append(any('cache_control' in part for part in parts))
+        
+        tokens = [len(''.join(blocks[:end])) // 4 for end in range(len(blocks) + 1)]
+        read = max((tokens[end] for end in range(1, len(blocks) + 1)
+                    if tuple(blocks[:end]) in self.cached_prefixes), default=0)
+        written = 0
+        for end in range(1, len(blocks) + 1):
+            prefix = tuple(blocks[:end])
+            if marked[end - 1] and tokens[end] >= self.minimum and prefix not in self.cached_prefixes:
+                self.cached_prefixes.add(prefix)
+                written = tokens[end] - read
+        
+        body = {
+            'content': [{'type': 'text', 'text': '*sparks cheerfully*'}],
+            'usage': {
+                'input_tokens': tokens[-1] - read - written,
+                'cache_creation_input_tokens': written,
+                'cache_read_input_tokens': read,
+                'output_tokens': 4
+            }
+        }
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(body).encode())
+        self.last_usage = body['usage']
+        return response
+    
+    def close(self):
+        pass
+
+def make_service(cache_min_tokens=None):
+    service = AIChatService()
+    if cache_min_tokens:
+        service.claude_cache_min_tokens = cache_min_tokens
+        service.history_token_budget = 4000
+    service.openai_api_key = None
+    service.claude_api_key = 'test-key'
+    service.available_providers = [AIProvider.CLAUDE]
+    service.preferred_provider = 'claude'
+    adapter = RecordingClaudeAdapter(service.claude_cache_min_tokens)
+    service.sessions[AIProvider.CLAUDE].mount('https://', adapter)
+    return service, adapter
+
+def chat_twice(service, opening='Hi Sparky!'):
+    """Two turns with a Pokemon, the second repeating the first's prompt and reply"""
+    history = [
+        {'sender': 'user', 'message': opening},
+        {'sender': 'pokemon', 'message': '*bounces*'}
+    ]
+    service.generate_pokemon_response("Want a berry?", POKEMON, history)
+    history += [{'sender': 'user', 'message': 'Want a berry?'}, {'sender': 'pokemon', 'message': '*sparks cheerfully*'}]
+    service.generate_pokemon_response("Let's train!", POKEMON, history)
+
+def test_system_prompt_sent_in_system_field():
+    """Test that the personality prompt goes in the system field, unmarked while too short to cache"""
+    print("Testing Claude system field...")
+    service, adapter = make_service()
+    chat_twice(service)
+    
+    first, second = adapter.payloads
+    system = first['system'][0]
+    in_messages = any('INTELLIGENT ANIMAL' in m['content'] for m in first['messages'])
+    marked = 'cache_control' in json.dumps(first) + json.dumps(second)
+    
+    if ('You are Sparky' in system['text'] and first['system'] == second['system']
+            and not in_messages and not marked and first['model'] == service.claude_model):
+        print(f"✅ System prompt sent as {len(first['system'])} block(s), no breakpoint below {service.claude_cache_min_tokens} tokens")
+        return True
+    print(f"❌ Unexpected payloads: {first.get('system')} / {second.get('system')}")
+    return False
+
+def test_history_prefix_read_from_cache():
+    """Test that a prefix long enough to cache is marked and its cache reads are counted"""
+    print("Testing Claude cache reads...")
+    service, adapter = make_service(cache_min_tokens=1024)
+    before = ai_chat_service.AI_TOKENS.value(provider='claude', kind='cached_prompt')
+    chat_twice(service, opening="Let me tell you about the Power Plant trip! " * 40)
+    
+    first, second = adapter.payloads
+    breakpoint = second['messages'][-2]['content'][0]
+    recorded = ai_chat_service.AI_TOKENS.value(provider='claude', kind='cached_prompt') - before
+    read = adapter.last_usage['cache_read_input_tokens']
+    
+    if breakpoint.get('cache_control') == {'type': 'ephemeral'} and read > 0 and recorded == read:
+        print(f"✅ Second turn read {read} prompt tokens from cache and recorded them")
+        return True
+    print(f"❌ Cache read {read}, recorded {recorded}, messages {second['messages']}")
+    return False
+
+def test_history_sent_as_alternating_turns():
+    """Test that history becomes alternating turns starting and ending with the trainer"""
+    print("Testing conversation turns...")
+    service, adapter = make_service()
+    
+    history = [
+        {'sender': 'pokemon', 'message': '*wakes up*'},
+        {'sender': 'user', 'message': 'Morning!'},
+        {'sender': 'pokemon', 'message': '*yawns*'},
+        {'sender': 'user', 'message': 'Hello?'}
+    ]
+    service.generate_pokemon_response("Are you awake?", POKEMON, history)
+    
+    expected = [
+        {'role': 'user', 'content': 'Morning!'},
+        {'role': 'assistant', 'content': '*yawns*'},
+        {'role': 'user', 'content': 'Hello?\nAre you awake?'}
+    ]
+    if adapter.payloads[0]['messages'] == expected:
+        print("✅ Leading Pokemon turn dropped, trainer messages merged, roles alternate")
+        return True
+    print(f"❌ Messages sent: {adapter.payloads[0]['messages']}")
+    return False
+
+def main():
+    """Run all Claude prompt caching tests"""
+    print("💾 Running Claude Prompt Caching Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_system_prompt_sent_in_system_field,
+        test_history_prefix_read_from_cache,
+        test_history_sent_as_alternating_turns
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Claude Prompt Caching Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
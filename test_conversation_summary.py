@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Test script to verify rolling per-Pokemon conversation summaries
+"""
+
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import requests
+from contextlib import ExitStack
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.pokemon import db, Pokemon, ChatMessage, ConversationSummary
+from app.services import ai_chat_service
+from app.services.ai_chat_service import AIChatService, AIProvider
+from app.services.conversation_summarizer import ConversationSummarizer, extractive_summary
+from app.services.token_budget import pack_history
+
+class RecordingClaudeAdapter(BaseAdapter):
+    """Answers every Messages API call with a fixed text and records the payloads"""
+    
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self.payloads = []
+    
+    def send(self, request, **kwargs):
+        self.payloads.append(json.loads(request.body))
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps({'content': [{'type': 'text', 'text': self.text}]}).encode())
+        return response
+    
+    def close(self):
+        pass
+
+class WordCounter:
+    """One token per word, so the history window is easy to work out"""
+    
+    exact = True
+    
+    def count(self, text):
+        return len(text.split())
+
+def make_app(db_dir):
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'summary.db')}"
+    try:
+        return create_app()
+    finally:
+        del os.environ['DATABASE_URL']
+
+def seed_conversation(app, count):
+    with app.app_context():
+        pokemon = Pokemon(species_id=25, species_name='Pikachu', nickname='Sparky', level=20,
+                          nature='Jolly', friendship=120, types='["Electric"]', original_trainer='Ash')
+        db.session.add(pokemon)
+        for i in range(count):
+            if i % 2 == 0:
+                db.session.add(ChatMessage(pokemon=pokemon, message=f'Remember that we visited town number {i}', sender='user'))
+            else:
+                db.session.add(ChatMessage(pokemon=pokemon, message='*bounces*', sender='pokemon'))
+        db.session.commit()
+        return pokemon.id
+
+def make_claude_service(text):
+    service = AIChatService()
+    service.openai_api_key = None
+    service.claude_api_key = 'test-key'
+    service.available_providers = [AIProvider.CLAUDE]
+    service.preferred_provider = 'claude'
+    adapter = RecordingClaudeAdapter(text)
+    service.sessions[AIProvider.CLAUDE].mount('https://', adapter)
+    return service, adapter
+
+def test_extractive_summary_is_bounded():
+    """Test that the fallback keeps substantive trainer messages within the size limit"""
+    print("Testing extractive fallback...")
+    messages = [
+        {'sender': 'user', 'message': 'Hi!'},
+        {'sender': 'pokemon', 'message': '*bounces around happily*'},
+        {'sender': 'user', 'message': 'My favourite berry is the Oran berry'}
+    ]
+    summary = extractive_summary('', messages)
+    long_summary = extractive_summary(summary, [{'sender': 'user', 'message': 'we went on a long trip ' * 20}] * 20, max_chars=400)
+    
+    if summary == '- Trainer said: My favourite berry is the Oran berry' and len(long_summary) <= 400:
+        print(f"✅ Small talk skipped, summary capped at {len(long_summary)} characters")
+        return True
+    print(f"❌ Summary {summary!r} / {len(long_summary)} characters")
+    return False
+
+def test_background_fold_without_ai():
+    """Test that messages are folded before they leave the prompt's token budget"""
+    print("Testing background summary...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        app = make_app(db_dir)
+        pokemon_id = seed_conversation(app, 35)
+        
+        service = AIChatService()
+        service.available_providers = []
+        # 80 tokens of history once the next message is reserved for: the newest 9 messages
+        service.token_counter = WordCounter()
+        service.history_token_budget = 80 + ConversationSummarizer.NEXT_MESSAGE_RESERVE
+        summarizer = ConversationSummarizer(service)
+        summarizer.every = 4
+        
+        with app.app_context():
+            window = summarizer.prompt_window(pokemon_id)
+            future = summarizer.maybe_schedule(pokemon_id)
+            future.result(timeout=10)
+            again = summarizer.maybe_schedule(pokemon_id)  # Every unsummarized message is in the prompt now
+            
+            record = ConversationSummary.query.filter_by(pokemon_id=pokemon_id).first()
+            ids = [m.id for m in ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.id)]
+            result = (window, record.message_count, record.last_message_id == ids[29], record.summary.count('Trainer said'))
+            db.session.remove()
+        
+        if result == (9, 30, True, 15) and again is None:
+            print("✅ Prompt holds 9 messages; 30 folded into 15 remembered lines, leaving room for 4 more")
+            return True
+        print(f"❌ Result {result}, rescheduled {again}")
+        return False
+
+def test_every_message_in_summary_or_prompt():
+    """Test that with the default settings no message is ever in neither the summary nor the prompt"""
+    print("Testing summary and history budget stay in step...")
+    from app.api import chat_routes
+    trainer_lines = ['Hi!', 'We walked all the way to Viridian City today and you found a shiny stone',
+                     'My little sister Mia wants to meet you. ' * 6, 'Do you remember the lake?']
+    pokemon_lines = ['*bounces*', '*tilts head and listens carefully, ears twitching with curiosity* ' * 3]
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        app = make_app(db_dir)
+        pokemon_id = seed_conversation(app, 0)
+        service = AIChatService()
+        service.available_providers = []
+        summarizer = ConversationSummarizer(service, max_recent=chat_routes.HISTORY_FETCH_LIMIT - 1)
+        
+        updates, gaps = 0, []
+        with app.app_context():
+            for i in range(120):
+                lines, sender = (trainer_lines, 'user') if i % 2 == 0 else (pokemon_lines, 'pokemon')
+                db.session.add(ChatMessage(pokemon_id=pokemon_id, message=lines[(i // 2) % len(lines)], sender=sender))
+                db.session.commit()
+                future = summarizer.maybe_schedule(pokemon_id)
+                if future:
+                    future.result(timeout=10)
+                    updates += 1
+                
+                # The history the routes would send with the next message
+                record = ConversationSummary.query.filter_by(pokemon_id=pokemon_id).first()
+                recent = ChatMessage.query.filter_by(pokemon_id=pokemon_id).order_by(ChatMessage.id.desc())\
+                    .limit(chat_routes.HISTORY_FETCH_LIMIT - 1).all()
+                history = [{'sender': m.sender, 'message': m.message} for m in reversed(recent)]
+                kept, _ = pack_history(history, 'Where should we go next?', service.history_token_budget, service.token_counter)
+                oldest_sent = recent[len(kept) - 1].id if kept else None
+                summarized_through = record.last_message_id if record else 0
+                if oldest_sent is None or summarized_through < oldest_sent - 1:
+                    gaps.append((i, summarized_through, oldest_sent))
+            db.session.remove()
+        
+        if not gaps and 0 < updates < 120:
+            print(f"✅ 120 messages, {updates} summary updates, every message summarized or sent")
+            return True
+        print(f"❌ {updates} updates, gaps (message, summarized through, oldest sent): {gaps[:5]}")
+        return False
+
+def test_ai_summary_reaches_prompt_as_separate_block():
+    """Test that the AI summary is stored and later sent as its own uncached system block"""
+    print("Testing AI summary in prompt...")
+    from app.api import chat_routes
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        app = make_app(db_dir)
+        pokemon_id = seed_conversation(app, 31)
+        service, adapter = make_claude_service('Sparky and Ash have visited many towns together.')
+        summarizer = ConversationSummarizer(service)
+        
+        with app.app_context():
+            summarizer.summarize(pokemon_id)
+            pokemon_data = chat_routes._with_memory(db.session.get(Pokemon, pokemon_id))
+            db.session.remove()
+        
+        service.generate_pokemon_response('Where next?', pokemon_data, [{'sender': 'user', 'message': 'Hi'}])
+        system = adapter.payloads[-1]['system']
+        
+        if (len(system) == 2 and 'cache_control' not in system[1]
+                and 'visited many towns' in system[1]['text'] and 'Current summary' in adapter.payloads[0]['messages'][0]['content']):
+            print("✅ Summary generated by the provider and sent after the personality block")
+            return True
+        print(f"❌ System blocks: {system}")
+        return False
+
+def test_summary_skipped_while_calls_busy():
+    """Test that summaries never wait for a bulkhead slot and are counted apart from replies"""
+    print("Testing summaries under load...")
+    service, adapter = make_claude_service('Sparky remembers the towns.')
+    counted = lambda purpose, result: ai_chat_service.AI_COMPLETIONS.value(purpose=purpose, result=result)
+    before = {key: counted(*key) for key in (('summary', 'shed'), ('summary', 'ai'), ('reply', 'ai'), ('reply', 'shed'))}
+    messages = [{'sender': 'user', 'message': 'Remember that we visited the big town'}]
+    
+    with ExitStack() as slots:  # Every slot taken by replies
+        for _ in range(service.bulkhead.max_concurrent):
+            slots.enter_context(service.bulkhead.slot())
+        started = time.monotonic()
+        busy = service.summarize_conversation('', messages, 'Sparky')
+        waited = time.monotonic() - started
+    idle = service.summarize_conversation('', messages, 'Sparky')
+    
+    deltas = {key: counted(*key) - value for key, value in before.items()}
+    expected = {('summary', 'shed'): 1, ('summary', 'ai'): 1, ('reply', 'ai'): 0, ('reply', 'shed'): 0}
+    if busy is None and waited < 0.1 and idle and len(adapter.payloads) == 1 and deltas == expected and service.bulkhead.stats()['shed'] == 0:
+        print(f"✅ Skipped without queueing while saturated ({waited * 1000:.0f}ms), summarized once free")
+        return True
+    print(f"❌ Busy {busy!r} after {waited:.2f}s, idle {idle!r}, counted {deltas}")
+    return False
+
+def main():
+    """Run all conversation summary tests"""
+    print("📝 Running Conversation Summary Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_extractive_summary_is_bounded,
+        test_background_fold_without_ai,
+        test_every_message_in_summary_or_prompt,
+        test_ai_summary_reaches_prompt_as_separate_block,
+        test_summary_skipped_while_calls_busy
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Conversation Summary Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Test script to verify Idempotency-Key handling on the chat send endpoints
+"""
+
+import sys
+import os
+import io
+import re
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.pokemon import db, Pokemon, ChatMessage, IdempotencyRecord
+from app.services.ai_chat_service import AIChatService, AIProvider
+from app.services.idempotency import IdempotencyStore
+
+class CountingAdapter(BaseAdapter):
+    """Answers OpenAI chat completions after a delay and counts the calls"""
+    
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.calls += 1
+            reply = f"*wags tail* Reply number {self.calls}!"
+        time.sleep(self.delay)
+        streamed = json.loads(request.body).get('stream')
+        if streamed:
+            body = f"data: {json.dumps({'choices': [{'delta': {'content': reply}}]})}\n\ndata: [DONE]\n\n"
+        else:
+            body = json.dumps({'choices': [{'message': {'content': reply}}]})
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200
+        response.raw = io.BytesIO(body.encode())
+        return response
+    
+    def close(self):
+        pass
+
+class ChatHarness:
+    """App with a temporary database, one Pokemon and a counting AI provider"""
+    
+    def __init__(self, db_dir, delay=0.0):
+        from app.api import chat_routes
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'idempotency.db')}"
+        try:
+            self.app = create_app()
+        finally:
+            del os.environ['DATABASE_URL']
+        
+        with self.app.app_context():
+            pokemon = Pokemon(species_id=133, species_name='Eevee', nickname='Button', level=20,
+                              nature='Jolly', friendship=120, types='["Normal"]', original_trainer='Ash')
+            db.session.add(pokemon)
+            db.session.add(ChatMessage(pokemon=pokemon, message='Hi Button!', sender='user'))
+            db.session.commit()
+            self.pokemon_id = pokemon.id
+        
+        self.adapter = CountingAdapter(delay)
+        service = AIChatService()
+        service.openai_api_key = 'test-key'
+        service.available_providers = [AIProvider.OPENAI]
+        service.sessions[AIProvider.OPENAI].mount('https://', self.adapter)
+        self.chat_routes = chat_routes
+        self.original_service = chat_routes.chat_engine.ai_service
+        chat_routes.chat_engine.ai_service = service
+    
+    def client(self):
+        client = self.app.test_client()
+        page = client.get('/chat').get_data(as_text=True)
+        client.csrf = re.search(r'name="csrf-token" content="([^"]+)"', page).group(1)
+        return client
+    
+    def send(self, client, message, key, stream=False):
+        return client.post(f"/api/pokemon/{self.pokemon_id}/send{'/stream' if stream else ''}",
+                           json={'message': message},
+                           headers={'X-CSRFToken': client.csrf, 'Idempotency-Key': key})
+    
+    def saved_count(self):
+        with self.app.app_context():
+            count = ChatMessage.query.filter_by(pokemon_id=self.pokemon_id).count()
+            db.session.remove()
+            return count
+    
+    def close(self):
+        self.chat_routes.chat_engine.ai_service = self.original_service
+
+def test_repeat_returns_stored_response():
+    """Test that a resubmitted key gets the first response without another AI call"""
+    print("Testing repeated Idempotency-Key...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        try:
+            client = harness.client()
+            first = harness.send(client, 'Want a treat?', 'key-1')
+            second = harness.send(client, 'Want a treat?', 'key-1')
+            reused = harness.send(client, 'Something else', 'key-1')
+            calls, saved = harness.adapter.calls, harness.saved_count()
+        finally:
+            harness.close()
+    
+    if (first.status_code == second.status_code == 200 and first.get_json() == second.get_json()
+            and second.headers.get('Idempotent-Replayed') == 'true' and 'Idempotent-Replayed' not in first.headers
+            and reused.status_code == 422 and calls == 1 and saved == 3):
+        print("✅ One AI call and one pair of rows; repeat replayed, reuse for another message refused")
+        return True
+    print(f"❌ Statuses {first.status_code}/{second.status_code}/{reused.status_code}, calls {calls}, saved {saved}")
+    return False
+
+def test_concurrent_duplicate_waits():
+    """Test that a duplicate arriving mid-flight waits for the first request's result"""
+    print("Testing concurrent duplicates...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir, delay=0.5)
+        try:
+            clients = [harness.client(), harness.client()]
+            results = [None, None]
+            
+            def submit(index):
+                results[index] = harness.send(clients[index], 'Double tap!', 'key-2')
+            
+            threads = [threading.Thread(target=submit, args=(i,)) for i in range(2)]
+            started = time.monotonic()
+            for thread in threads:
+                thread.start()
+                time.sleep(0.1)
+            for thread in threads:
+                thread.join()
+            elapsed = time.monotonic() - started
+            calls, saved = harness.adapter.calls, harness.saved_count()
+        finally:
+            harness.close()
+    
+    bodies = [response.get_json() for response in results]
+    if (all(response.status_code == 200 for response in results) and bodies[0] == bodies[1]
+            and calls == 1 and saved == 3 and elapsed < 2):
+        print(f"✅ Both got reply {bodies[0]['pokemon_response']['id']} from a single AI call in {elapsed:.2f}s")
+        return True
+    print(f"❌ Statuses {[r.status_code for r in results]}, calls {calls}, saved {saved}")
+    return False
+
+def test_stream_repeat_is_replayed():
+    """Test that the streaming endpoint replays a finished key as token + done events"""
+    print("Testing streamed repeats...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        try:
+            client = harness.client()
+            first = harness.send(client, 'Race you!', 'key-3', stream=True).get_data(as_text=True)
+            repeat = harness.send(client, 'Race you!', 'key-3', stream=True)
+            repeat_body = repeat.get_data(as_text=True)
+            calls = harness.adapter.calls
+        finally:
+            harness.close()
+    
+    def done(body):
+        return json.loads(re.search(r'event: done\ndata: (.*)\n', body).group(1))
+    
+    if (repeat.headers.get('Idempotent-Replayed') == 'true' and done(first) == done(repeat_body)
+            and 'event: token' in repeat_body and calls == 1):
+        print(f"✅ Replayed {done(repeat_body)['pokemon_response']['message']!r} without a new call")
+        return True
+    print(f"❌ Calls {calls}, repeat {repeat_body[:200]}")
+    return False
+
+def test_stream_closed_before_start_frees_key():
+    """Test that a stream the client drops before it starts does not leave its key pending"""
+    print("Testing stream dropped before its first event...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        try:
+            client = harness.client()
+            # The test client reads the first event itself, so dispatch directly and close
+            # the response unread, as the server does when the client is already gone
+            with harness.app.test_request_context(
+                    f"/api/pokemon/{harness.pokemon_id}/send/stream", method='POST', json={'message': 'Fetch!'},
+                    headers={'X-CSRFToken': client.csrf, 'Idempotency-Key': 'key-4',
+                             'Cookie': f"session={client.get_cookie('session').value}"}):
+                harness.app.full_dispatch_request().close()
+            with harness.app.app_context():
+                left_pending = db.session.get(IdempotencyRecord, 'key-4') is not None
+                db.session.remove()
+            
+            started = time.monotonic()
+            retry = harness.send(client, 'Fetch!', 'key-4', stream=True).get_data(as_text=True)
+            retry_seconds = time.monotonic() - started
+            calls, saved = harness.adapter.calls, harness.saved_count()
+        finally:
+            harness.close()
+    
+    if not left_pending and 'event: done' in retry and retry_seconds < 5 and calls == 1 and saved == 3:
+        print(f"✅ Key released on close; retry answered in {retry_seconds:.2f}s with one AI call")
+        return True
+    print(f"❌ pending={left_pending} retry {retry_seconds:.1f}s {retry[:200]!r}, calls {calls}, saved {saved}")
+    return False
+
+def test_store_release_and_expiry():
+    """Test released, abandoned and expired keys can be claimed again, but slow ones are not taken over"""
+    print("Testing key release and expiry...")
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        harness.close()
+        now = [datetime(2024, 1, 1, 12, 0, 0)]
+        store = IdempotencyStore(ttl=3600, wait_timeout=30, abandon_after=300, clock=lambda: now[0])
+        # The same table seen from another server process
+        other_process = IdempotencyStore(ttl=3600, wait_timeout=30, abandon_after=300, clock=lambda: now[0])
+        
+        with harness.app.app_context():
+            claimed = store.claim('k', 'hash') is None
+            duplicate_pending = store.claim('k', 'hash').pending
+            store.release('k')
+            reclaimed = store.claim('k', 'hash') is None
+            
+            now[0] += timedelta(seconds=60)  # A slow reply, past wait_timeout but still running
+            slow_kept = other_process.claim('k', 'hash').pending
+            now[0] += timedelta(seconds=300)
+            running_kept = store.claim('k', 'hash').pending  # Still in flight in this process
+            taken_over = other_process.claim('k', 'hash') is None  # Its holder must have died
+            other_process.complete('k', 200, {'success': True})
+            
+            now[0] += timedelta(hours=2)
+            store._last_purge = 0.0
+            after_ttl = store.claim('k', 'hash') is None
+            rows = IdempotencyRecord.query.count()
+            db.session.remove()
+    
+    if (claimed and duplicate_pending and reclaimed and slow_kept and running_kept and taken_over
+            and after_ttl and rows == 1):
+        print("✅ Released, abandoned and expired keys were claimable again; slow replies kept their key")
+        return True
+    print(f"❌ claimed={claimed} pending={duplicate_pending} reclaimed={reclaimed} slow_kept={slow_kept} "
+          f"running_kept={running_kept} taken_over={taken_over} after_ttl={after_ttl} rows={rows}")
+    return False
+
+def main():
+    """Run all idempotency tests"""
+    print("🔁 Running Idempotency Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_repeat_returns_stored_response,
+        test_concurrent_duplicate_waits,
+        test_stream_repeat_is_replayed,
+        test_stream_closed_before_start_frees_key,
+        test_store_release_and_expiry
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Idempotency Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
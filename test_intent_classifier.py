@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script to verify intent classification of chat messages
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.personality.intent_classifier import IntentClassifier
+from app.personality.chat_engine import ChatEngine
+from benchmark_intent_classifier import CORPUS, legacy_message_type
+
+def test_whole_words_and_longest_phrase():
+    """Test that keywords inside other words are ignored and longer phrases win"""
+    print("Testing word boundaries and phrase matching...")
+    classifier = IntentClassifier()
+    expected = {
+        "This is great": 'compliment',              # "hi" inside "this"
+        "Goodbye for now": 'general',               # "good" inside "goodbye"
+        "Show me somewhere new": 'general',         # "how" and "where" inside words
+        "Good   morning!": 'greeting',              # Not the compliment "good"
+        "How are you?": 'greeting',                 # Ties go to the intent listed first
+        "Hi! What should we do today?": 'question', # Weights outvote the greeting
+        "What's up": 'greeting',
+        "what's that": 'question'
+    }
+    
+    wrong = {message: classifier.classify(message) for message, intent in expected.items()
+             if classifier.classify(message) != intent}
+    if not wrong:
+        print(f"✅ {len(expected)} tricky messages classified correctly")
+        return True
+    print(f"❌ Misclassified: {wrong}")
+    return False
+
+def test_corpus_accuracy_beats_keyword_checks():
+    """Test accuracy on the benchmark corpus against the old substring checks"""
+    print("Testing accuracy on the labelled corpus...")
+    classifier = IntentClassifier()
+    accuracy = sum(classifier.classify(message) == label for message, label in CORPUS) / len(CORPUS)
+    legacy = sum(legacy_message_type(message.lower()) == label for message, label in CORPUS) / len(CORPUS)
+    
+    if accuracy >= 0.95 and accuracy > legacy:
+        print(f"✅ Accuracy {accuracy:.0%} (keyword checks: {legacy:.0%})")
+        return True
+    print(f"❌ Accuracy {accuracy:.0%}, keyword checks {legacy:.0%}")
+    return False
+
+def test_intent_tables_are_extensible():
+    """Test custom tables, added phrases and the ChatEngine hook"""
+    print("Testing custom intents...")
+    classifier = IntentClassifier({'farewell': {'goodbye': 2, 'see you later': 2}, 'food': {'berry': 1}})
+    classifier.add('food', 'hungry')
+    classifier.add('farewell', 'bye')
+    results = [classifier.classify(message) for message in
+               ("Goodbye!", "see   you later", "Are you hungry for a berry?", "bye bye", "byeee", "Nice weather")]
+    
+    try:
+        classifier.add('food', 'snack', weight=0)
+        rejected = False
+    except ValueError:
+        rejected = True
+    
+    engine = ChatEngine()
+    engine.intent_classifier = classifier
+    hooked = engine._analyze_message_type("see you later")
+    
+    if results == ['farewell', 'farewell', 'food', 'farewell', 'general', 'general'] and rejected and hooked == 'farewell':
+        print(f"✅ Custom intents classified: {results}")
+        return True
+    print(f"❌ Results {results}, zero weight rejected {rejected}, engine gave {hooked}")
+    return False
+
+def main():
+    """Run all intent classifier tests"""
+    print("🗂️ Running Intent Classifier Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_whole_words_and_longest_phrase,
+        test_corpus_accuracy_beats_keyword_checks,
+        test_intent_tables_are_extensible
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Intent Classifier Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Test script to verify coalescing of rapid-fire chat messages
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.pokemon import db, ChatMessage
+from app.services.message_coalescer import MessageCoalescer
+from test_idempotency import ChatHarness
+
+def run_concurrently(calls, stagger=0.05):
+    """Start each call on its own thread a little after the previous one"""
+    results = [None] * len(calls)
+    
+    def runner(index):
+        results[index] = calls[index]()
+    
+    threads = [threading.Thread(target=runner, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join()
+    return results
+
+def after(seconds, call):
+    """Call that runs only once the given delay has passed"""
+    def delayed():
+        time.sleep(seconds)
+        return call()
+    return delayed
+
+def done_event(body):
+    """Payload of a streamed response's done event, or None"""
+    match = re.search(r'event: done\ndata: (.*)\n', body)
+    return json.loads(match.group(1)) if match else None
+
+def test_burst_within_window():
+    """Test that messages inside the window share one generation"""
+    print("Testing coalescing window...")
+    coalescer = MessageCoalescer(window=0.3)
+    batches = []
+    
+    def generate(items):
+        batches.append(items)
+        return f"answered {'+'.join(items)}"
+    
+    results = run_concurrently([lambda m=m: coalescer.submit(1, m, generate) for m in ('a', 'b', 'c')])
+    
+    if batches == [['a', 'b', 'c']] and all(result == ('answered a+b+c', 3) for result in results):
+        print("✅ Three messages, one generation answering all of them")
+        return True
+    print(f"❌ Batches {batches}, results {results}")
+    return False
+
+def test_messages_during_generation_are_merged():
+    """Test that messages arriving while a generation runs are answered together afterwards"""
+    print("Testing messages during a running generation...")
+    coalescer = MessageCoalescer(window=0.05)
+    batches = []
+    
+    def generate(items):
+        batches.append(items)
+        time.sleep(0.4)
+        return len(batches)
+    
+    results = run_concurrently([
+        lambda: coalescer.submit(7, 'first', generate),
+        after(0.15, lambda: coalescer.submit(7, 'second', generate)),
+        after(0.2, lambda: coalescer.submit(7, 'third', generate)),
+        lambda: coalescer.submit(8, 'other pokemon', generate)
+    ], stagger=0)
+    
+    if (sorted(map(tuple, batches)) == [('first',), ('other pokemon',), ('second', 'third')]
+            and results[1] == results[2] and results[1][1] == 2 and not coalescer._slots):
+        print(f"✅ Generations {batches}, late messages answered by one follow-up call")
+        return True
+    print(f"❌ Batches {batches}, results {results}")
+    return False
+
+def test_send_endpoint_burst():
+    """Test that a burst to /send makes one AI call that sees every message"""
+    print("Testing /send burst...")
+    from app.api import chat_routes
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir, delay=0.2)
+        original_window = chat_routes.coalescer.window
+        chat_routes.coalescer.window = 0.4
+        payloads = []
+        original_send = harness.adapter.send
+        
+        def recording_send(request, **kwargs):
+            payloads.append(json.loads(request.body))
+            return original_send(request, **kwargs)
+        
+        harness.adapter.send = recording_send
+        try:
+            clients = [harness.client() for _ in range(3)]
+            messages = ['Hey!', 'Are you there?', 'Want to play?']
+            responses = run_concurrently([
+                lambda i=i: clients[i].post(f'/api/pokemon/{harness.pokemon_id}/send', json={'message': messages[i]},
+                                            headers={'X-CSRFToken': clients[i].csrf})
+                for i in range(3)
+            ], stagger=0.1)
+            with harness.app.app_context():
+                saved = [(m.sender, m.message) for m in ChatMessage.query.order_by(ChatMessage.id).all()]
+                db.session.remove()
+        finally:
+            chat_routes.coalescer.window = original_window
+            harness.close()
+    
+    bodies = [response.get_json() for response in responses]
+    last_turn = payloads[0]['messages'][-1]['content'] if payloads else ''
+    if (harness.adapter.calls == 1 and all(body['coalesced_messages'] == 3 for body in bodies)
+            and len({body['pokemon_response']['id'] for body in bodies}) == 1
+            and all(message in last_turn for message in messages)
+            and [sender for sender, _ in saved] == ['user', 'user', 'user', 'user', 'pokemon']):
+        print(f"✅ 1 AI call for 3 messages, last turn {last_turn!r}")
+        return True
+    print(f"❌ Calls {harness.adapter.calls}, bodies {bodies}, saved {saved}")
+    return False
+
+def test_stream_endpoint_burst():
+    """Test that a burst to /send/stream, which the chat page uses, makes one AI call"""
+    print("Testing /send/stream burst...")
+    from app.api import chat_routes
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir, delay=0.2)
+        original_window = chat_routes.coalescer.window
+        chat_routes.coalescer.window = 0.4
+        try:
+            clients = [harness.client() for _ in range(3)]
+            messages = ['Hey!', 'Are you there?', 'Want to play?']
+            # Streams are read on the thread that made the request, as a server would
+            bodies = run_concurrently([
+                lambda i=i: harness.send(clients[i], messages[i], f'stream-burst-{i}', stream=True).get_data(as_text=True)
+                for i in range(3)
+            ], stagger=0.1)
+            with harness.app.app_context():
+                saved = [m.sender for m in ChatMessage.query.order_by(ChatMessage.id).all()]
+                db.session.remove()
+        finally:
+            chat_routes.coalescer.window = original_window
+            harness.close()
+    
+    results = [done_event(body) for body in bodies]
+    if (harness.adapter.calls == 1 and all(result and result['coalesced_messages'] == 3 for result in results)
+            and len({result['pokemon_response']['id'] for result in results}) == 1
+            and saved == ['user', 'user', 'user', 'user', 'pokemon']):
+        print("✅ 1 AI call for 3 streamed messages, every stream got the shared reply")
+        return True
+    print(f"❌ Calls {harness.adapter.calls}, results {results}, saved {saved}")
+    return False
+
+def test_failed_burst_saves_nothing():
+    """Test that when the shared generation fails every request removes the message it saved"""
+    print("Testing failed burst...")
+    from app.api import chat_routes
+    
+    def fail(*args, **kwargs):
+        time.sleep(0.2)
+        raise RuntimeError("provider exploded")
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        original_window = chat_routes.coalescer.window
+        original_generate = chat_routes.chat_engine.generate_response
+        chat_routes.coalescer.window = 0.3
+        chat_routes.chat_engine.generate_response = fail
+        try:
+            clients = [harness.client() for _ in range(2)]
+            sent, streamed = run_concurrently([
+                lambda: harness.send(clients[0], 'Hello?', 'failed-burst-0'),
+                lambda: harness.send(clients[1], 'Anyone?', 'failed-burst-1', stream=True).get_data(as_text=True)
+            ])
+            saved = harness.saved_count()
+        finally:
+            chat_routes.coalescer.window = original_window
+            chat_routes.chat_engine.generate_response = original_generate
+            harness.close()
+    
+    if sent.status_code == 500 and 'event: error' in streamed and saved == 1:
+        print("✅ Both requests failed and left only the existing message")
+        return True
+    print(f"❌ Status {sent.status_code}, stream {streamed!r}, saved {saved}")
+    return False
+
+def main():
+    """Run all message coalescing tests"""
+    print("🫧 Running Message Coalescing Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_burst_within_window,
+        test_messages_during_generation_are_merged,
+        test_send_endpoint_burst,
+        test_stream_endpoint_burst,
+        test_failed_burst_saves_nothing
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Message Coalescing Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the n-gram fallback reply model
+"""
+
+import sys
+import os
+import time
+import random
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIChatService, AIProvider, reply_source
+from app.personality.chat_engine import ChatEngine
+from app.services.ngram_fallback import NgramTrainer, NgramModel, load_fallback_model
+from app.models.pokemon import db, Pokemon, ChatMessage
+from test_idempotency import ChatHarness
+import train_fallback_model
+
+WARY = [
+    "*{nick} backs away and watches you from the bushes*",
+    "*{nick} sniffs the air* Who are you?",
+    "*{nick} growls softly and keeps its distance*",
+    "*{nick} watches you from the bushes, ears flat*",
+    "I don't trust you yet. *{nick} backs away*",
+    "*{nick} sniffs the air and keeps its distance*"
+]
+
+LOYAL = [
+    "*{nick} leaps into your arms* You're home!",
+    "*{nick} nuzzles your hand happily*",
+    "Best day ever! *{nick} wags its tail*",
+    "*{nick} wags its tail and leaps into your arms*",
+    "*{nick} nuzzles your cheek* I missed you!",
+    "You're home! *{nick} wags its tail happily*"
+]
+
+def train(path, min_replies=5):
+    """Eevee (133) has its own wary and loyal models; Pikachu (25) only adds two loyal replies"""
+    trainer = NgramTrainer(min_replies=min_replies)
+    for reply in WARY:
+        trainer.add(reply.format(nick='Button'), 133, 30, 'Button')
+    for reply in LOYAL:
+        trainer.add(reply.format(nick='Button'), 133, 220, 'Button')
+    trainer.add("*Sparky sparks happily*", 25, 220, 'Sparky')
+    trainer.add("*Sparky naps on your shoulder*", 25, 220, 'Sparky')
+    return trainer.write(path)
+
+def words_of(replies, nick):
+    return {word for reply in replies for word in reply.format(nick=nick).split()}
+
+def test_samples_stay_within_species_and_band():
+    """Test that samples use the right model's words and the Pokemon's own nickname"""
+    print("Testing sampling per species and friendship band...")
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = os.path.join(model_dir, 'model.bin')
+        stats = train(path)
+        model = NgramModel(path)
+        try:
+            rng = random.Random(7)
+            wary = {model.sample(133, 10, 'Pip', rng) for _ in range(200)}
+            loyal = {model.sample(133, 200, 'Pip', rng) for _ in range(200)}
+            pooled = {model.sample(25, 200, 'Sparky', rng) for _ in range(200)}
+            untrained = model.sample(133, 100, 'Pip', rng)
+        finally:
+            model.close()
+    
+    wary_ok = all(set(reply.split()) <= words_of(WARY, 'Pip') for reply in wary)
+    loyal_ok = all(set(reply.split()) <= words_of(LOYAL, 'Pip') for reply in loyal)
+    novel = (wary | loyal) - {reply.format(nick='Pip') for reply in WARY + LOYAL}
+    # Pikachu has too few replies for its own model, so it gets the pooled loyal one
+    pooled_ok = any('Sparky' in reply and 'Pip' not in reply for reply in pooled)
+    
+    if (stats['species'] == 1 and None not in wary | loyal | pooled and wary_ok and loyal_ok
+            and len(wary) > 4 and novel and pooled_ok and untrained is None):
+        print(f"✅ {len(wary)} wary and {len(loyal)} loyal variants ({len(novel)} new), e.g. {sorted(novel)[0]!r}")
+        return True
+    print(f"❌ stats={stats} wary={wary} loyal={loyal} pooled={pooled} untrained={untrained}")
+    return False
+
+def test_sampling_is_fast():
+    """Test that a fallback reply is sampled in well under a millisecond"""
+    print("Testing sampling speed...")
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = os.path.join(model_dir, 'model.bin')
+        train(path)
+        model = NgramModel(path)
+        try:
+            rng = random.Random(1)
+            runs = 2000
+            started = time.perf_counter()
+            for i in range(runs):
+                model.sample(133, 30 if i % 2 else 220, 'Button', rng)
+            per_sample = (time.perf_counter() - started) / runs
+        finally:
+            model.close()
+    
+    if per_sample < 0.0005:
+        print(f"✅ {per_sample * 1e6:.1f}µs per reply")
+        return True
+    print(f"❌ Sampling took {per_sample * 1e6:.1f}µs per reply")
+    return False
+
+def test_fallback_response_uses_model():
+    """Test that the AI and chat engine fallbacks sample the model, and unusable files are ignored"""
+    print("Testing fallback response integration...")
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = os.path.join(model_dir, 'model.bin')
+        train(path)
+        broken = os.path.join(model_dir, 'broken.bin')
+        with open(path, 'rb') as f, open(broken, 'wb') as out:
+            out.write(f.read()[:40])
+        
+        service = AIChatService()
+        service.fallback_model = load_fallback_model(path)
+        pokemon = {'species_id': 133, 'species_name': 'Eevee', 'nickname': 'Pip', 'friendship': 220,
+                   'level': 20, 'nature': 'Jolly', 'types': ['Normal']}
+        engine = ChatEngine()
+        engine.ai_service = service
+        try:
+            replies = {service._fallback_response('Hi!', pokemon) for _ in range(50)}
+            replies |= {engine._generate_fallback_response(pokemon, 'Hi!') for _ in range(50)}
+        finally:
+            service.fallback_model.close()
+        missing = load_fallback_model(os.path.join(model_dir, 'missing.bin'))
+        truncated = load_fallback_model(broken)
+    
+    if (all(set(reply.split()) <= words_of(LOYAL, 'Pip') and reply_source(reply) == 'ngram' for reply in replies)
+            and missing is None and truncated is None):
+        print(f"✅ Fallback replies come from the model, e.g. {sorted(replies)[0]!r}")
+        return True
+    print(f"❌ replies={replies} missing={missing} truncated={truncated}")
+    return False
+
+def test_provisional_reaction_uses_templates():
+    """Test that the provisional reaction is template body language even when a model is loaded"""
+    print("Testing provisional reaction source...")
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = os.path.join(model_dir, 'model.bin')
+        train(path)
+        service = AIChatService()
+        service.fallback_model = load_fallback_model(path)
+        service.available_providers = [AIProvider.OPENAI]
+        pokemon = {'species_id': 133, 'species_name': 'Eevee', 'nickname': 'Pip', 'friendship': 220,
+                   'level': 20, 'nature': 'Jolly', 'types': ['Normal'], 'personality': {}}
+        engine = ChatEngine()
+        engine.ai_service = service
+        engine.provisional_mode = 'replace'
+        try:
+            reactions = {engine.provisional_reaction(pokemon, 'Hi!', [{'sender': 'user', 'message': 'Hi!'}])
+                         for _ in range(50)}
+        finally:
+            service.fallback_model.close()
+    
+    # Every model reply names the Pokemon in its body language; the templates never do
+    if None not in reactions and not any('Pip' in reaction for reaction in reactions):
+        print(f"✅ {len(reactions)} template reactions, e.g. {sorted(reactions)[0]!r}")
+        return True
+    print(f"❌ Reactions {reactions}")
+    return False
+
+def test_trains_only_on_ai_replies():
+    """Test that saved replies record their source and training reads only the AI-written ones"""
+    print("Testing reply sources and training input...")
+    
+    class RecordingTrainer:
+        def __init__(self):
+            self.replies = []
+            self.friendships = []
+        
+        def add(self, message, species_id, friendship, nickname, species_name=None, trainer_name=None):
+            self.replies.append(message)
+            self.friendships.append(friendship)
+    
+    with tempfile.TemporaryDirectory() as db_dir:
+        harness = ChatHarness(db_dir)
+        try:
+            client = harness.client()
+            harness.send(client, 'Want a treat?', 'key-1')
+            harness.send(client, 'Shall we walk?', 'key-2', stream=True).get_data(as_text=True)
+            engine = harness.chat_routes.chat_engine
+            engine.provisional_mode = 'append'
+            try:
+                harness.send(client, 'Look over there!', 'key-3', stream=True).get_data(as_text=True)
+            finally:
+                engine.provisional_mode = 'off'
+            service = engine.ai_service
+            service.available_providers = []
+            service.fallback_model = None
+            harness.send(client, 'Still there?', 'key-4')
+            harness.send(client, 'Hello?', 'key-5', stream=True).get_data(as_text=True)
+            with harness.app.app_context():
+                db.session.add(ChatMessage(pokemon_id=harness.pokemon_id, message='*old reply*', sender='pokemon'))
+                db.session.get(Pokemon, harness.pokemon_id).friendship = 250  # Bonded since the replies
+                db.session.commit()
+                sources = [msg.source for msg in ChatMessage.query.filter_by(sender='pokemon').order_by(ChatMessage.id)]
+                db.session.remove()
+            
+            os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'idempotency.db')}"
+            try:
+                tagged, untagged = RecordingTrainer(), RecordingTrainer()
+                train_fallback_model.train_from_db(tagged)
+                train_fallback_model.train_from_db(untagged, include_untagged=True)
+            finally:
+                del os.environ['DATABASE_URL']
+        finally:
+            harness.close()
+    
+    if (sources == ['ai', 'ai', 'mixed', 'template', 'template', None]
+            and tagged.replies == ['*wags tail* Reply number 1!', '*wags tail* Reply number 2!']
+            and tagged.friendships == [120, 120]
+            and untagged.replies == tagged.replies + ['*old reply*'] and untagged.friendships == [120, 120, 250]):
+        print("✅ Sources and friendship recorded per reply; only pure AI replies trained on by default")
+        return True
+    print(f"❌ Sources {sources}, trained on {tagged.replies} {tagged.friendships} / {untagged.replies} {untagged.friendships}")
+    return False
+
+def test_names_filled_in_per_pokemon():
+    """Test that pooled replies carry no other Pokemon's or trainer's names"""
+    print("Testing name placeholders...")
+    trainer = NgramTrainer(min_replies=5)
+    for reply in ["*Sparky the Pikachu hugs Ash*", "Ash! *Sparky hops onto your shoulder*",
+                  "I'm a happy pikachu, ASH", "*Sparky's cheeks spark for Ash*", "Sparky loves you, Ash"]:
+        trainer.add(reply, 25, 220, 'Sparky', species_name='Pikachu', trainer_name='Ash')
+    
+    with tempfile.TemporaryDirectory() as model_dir:
+        path = os.path.join(model_dir, 'model.bin')
+        trainer.write(path)
+        model = NgramModel(path)
+        try:
+            rng = random.Random(3)
+            samples = {model.sample(133, 220, 'Button', rng, species_name='Eevee', trainer_name='Gary') for _ in range(100)}
+        finally:
+            model.close()
+    
+    words = ' '.join(sample for sample in samples if sample)
+    leaked = [name for name in ('Sparky', 'Pikachu', 'pikachu', 'Ash', 'ASH', '{') if name in words]
+    if not leaked and all(name in words for name in ('Button', 'Eevee', 'Gary', "Button's")):
+        print(f"✅ {len(samples)} pooled samples name Button the Eevee and Gary only")
+        return True
+    print(f"❌ Leaked {leaked} in {samples}")
+    return False
+
+def main():
+    """Run all n-gram fallback tests"""
+    print("🧠 Running N-gram Fallback Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_samples_stay_within_species_and_band,
+        test_sampling_is_fast,
+        test_fallback_response_uses_model,
+        test_provisional_reaction_uses_templates,
+        test_trains_only_on_ai_replies,
+        test_names_filled_in_per_pokemon
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"N-gram Fallback Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
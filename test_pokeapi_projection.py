@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streaming selective extraction of PokeAPI responses
+"""
+
+import sys
+import os
+import io
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.pokeapi_service import PokeAPIService, POKEMON_FIELDS
+from app.services.json_projection import project, stream_project
+
+def build_pokemon_body():
+    """Build a /pokemon/{id}-shaped body with the bulky fields PokeAPI returns"""
+    return {
+        'abilities': [
+            {'ability': {'name': 'static', 'url': 'u'}, 'is_hidden': False, 'slot': 1},
+            {'ability': {'name': 'lightning-rod', 'url': 'u'}, 'is_hidden': True, 'slot': 3}
+        ],
+        'base_experience': 112,
+        'game_indices': [{'game_index': 84, 'version': {'name': f'v{i}', 'url': 'u'}} for i in range(20)],
+        'height': 4,
+        'id': 25,
+        'moves': [
+            {
+                'move': {'name': f'move-{i}', 'url': f'https://pokeapi.co/api/v2/move/{i}/'},
+                'version_group_details': [
+                    {'level_learned_at': j, 'move_learn_method': {'name': 'level-up', 'url': 'u'},
+                     'version_group': {'name': f'vg-{j}', 'url': 'u'}}
+                    for j in range(8)
+                ]
+            }
+            for i in range(100)
+        ],
+        'name': 'pikachu',
+        'sprites': {
+            'front_default': 'front.png',
+            'front_shiny': 'shiny.png',
+            'other': {
+                'official-artwork': {'front_default': 'art.png', 'front_shiny': 'art-shiny.png'},
+                'home': {'front_default': 'home.png'},
+                'showdown': {'front_default': 'showdown.gif'}
+            },
+            'versions': {f'gen-{i}': {'front_default': 'x' * 80} for i in range(8)}
+        },
+        'stats': [
+            {'base_stat': 35, 'effort': 0, 'stat': {'name': 'hp', 'url': 'u'}},
+            {'base_stat': 90, 'effort': 2, 'stat': {'name': 'speed', 'url': 'u'}}
+        ],
+        'types': [{'slot': 1, 'type': {'name': 'electric', 'url': 'u'}}],
+        'weight': 60
+    }
+
+def build_species_body():
+    """Build a /pokemon-species/{id}-shaped body"""
+    return {
+        'base_happiness': 50,
+        'capture_rate': 190,
+        'color': {'name': 'yellow', 'url': 'u'},
+        'flavor_text_entries': [
+            {'flavor_text': 'Texte', 'language': {'name': 'fr'}, 'version': {'name': 'x'}},
+            {'flavor_text': 'When several of\nthese POKéMON gather', 'language': {'name': 'en'}, 'version': {'name': 'red'}},
+            {'flavor_text': 'Another entry', 'language': {'name': 'en'}, 'version': {'name': 'blue'}}
+        ],
+        'genera': [
+            {'genus': 'Maus-Pokémon', 'language': {'name': 'de'}},
+            {'genus': 'Mouse Pokémon', 'language': {'name': 'en'}}
+        ],
+        'generation': {'name': 'generation-i'},
+        'growth_rate': {'name': 'medium'},
+        'habitat': {'name': 'forest'},
+        'is_legendary': False,
+        'is_mythical': False,
+        'shape': {'name': 'quadruped'},
+        'varieties': [{'is_default': True, 'pokemon': {'name': 'pikachu'}}] * 20
+    }
+
+def test_stream_matches_full_parse():
+    """Test that streaming extraction equals projecting a fully parsed body"""
+    print("Testing streaming projection...")
+    body = build_pokemon_body()
+    raw = json.dumps(body).encode()
+    
+    streamed = stream_project(io.BytesIO(raw), POKEMON_FIELDS)
+    projected = project(body, POKEMON_FIELDS)
+    
+    if streamed != projected or 'moves' in streamed or 'game_indices' in streamed:
+        print("❌ Streamed projection differs from full parse")
+        return False
+    
+    stored = len(json.dumps(streamed))
+    print(f"✅ Projection keeps {stored} of {len(raw)} bytes")
+    return True
+
+def test_combined_data_unchanged():
+    """Test that combining projected data gives the same result as the full bodies"""
+    print("Testing combined Pokemon data...")
+    service = PokeAPIService()
+    pokemon, species = build_pokemon_body(), build_species_body()
+    
+    full = service._combine_pokemon_data(pokemon, species)
+    trimmed = service._combine_pokemon_data(
+        project(pokemon, POKEMON_FIELDS),
+        service._trim('/pokemon-species/25', species)
+    )
+    
+    if full != trimmed:
+        print("❌ Combined data changed after projection")
+        return False
+    
+    print(f"✅ Combined data identical ({trimmed['genus']}, {trimmed['sprites']['official_artwork']})")
+    return True
+
+def test_species_trim_keeps_first_english_entry():
+    """Test that species entries shrink to the single English text that is read"""
+    print("Testing species trimming...")
+    service = PokeAPIService()
+    trimmed = service._trim('/pokemon-species/25', build_species_body())
+    
+    if (len(trimmed['flavor_text_entries']) == 1 and len(trimmed['genera']) == 1 and
+            'varieties' not in trimmed):
+        print("✅ Species projection trimmed to used fields")
+        return True
+    print(f"❌ Unexpected species projection: {trimmed}")
+    return False
+
+def main():
+    """Run all projection tests"""
+    print("✂️  Running PokeAPI Projection Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_stream_matches_full_parse,
+        test_combined_data_unchanged,
+        test_species_trim_keeps_first_english_entry
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Projection Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script to verify health- and latency-aware AI provider routing
+"""
+
+import sys
+import os
+import io
+import json
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIProvider
+from app.services.provider_router import ProviderRouter
+from app.personality.chat_engine import ChatEngine
+
+POKEMON = {
+    'species_id': 25, 'species_name': 'Pikachu', 'nickname': 'Sparky', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Electric'], 'personality': {}
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class ProviderStubAdapter(BaseAdapter):
+    """Fails with a 500 or answers in the provider's response format"""
+    
+    def __init__(self, body=None):
+        super().__init__()
+        self.body = body
+        self.calls = 0
+    
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 200 if self.body else 500
+        response.raw = io.BytesIO(json.dumps(self.body or {'error': 'overloaded'}).encode())
+        return response
+    
+    def close(self):
+        pass
+
+def test_orders_by_latency_and_error_rate():
+    """Test that the faster provider leads and the preferred one wins ties"""
+    print("Testing latency ordering...")
+    router = ProviderRouter(clock=FakeClock())
+    providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    
+    untried = router.order(providers, preferred=AIProvider.CLAUDE)
+    router.record_success(AIProvider.OPENAI, 1.0)
+    router.record_success(AIProvider.CLAUDE, 0.5)
+    faster = router.order(providers, preferred=AIProvider.OPENAI)
+    router.record_failure(AIProvider.CLAUDE)
+    router.record_failure(AIProvider.CLAUDE)
+    flaky = router.order(providers, preferred=AIProvider.OPENAI)
+    
+    if (untried[0] == AIProvider.CLAUDE and faster[0] == AIProvider.CLAUDE
+            and flaky == [AIProvider.OPENAI, AIProvider.CLAUDE]):
+        print(f"✅ Fastest first, then demoted by errors: {router.snapshot()['claude']}")
+        return True
+    print(f"❌ Orders {untried} / {faster} / {flaky}")
+    return False
+
+def test_failing_unmeasured_provider_ranks_last():
+    """Test that a provider that has only failed is not ranked ahead of a measured one"""
+    print("Testing unmeasured failing provider...")
+    router = ProviderRouter(unmeasured_latency=30.0, clock=FakeClock())
+    providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    
+    router.record_success(AIProvider.OPENAI, 2.0)
+    untried = router.order(providers, preferred=AIProvider.OPENAI)
+    router.record_failure(AIProvider.CLAUDE)
+    failed = router.order(providers, preferred=AIProvider.CLAUDE)
+    
+    if untried[0] == AIProvider.CLAUDE and failed == [AIProvider.OPENAI, AIProvider.CLAUDE]:
+        print(f"✅ Sampled while untried, demoted after failing: {router.snapshot()['claude']}")
+        return True
+    print(f"❌ Orders {untried} / {failed}")
+    return False
+
+def test_circuit_opens_and_recovers():
+    """Test that a failure streak opens the circuit and one trial call closes it again"""
+    print("Testing circuit breaker...")
+    clock = FakeClock()
+    router = ProviderRouter(failure_threshold=3, cooldown=30, clock=clock)
+    providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    
+    for _ in range(3):
+        router.record_failure(AIProvider.OPENAI)
+    while_open = router.order(providers)
+    clock.now = 31
+    trial = router.order(providers)
+    during_trial = router.order(providers)
+    router.record_success(AIProvider.OPENAI, 0.4)
+    recovered = router.order(providers)
+    
+    if (while_open == [AIProvider.CLAUDE] and trial == [AIProvider.CLAUDE, AIProvider.OPENAI]
+            and during_trial == [AIProvider.CLAUDE] and AIProvider.OPENAI in recovered):
+        print("✅ Open circuit skipped, single trial after cooldown, closed on success")
+        return True
+    print(f"❌ Orders {while_open} / {trial} / {during_trial} / {recovered}")
+    return False
+
+def test_traffic_shifts_for_chat_and_first_encounters():
+    """Test that normal chat and first encounters both route around a failing provider"""
+    print("Testing routed call sites...")
+    engine = ChatEngine()
+    service = engine.ai_service
+    service.openai_api_key = 'test-key'
+    service.claude_api_key = 'test-key'
+    service.available_providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    service.preferred_provider = 'openai'
+    failing = ProviderStubAdapter()
+    healthy = ProviderStubAdapter({'content': [{'type': 'text', 'text': '*waves a paw*'}]})
+    service.sessions[AIProvider.OPENAI].mount('https://', failing)
+    service.sessions[AIProvider.CLAUDE].mount('https://', healthy)
+    
+    history = [{'sender': 'user', 'message': 'Hi'}]
+    replies = [engine.generate_response(POKEMON, 'Hello!', history) for _ in range(4)]
+    first_encounter = engine.generate_response(POKEMON, 'Nice to meet you!', [])
+    
+    if replies == ['*waves a paw*'] * 4 and first_encounter == '*waves a paw*' and failing.calls == 1:
+        print("✅ OpenAI demoted after its first failure; later chat and first encounter went to Claude")
+        return True
+    print(f"❌ Replies {replies}, first encounter {first_encounter!r}, failing calls {failing.calls}")
+    return False
+
+def main():
+    """Run all provider router tests"""
+    print("🔀 Running Provider Router Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_orders_by_latency_and_error_rate,
+        test_failing_unmeasured_provider_ranks_last,
+        test_circuit_opens_and_recovers,
+        test_traffic_shifts_for_chat_and_first_encounters
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Provider Router Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
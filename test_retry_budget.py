@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the per-message deadline and shared retry budget for AI calls
+"""
+
+import sys
+import os
+import time
+import random
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ai_chat_service import AIChatService, AIProvider
+from app.services.retry_budget import RetryBudget
+
+POKEMON = {
+    'species_id': 25, 'species_name': 'Pikachu', 'nickname': 'Sparky', 'level': 20,
+    'nature': 'Jolly', 'friendship': 120, 'types': ['Electric']
+}
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class ProviderStubAdapter(BaseAdapter):
+    """Either rate limits every call or hangs until the client's read timeout"""
+    
+    def __init__(self, mode):
+        super().__init__()
+        self.mode = mode
+        self.calls = 0
+    
+    def send(self, request, timeout=None, **kwargs):
+        self.calls += 1
+        if self.mode == 'hang':
+            time.sleep(timeout[1])
+            raise requests.exceptions.ReadTimeout("stub read timeout", request=request)
+        
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = 429
+        response.headers['Retry-After'] = '0.2'
+        return response
+    
+    def close(self):
+        pass
+
+def make_service(mode, deadline, retries):
+    os.environ.update({'AI_DEADLINE': str(deadline), 'AI_RETRY_BUDGET': str(retries)})
+    try:
+        service = AIChatService()
+    finally:
+        del os.environ['AI_DEADLINE']
+        del os.environ['AI_RETRY_BUDGET']
+    
+    service.openai_api_key = 'test-key'
+    service.claude_api_key = 'test-key'
+    service.available_providers = [AIProvider.OPENAI, AIProvider.CLAUDE]
+    adapter = ProviderStubAdapter(mode)
+    for session in service.sessions.values():
+        session.mount('https://', adapter)
+    return service, adapter
+
+def test_backoff_respects_deadline_and_budget():
+    """Test that jittered backoff is bounded by the retries and time left"""
+    print("Testing backoff bounds...")
+    clock = FakeClock()
+    budget = RetryBudget(deadline=6.0, retries=3, clock=clock, rng=random.Random(1))
+    
+    delays = []
+    for attempt in range(5):
+        delay = budget.next_backoff(attempt)
+        if delay is None:
+            break
+        delays.append(delay)
+        clock.now += delay + 0.5  # Time spent waiting plus the failed attempt
+    
+    near_deadline = RetryBudget(deadline=2.0, retries=3, clock=FakeClock(), rng=random.Random(1))
+    honoured = near_deadline.next_backoff(0, retry_after='30')
+    clamped = RetryBudget(deadline=3.0, retries=1, clock=FakeClock()).timeout(5, 30)
+    
+    if (len(delays) == 3 and all(d <= RetryBudget.BACKOFF_CAP for d in delays)
+            and honoured is None and clamped == (3.0, 3.0)):
+        print(f"✅ 3 jittered retries {[round(d, 2) for d in delays]}, long Retry-After refused, timeouts clamped")
+        return True
+    print(f"❌ delays {delays}, honoured {honoured}, clamped {clamped}")
+    return False
+
+def test_rate_limited_message_falls_back_within_deadline():
+    """Test that a message facing 429s on every provider returns by its deadline"""
+    print("Testing rate-limited fallback...")
+    service, adapter = make_service('rate_limited', deadline=2.5, retries=4)
+    
+    started = time.monotonic()
+    response = service.generate_pokemon_response("Hi!", POKEMON, [])
+    elapsed = time.monotonic() - started
+    
+    if response and elapsed <= 2.5 and 2 <= adapter.calls <= 6:
+        print(f"✅ Fallback reply after {elapsed:.2f}s and {adapter.calls} attempts")
+        return True
+    print(f"❌ {elapsed:.2f}s, {adapter.calls} attempts, response {response!r}")
+    return False
+
+def test_slow_provider_cut_off_at_deadline():
+    """Test that read timeouts are clamped so a hung provider cannot outlive the deadline"""
+    print("Testing hung provider...")
+    service, adapter = make_service('hang', deadline=1.5, retries=2)
+    
+    started = time.monotonic()
+    response = service.generate_pokemon_response("Hi!", POKEMON, [])
+    elapsed = time.monotonic() - started
+    
+    if response and elapsed < 2.0 and adapter.calls == 1:
+        print(f"✅ Hung provider abandoned after {elapsed:.2f}s (read timeout was {service.read_timeout:.0f}s)")
+        return True
+    print(f"❌ {elapsed:.2f}s, {adapter.calls} attempts")
+    return False
+
+def main():
+    """Run all retry budget tests"""
+    print("⏱️  Running Retry Budget Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_backoff_respects_deadline_and_budget,
+        test_rate_limited_message_falls_back_within_deadline,
+        test_slow_provider_cut_off_at_deadline
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Retry Budget Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the local sprite cache and thumbnail endpoint
+"""
+
+import sys
+import os
+import io
+import tempfile
+import requests
+from requests.adapters import BaseAdapter
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.models.pokemon import Pokemon
+from app.services.sprite_cache_service import SpriteCacheService, Image
+
+def make_png(size=475):
+    """Create a PNG shaped like official artwork"""
+    if Image is None:
+        return b'\x89PNG\r\n\x1a\n' + b'\x00' * 2048
+    output = io.BytesIO()
+    Image.new('RGBA', (size, size), (255, 204, 0, 255)).save(output, format='PNG')
+    return output.getvalue()
+
+class SpriteStubAdapter(BaseAdapter):
+    """Serves the same artwork for every sprite URL and counts fetches"""
+    
+    def __init__(self, status_code=200):
+        super().__init__()
+        self.fetches = 0
+        self.status_code = status_code
+        self.body = make_png() if status_code == 200 else b'Not Found'
+    
+    def send(self, request, **kwargs):
+        self.fetches += 1
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.status_code = self.status_code
+        response._content = self.body
+        return response
+    
+    def close(self):
+        pass
+
+def make_cache(cache_dir, status_code=200):
+    cache = SpriteCacheService(cache_dir=cache_dir)
+    adapter = SpriteStubAdapter(status_code)
+    cache.session.mount('https://', adapter)
+    return cache, adapter
+
+def test_thumbnail_fetched_once():
+    """Test that every size of a sprite comes from one upstream fetch"""
+    print("Testing sprite fetch-once behaviour...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache, adapter = make_cache(cache_dir)
+        path_small, digest_small = cache.get_thumbnail(25, 'artwork', 64)
+        path_large, digest_large = cache.get_thumbnail(25, 'artwork', 256)
+        cache.get_thumbnail(25, 'artwork', 64)
+        
+        if adapter.fetches != 1:
+            print(f"❌ Expected 1 upstream fetch, got {adapter.fetches}")
+            return False
+        
+        if Image is not None:
+            with Image.open(path_small) as image:
+                if image.size != (64, 64):
+                    print(f"❌ Thumbnail has wrong size {image.size}")
+                    return False
+        
+        if os.path.basename(path_small) != f"{digest_small}.png" or digest_small == digest_large:
+            print("❌ Thumbnails are not stored under content hashes")
+            return False
+        
+        print(f"✅ One fetch, {os.path.getsize(path_small)} byte thumbnail vs {len(adapter.body)} byte original")
+        return True
+
+def test_sprite_endpoint_caching_headers():
+    """Test that the endpoint serves long-lived, revalidatable responses"""
+    print("Testing sprite endpoint headers...")
+    from app.api import sprite_routes
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache, adapter = make_cache(cache_dir)
+        original_cache = sprite_routes.sprite_cache
+        sprite_routes.sprite_cache = cache
+        try:
+            app = create_app()
+            with app.test_client() as client:
+                response = client.get('/sprites/25/artwork/128')
+                etag = response.headers.get('ETag')
+                cache_control = response.headers.get('Cache-Control', '')
+                
+                repeat = client.get('/sprites/25/artwork/128', headers={'If-None-Match': etag})
+                invalid = client.get('/sprites/25/artwork/999')
+        finally:
+            sprite_routes.sprite_cache = original_cache
+        
+        if (response.status_code == 200 and etag and 'max-age=31536000' in cache_control and
+                repeat.status_code == 304 and invalid.status_code == 404):
+            print(f"✅ 200 with ETag {etag}, 304 on revalidation, 404 for unknown size")
+            return True
+        
+        print(f"❌ Unexpected responses: {response.status_code} {cache_control} {repeat.status_code} {invalid.status_code}")
+        return False
+
+def test_misses_are_cached_and_limited():
+    """Test that failed fetches are remembered, unknown species never fetched, and misses rate limited"""
+    print("Testing sprite miss handling...")
+    from app.api import sprite_routes
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache, adapter = make_cache(cache_dir, status_code=404)
+        original_cache = sprite_routes.sprite_cache
+        sprite_routes.sprite_cache = cache
+        try:
+            app = create_app()
+            with app.test_client() as client:
+                first = client.get('/sprites/151/shiny/64')
+                repeats = [client.get('/sprites/151/shiny/64').status_code for _ in range(200)]
+                fetches_after_repeats = adapter.fetches
+                unknown = client.get('/sprites/5000/artwork/64')
+                burst = [client.get(f'/sprites/{species_id}/home/96').status_code for species_id in range(1, 151)]
+        finally:
+            sprite_routes.sprite_cache = original_cache
+    
+    if (first.status_code == 302 and set(repeats) == {302} and fetches_after_repeats == 1
+            and unknown.status_code == 404 and 429 in burst and adapter.fetches < 150):
+        print(f"✅ One fetch for 201 requests to a missing sprite, unknown species refused, "
+              f"{burst.count(429)} of 150 misses rate limited")
+        return True
+    print(f"❌ first={first.status_code} fetches={fetches_after_repeats}/{adapter.fetches} unknown={unknown.status_code} "
+          f"limited={burst.count(429)}")
+    return False
+
+def test_thumbnail_uses_stored_sprite():
+    """Test that thumbnails come from the stored sprite URL, and custom images are kept as they are"""
+    print("Testing stored sprite URLs...")
+    base = SpriteCacheService.SPRITE_BASE_URL
+    artwork = Pokemon(species_id=25, official_artwork_url=f"{base}/other/official-artwork/25.png",
+                      sprite_url=f"{base}/25.png")
+    form = Pokemon(species_id=26, sprite_url=f"{base}/shiny/10100.png")
+    custom = Pokemon(species_id=133, sprite_url="https://example.com/my-eevee.png")
+    bare = Pokemon(species_id=7)
+    
+    thumbnails = [p.get_sprite_thumbnail(64) for p in (artwork, form, custom, bare)]
+    expected = ['/sprites/25/artwork/64', '/sprites/10100/shiny/64', 'https://example.com/my-eevee.png',
+                '/sprites/7/artwork/64']
+    if thumbnails == expected:
+        print("✅ Repository sprites served locally by their own variant and id, custom image kept")
+        return True
+    print(f"❌ Thumbnails {thumbnails}")
+    return False
+
+def main():
+    """Run all sprite cache tests"""
+    print("🖼️  Running Sprite Cache Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_thumbnail_fetched_once,
+        test_sprite_endpoint_caching_headers,
+        test_misses_are_cached_and_limited,
+        test_thumbnail_uses_stored_sprite
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Sprite Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test script to verify single-pass template rewriting matches the original modifier chains
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.personality.chat_engine import (
+    ChatEngine, DISTANT_REWRITES, AFFECTIONATE_REWRITES, BONDED_REWRITE, YOUNG_REWRITES, WISE_REWRITES
+)
+from app.personality.template_rewriter import TemplateRewriter
+
+class LegacyChatEngine(ChatEngine):
+    """
+    Template replies as they were before rewriters and variant tables: a template chosen
+    and personalized on every request, one str.replace pass per rule
+    """
+    
+    def _select_response_template(self, personality, message_type):
+        primary_trait = self._get_primary_personality_trait(personality)
+        templates = self.response_templates.get(message_type, {})
+        trait_templates = templates.get(primary_trait, templates.get('general', ['I understand.']))
+        return random.choice(trait_templates)
+    
+    def _personalize_response(self, template, pokemon_data, user_message):
+        response = template
+        friendship_level = pokemon_data.get('friendship', 0)
+        if friendship_level < 70:
+            response = self._make_response_distant(response)
+        elif friendship_level > 150:
+            response = self._make_response_affectionate(response, pokemon_data.get('nickname', 'friend'))
+        level = pokemon_data.get('level', 1)
+        if level < 25:
+            response = self._make_response_young(response)
+        elif level > 50:
+            response = self._make_response_wise(response)
+        return response
+    
+    def _make_response_distant(self, response):
+        distant_modifiers = [
+            lambda r: r.replace("!", "..."),
+            lambda r: r.replace("*bounces excitedly*", "*keeps distance, watching*"),
+            lambda r: r.replace("*approaches*", "*stays back, observing*"),
+            lambda r: r.replace("*nuzzles*", "*sniffs cautiously from afar*"),
+            lambda r: r.replace("trainer", "human"),
+        ]
+        for modifier in distant_modifiers:
+            response = modifier(response)
+        if "*" not in response:
+            response = "*ears back, maintaining distance* " + response
+        return response
+    
+    def _make_response_affectionate(self, response, nickname):
+        affectionate_modifiers = [
+            lambda r: r.replace("*approaches slowly*", "*bounds over eagerly*"),
+            lambda r: r.replace("*keeps distance*", "*comes close, seeking comfort*"),
+            lambda r: r.replace("human", "my trusted human"),
+            lambda r: r.replace("you", "you, my bonded one") if random.random() < 0.2 else r,
+        ]
+        for modifier in affectionate_modifiers:
+            response = modifier(response)
+        if random.random() < 0.4:
+            bonding_behaviors = [
+                "*rubs against you affectionately*",
+                "*nuzzles you with deep trust*",
+                "*settles close to your side*",
+                "*purrs contentedly in your presence*"
+            ]
+            response += f" {random.choice(bonding_behaviors)}"
+        return response
+    
+    def _make_response_young(self, response):
+        young_modifiers = [
+            lambda r: r.replace("*settles*", "*wiggles impatiently*"),
+            lambda r: r.replace("*approaches*", "*bounds over playfully*"),
+            lambda r: r.replace("*listens*", "*ears perked, practically vibrating with attention*"),
+            lambda r: r.replace("I sense", "Ooh, I feel"),
+            lambda r: r.replace("I understand", "I think I get it!"),
+        ]
+        for modifier in young_modifiers:
+            response = modifier(response)
+        if random.random() < 0.3:
+            youthful_additions = [
+                " *bounces with puppy-like enthusiasm*",
+                " *spins in excited circles*",
+                " *paws at the ground with eager energy*",
+                " *tilts head with innocent curiosity*"
+            ]
+            response += random.choice(youthful_additions)
+        return response
+    
+    def _make_response_wise(self, response):
+        wise_modifiers = [
+            lambda r: r.replace("*bounces*", "*settles with dignified composure*"),
+            lambda r: r.replace("*spins*", "*moves with measured grace*"),
+            lambda r: r.replace("That's exciting!", "That holds deep meaning."),
+        ]
+        for modifier in wise_modifiers:
+            response = modifier(response)
+        if random.random() < 0.3:
+            wise_additions = [
+                " *gazes with the wisdom of many seasons*",
+                " *nods with ancient understanding* I have seen much in my long life.",
+                " *settles with the patience that comes from experience*",
+                " My old bones have felt many such moments..."
+            ]
+            response += random.choice(wise_additions)
+        return response
+
+RULE_SETS = {
+    'distant': DISTANT_REWRITES,
+    'affectionate': AFFECTIONATE_REWRITES,
+    'bonded': AFFECTIONATE_REWRITES + [BONDED_REWRITE],
+    'young': YOUNG_REWRITES,
+    'wise': WISE_REWRITES
+}
+
+# Strings that hit every rule, on top of the real templates
+EDGE_CASES = [
+    "Hey trainer! *approaches* *nuzzles* *bounces excitedly*",
+    "*approaches slowly* you and your human *keeps distance*",
+    "*settles* *listens* I sense it. I understand! *bounces* *spins* That's exciting!",
+    "!!! trainertrainer youyou humanhuman",
+    ""
+]
+
+def chained(rules, text):
+    """The rules applied the old way, one str.replace pass each"""
+    for old, new in rules:
+        text = text.replace(old, new)
+    return text
+
+def test_output_identical_to_chained_replace():
+    """Test that every rewriter gives the same output as its rules chained with str.replace"""
+    print("Testing compiled rewriters against the legacy chains...")
+    engine = ChatEngine()
+    templates = [template for by_trait in engine.response_templates.values()
+                 for trait_templates in by_trait.values() for template in trait_templates]
+    
+    compared = 0
+    for name, rules in RULE_SETS.items():
+        for template in templates + EDGE_CASES:
+            actual, expected = engine.rewriters[name].apply(template), chained(rules, template)
+            if actual != expected:
+                print(f"❌ {name}: {actual!r} != {expected!r}")
+                return False
+            compared += 1
+    
+    print(f"✅ {compared} rewrites identical across {len(templates)} templates and {len(RULE_SETS)} rule sets")
+    return True
+
+def test_rejects_rules_that_depend_on_order():
+    """Test that rule sets a single scan could not reproduce are refused"""
+    print("Testing order-dependent rule sets...")
+    rejected = 0
+    for rules in ([("cat", "dog"), ("dog", "fox")],         # Later rule rewrites an earlier result
+                  [("*spins*", "*a*"), ("spin", "twirl")],  # One rule's text contains another's
+                  [("", "x")]):
+        try:
+            TemplateRewriter(rules)
+        except ValueError:
+            rejected += 1
+    
+    # An earlier rule's text in a later result is fine - str.replace never revisits it either
+    allowed = TemplateRewriter([("dog", "fox"), ("cat", "dog")]).apply("cat dog")
+    
+    if rejected == 3 and allowed == "dog fox":
+        print("✅ Order-dependent rule sets raise ValueError")
+        return True
+    print(f"❌ Rejected {rejected}/3, allowed set gave {allowed!r}")
+    return False
+
+def main():
+    """Run all template rewriter tests"""
+    print("✏️ Running Template Rewriter Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_output_identical_to_chained_replace,
+        test_rejects_rules_that_depend_on_order
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Template Rewriter Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
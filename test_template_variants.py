@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script to verify precomputed template variants reply exactly as per-request personalizing did
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.personality.chat_engine import ChatEngine, PERSONALITY_TRAITS, FRIENDSHIP_BANDS, LEVEL_BANDS
+from test_template_rewriter import LegacyChatEngine
+
+MESSAGES = ["Hello there!", "You're amazing!", "What do you like to eat?", "Let's go for a walk"]
+
+PERSONALITIES = [
+    {'species_personality': 'energetic'},
+    {'species_personality': 'gentle'},
+    {'species_personality': 'confident'},
+    {'species_personality': 'playful'},
+    {'type_influence': 'mysterious'},
+    {'nature_traits': 'shy'}
+]
+
+def legacy_reply(legacy, pokemon, message):
+    """A template reply chosen and personalized on every request, as before the tables"""
+    message_type = legacy._analyze_message_type(message.lower())
+    template = legacy._select_response_template(pokemon['personality'], message_type)
+    return legacy._personalize_response(template, pokemon, message)
+
+def test_replies_identical_under_seeded_rng():
+    """Test that every trait, intent, friendship and level gives the legacy reply and RNG state"""
+    print("Testing variant table replies against per-request personalizing...")
+    engine, legacy = ChatEngine(), LegacyChatEngine()
+    
+    compared = 0
+    for personality in PERSONALITIES:
+        for message in MESSAGES:
+            for friendship in (30, 100, 200):
+                for level in (10, 40, 70):
+                    pokemon = {'nickname': 'Button', 'friendship': friendship, 'level': level,
+                               'personality': personality}
+                    for seed in range(40):
+                        random.seed(seed)
+                        expected = legacy_reply(legacy, pokemon, message)
+                        expected_next = random.random()
+                        random.seed(seed)
+                        actual = engine._generate_template_response(pokemon, message)
+                        if actual != expected or random.random() != expected_next:
+                            print(f"❌ Seed {seed}, {personality}, friendship {friendship}, level {level}: "
+                                  f"{actual!r} != {expected!r}")
+                            return False
+                        compared += 1
+    
+    print(f"✅ {compared} seeded replies identical")
+    return True
+
+def test_tables_cover_every_combination():
+    """Test that startup expands every known combination and unknown intents are built on use"""
+    print("Testing variant table coverage...")
+    engine = ChatEngine()
+    expected = len(engine.response_templates) * len(PERSONALITY_TRAITS) * len(FRIENDSHIP_BANDS) * len(LEVEL_BANDS)
+    if len(engine.template_variants) != expected:
+        print(f"❌ {len(engine.template_variants)} tables built at startup, expected {expected}")
+        return False
+    
+    # Intents added to the classifier later fall back to the general reply
+    engine.intent_classifier.add('farewell', 'goodbye', 3)
+    pokemon = {'nickname': 'Button', 'friendship': 100, 'level': 40, 'personality': {'nature_traits': 'shy'}}
+    reply = engine._generate_template_response(pokemon, "Goodbye for now")
+    if reply != 'I understand.' or ('shy', 'farewell', None, None) not in engine.template_variants:
+        print(f"❌ Unknown intent replied {reply!r}")
+        return False
+    
+    print(f"✅ {expected} tables built at startup, unknown intents expanded on first use")
+    return True
+
+def main():
+    """Run all template variant tests"""
+    print("📋 Running Template Variant Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_replies_identical_under_seeded_rng,
+        test_tables_cover_every_combination
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Template Variant Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script to verify token-budget-aware packing of conversation history
+"""
+
+import sys
+import os
+import logging
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services import token_budget
+from app.services.ai_chat_service import AIChatService
+from app.services.token_budget import TokenCounter, pack_history, TURN_OVERHEAD
+
+class WordCounter(TokenCounter):
+    """Deterministic one-token-per-word counter"""
+    
+    @property
+    def exact(self):
+        return True
+    
+    def count(self, text):
+        return len(text.split())
+
+def test_packs_most_recent_turns_within_budget():
+    """Test that the newest turns that fit are kept and the counts are reported"""
+    print("Testing history packing...")
+    history = [
+        {'sender': 'user', 'message': 'a long story ' * 10},  # 30 tokens
+        {'sender': 'pokemon', 'message': 'wow'},
+        {'sender': 'user', 'message': 'and then?'},
+        {'sender': 'pokemon', 'message': 'tell me more'}
+    ]
+    kept, stats = pack_history(history, 'the end', token_budget=30, counter=WordCounter())
+    
+    expected_total = (2 + 1 + 2 + 3) + 4 * TURN_OVERHEAD
+    if (kept == history[1:] and stats['total_tokens'] == expected_total
+            and stats['turns_kept'] == 3 and stats['turns_dropped'] == 1 and stats['total_tokens'] <= 30):
+        print(f"✅ Kept 3 recent turns in {stats['total_tokens']}/30 tokens, dropped the long one")
+        return True
+    print(f"❌ Kept {kept}, stats {stats}")
+    return False
+
+def test_estimate_without_tokenizer():
+    """Test that token counts fall back to a character estimate"""
+    print("Testing tokenizer fallback...")
+    counter = TokenCounter(encoding_name=None)  # As if tiktoken or its encoding were unavailable
+    
+    if counter.count('x' * 40) == 10 and counter.count('hi') == 1 and not counter.exact:
+        print("✅ 40 characters estimated as 10 tokens")
+        return True
+    print(f"❌ Estimated {counter.count('x' * 40)} tokens")
+    return False
+
+def test_encoding_failure_cached_per_process():
+    """Test that an encoding that fails to load is tried and warned about once, not per counter"""
+    print("Testing tokenizer load caching...")
+    
+    class OfflineTiktoken:
+        calls = 0
+        
+        def get_encoding(self, name):
+            OfflineTiktoken.calls += 1
+            raise ConnectionError("no network")
+    
+    class Warnings(logging.Handler):
+        def __init__(self):
+            super().__init__(logging.WARNING)
+            self.records = []
+        
+        def emit(self, record):
+            self.records.append(record)
+    
+    warnings = Warnings()
+    original = token_budget.tiktoken
+    token_budget.tiktoken = OfflineTiktoken()
+    token_budget.logger.addHandler(warnings)
+    try:
+        counters = [TokenCounter('offline_test_base') for _ in range(3)]
+        counts = [counter.count('x' * 40) for counter in counters]
+    finally:
+        token_budget.tiktoken = original
+        token_budget.logger.removeHandler(warnings)
+        token_budget._encodings.pop('offline_test_base', None)
+    
+    if OfflineTiktoken.calls == 1 and len(warnings.records) == 1 and counts == [10, 10, 10]:
+        print("✅ One load attempt and one warning for three counters, then estimates")
+        return True
+    print(f"❌ {OfflineTiktoken.calls} load attempts, {len(warnings.records)} warnings, counts {counts}")
+    return False
+
+def test_service_fills_budget_without_duplicating_message():
+    """Test that the service sends more short turns than the old fixed 6, and the new message once"""
+    print("Testing service packing...")
+    service = AIChatService()
+    service.token_counter = WordCounter()
+    service.history_token_budget = 200
+    
+    history = []
+    for i in range(10):
+        history.append({'sender': 'user', 'message': f'ball {i}?'})
+        history.append({'sender': 'pokemon', 'message': f'*fetches {i}*'})
+    history.append({'sender': 'user', 'message': 'Again!'})  # Saved before the history was loaded
+    
+    messages = service._build_conversation_messages('Again!', history)
+    sent = sum(len(m['content'].split('\n')) for m in messages)
+    
+    if messages[-1] == {'role': 'user', 'content': 'Again!'} and sent > 7:
+        print(f"✅ {sent} messages sent within 200 tokens, new message sent once")
+        return True
+    print(f"❌ Messages: {messages}")
+    return False
+
+def main():
+    """Run all token budget tests"""
+    print("🧮 Running Token Budget Tests")
+    print("=" * 40)
+    
+    tests = [
+        test_packs_most_recent_turns_within_budget,
+        test_estimate_without_tokenizer,
+        test_encoding_failure_cached_per_process,
+        test_service_fills_budget_without_duplicating_message
+    ]
+    
+    passed = 0
+    for test in tests:
+        try:
+            if test():
+                passed += 1
+        except Exception as e:
+            print(f"❌ Test failed with error: {e}")
+    
+    print("=" * 40)
+    print(f"Token Budget Tests: {passed}/{len(tests)} passed")
+    return 0 if passed == len(tests) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Train the offline fallback reply model from the Pokemon replies stored in chat history
+
+When no AI provider can answer, replies are sampled from per-species, per-friendship
+word models built here instead of cycling through the same few templates. Re-run it
+as conversations accumulate; the app maps the new file on its next start.
+
+Only AI-written replies are used, so template and fallback model output is never fed
+back into the model. Each reply trains the friendship band the Pokemon was in when it
+was written. Replies saved before sources and friendship were recorded are skipped
+unless --include-untagged is given (they are banded by the current friendship).
+
+Examples:
+    python train_fallback_model.py
+    python train_fallback_model.py --min-replies 20 --output /srv/pokechat/fallback_ngram.bin
+    python train_fallback_model.py --include-untagged
+"""
+
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.ngram_fallback import DEFAULT_MODEL_PATH, NgramTrainer
+
+def train_from_db(trainer, include_untagged=False, batch_size=1000):
+    """Feed every stored AI-written Pokemon reply to the trainer, returning how many were read"""
+    from sqlalchemy import func
+    from app import create_app
+    from app.models.pokemon import db, Pokemon, ChatMessage
+
+    app = create_app()
+    with app.app_context():
+        ai_written = (ChatMessage.source == 'ai') & ChatMessage.friendship.isnot(None)
+        friendship = ChatMessage.friendship
+        if include_untagged:
+            ai_written = ChatMessage.source.is_(None) | (ChatMessage.source == 'ai')
+            friendship = func.coalesce(ChatMessage.friendship, Pokemon.friendship)
+        replies = db.session.query(ChatMessage.message, Pokemon.species_id, friendship, Pokemon.nickname,
+                                   Pokemon.species_name, Pokemon.original_trainer)\
+            .join(Pokemon, ChatMessage.pokemon_id == Pokemon.id)\
+            .filter(ChatMessage.sender == 'pokemon', ai_written)\
+            .yield_per(batch_size)
+
+        count = 0
+        for message, species_id, written_friendship, nickname, species_name, trainer_name in replies:
+            trainer.add(message, species_id, written_friendship or 0, nickname,
+                        species_name=species_name, trainer_name=trainer_name)
+            count += 1
+        return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the offline fallback reply model from chat history")
+    parser.add_argument('--output', default=None,
+                        help="Model file (default: AI_FALLBACK_MODEL or instance/fallback_ngram.bin)")
+    parser.add_argument('--min-replies', type=int, default=5,
+                        help="Replies a species needs in a friendship band for its own model (default: 5)")
+    parser.add_argument('--include-untagged', action='store_true',
+                        help="Also train on replies saved before reply sources and friendship were recorded")
+    args = parser.parse_args()
+
+    output = args.output or os.getenv('AI_FALLBACK_MODEL', DEFAULT_MODEL_PATH)
+    trainer = NgramTrainer(min_replies=max(1, args.min_replies))
+
+    print("🧠 Training fallback reply model from chat history")
+    started = time.monotonic()
+    replies = train_from_db(trainer, include_untagged=args.include_untagged)
+    if not replies:
+        print("❌ No AI-written Pokemon replies in the chat history yet - nothing to train on")
+        return 1
+
+    stats = trainer.write(output)
+    elapsed = time.monotonic() - started
+
+    print(f"✅ {replies} replies -> {stats['models']} models "
+          f"({stats['species']} species plus pooled per-band models) in {elapsed:.1f}s")
+    print(f"   {stats['states']} contexts, {stats['transitions']} transitions, "
+          f"{stats['vocabulary']} words, {stats['bytes'] / 1024:.1f} KiB")
+    print(f"   Written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
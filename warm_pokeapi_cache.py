@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Warm-up script to pre-populate the PokeAPI cache before a node takes traffic
+
+Examples:
+    python warm_pokeapi_cache.py --generation 1 --generation 8
+    python warm_pokeapi_cache.py --range 1-151 --concurrency 8 --rate 10
+    python warm_pokeapi_cache.py --from-db --revalidate --resume
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import BaseAdapter, HTTPAdapter
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.pokeapi_service import PokeAPIService
+
+# National Pokedex ranges per generation
+GENERATION_RANGES = {
+    1: (1, 151),
+    2: (152, 251),
+    3: (252, 386),
+    4: (387, 493),
+    5: (494, 649),
+    6: (650, 721),
+    7: (722, 809),
+    8: (810, 905),
+    9: (906, 1025)
+}
+
+class RateLimitedAdapter(BaseAdapter):
+    """Transport adapter that spaces outgoing requests to stay polite to PokeAPI"""
+
+    def __init__(self, rate: float, adapter: BaseAdapter = None):
+        super().__init__()
+        self.adapter = adapter or HTTPAdapter()
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        if self.interval:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self.interval
+            if wait > 0:
+                time.sleep(wait)
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+def parse_range(value):
+    """Parse '1-151' or '25' into a list of species IDs"""
+    try:
+        if '-' in value:
+            start, end = (int(part) for part in value.split('-', 1))
+        else:
+            start = end = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid species range: {value}")
+    if start < 1 or end < start:
+        raise argparse.ArgumentTypeError(f"Invalid species range: {value}")
+    return list(range(start, end + 1))
+
+def species_from_db():
+    """Get every species ID currently stored in the Pokedex"""
+    from app import create_app
+    from app.models.pokemon import db, Pokemon
+
+    app = create_app()
+    with app.app_context():
+        return [row[0] for row in db.session.query(Pokemon.species_id).distinct()]
+
+def collect_species(args):
+    """Build the sorted, de-duplicated target list from the CLI arguments"""
+    species = set()
+    for id_range in args.range or []:
+        species.update(id_range)
+    for generation in args.generation or []:
+        start, end = GENERATION_RANGES[generation]
+        species.update(range(start, end + 1))
+    if args.from_db:
+        species.update(species_from_db())
+    return sorted(species)
+
+def load_state(state_file, targets):
+    """Load completed species from an interrupted run with the same targets"""
+    try:
+        with open(state_file, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if state.get('targets') != targets:
+        return set()
+    return set(state.get('completed', []))
+
+def save_state(state_file, targets, completed):
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'targets': targets, 'completed': sorted(completed)}, f)
+    os.replace(tmp_path, state_file)
+
+def warm_cache(service, species_ids, concurrency=4, revalidate=False,
+               state_file=None, completed=None, targets=None):
+    """
+    Warm the cache for species_ids using a bounded worker pool
+    Returns a summary of endpoint statuses plus the species that failed
+    """
+    completed = set(completed or ())
+    summary = {'cached': 0, 'not_modified': 0, 'fetched': 0, 'stale': 0, 'failed': 0}
+    failed_species = []
+    lock = threading.Lock()
+
+    pending = [species_id for species_id in species_ids if species_id not in completed]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(service.warm_species, species_id, revalidate): species_id
+            for species_id in pending
+        }
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            species_id = futures[future]
+            try:
+                statuses = future.result()
+            except Exception as e:
+                statuses = {'error': 'failed'}
+                print(f"  ❌ #{species_id}: {e}")
+
+            with lock:
+                for status in statuses.values():
+                    summary[status] += 1
+                if 'failed' in statuses.values() or 'stale' in statuses.values():
+                    failed_species.append(species_id)
+                else:
+                    completed.add(species_id)
+                    if state_file:
+                        save_state(state_file, targets, completed)
+
+            if done % 25 == 0 or done == len(pending):
+                print(f"  ⏳ {done}/{len(pending)} species processed")
+
+    return summary, sorted(failed_species)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-populate the PokeAPI species cache")
+    parser.add_argument('--range', action='append', type=parse_range,
+                        help="Species ID range such as 1-151 (repeatable)")
+    parser.add_argument('--generation', action='append', type=int, choices=sorted(GENERATION_RANGES),
+                        help="Warm every species of a generation (repeatable)")
+    parser.add_argument('--from-db', action='store_true',
+                        help="Warm every species present in the Pokedex database")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Maximum parallel species fetches (default: 4)")
+    parser.add_argument('--rate', type=float, default=5.0,
+                        help="Maximum requests per second to PokeAPI, 0 for unlimited (default: 5)")
+    parser.add_argument('--revalidate', action='store_true',
+                        help="Revalidate fresh entries with conditional requests too")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip species completed by an interrupted run with the same targets")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Cache directory (default: POKEAPI_CACHE_DIR or instance/pokeapi_cache)")
+    args = parser.parse_args()
+
+    species_ids = collect_species(args)
+    if not species_ids:
+        parser.error("Nothing to warm - pass --range, --generation or --from-db")
+
+    concurrency = max(1, args.concurrency)
+    service = PokeAPIService(cache_dir=args.cache_dir)
+    service.session.mount('https://', RateLimitedAdapter(
+        args.rate, HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    ))
+
+    state_file = os.path.join(service.cache.cache_dir, 'warmup_state.json')
+    completed = load_state(state_file, species_ids) if args.resume else set()
+
+    print(f"🔥 Warming PokeAPI cache for {len(species_ids)} species "
+          f"(concurrency {concurrency}, {args.rate or 'unlimited'} req/s)")
+    if completed:
+        print(f"   Resuming - {len(completed)} species already done")
+
+    started = time.monotonic()
+    summary, failed = warm_cache(
+        service, species_ids,
+        concurrency=concurrency,
+        revalidate=args.revalidate,
+        state_file=state_file,
+        completed=completed,
+        targets=species_ids
+    )
+    elapsed = time.monotonic() - started
+
+    print(f"\n📊 Endpoint results: {summary}")
+    print(f"⏱️  Finished in {elapsed:.1f}s")
+
+    if failed:
+        print(f"⚠️  {len(failed)} species failed: {failed[:20]}{'...' if len(failed) > 20 else ''}")
+        print("   Re-run with --resume to retry only the failures")
+        return 1
+
+    if os.path.exists(state_file):
+        os.remove(state_file)
+    print("✅ Cache warm-up complete")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())